@@ -1,18 +1,162 @@
-from flask import Flask, send_from_directory
+import mimetypes
+import os
+import stat
+
+from flask import Flask, Response, abort, request, send_file
+from flask.json.provider import DefaultJSONProvider
 from pathlib import Path
+from types import MappingProxyType
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
 
+from .compression import CompressionMiddleware, negotiate
 from .config import config as app_config
+from .http_cache import apply_validators, file_validators, not_modified
+from .icon_pipeline import srcset
+from .icon_cache import icon_cache
+from .icon_store import content_hash, guess_mime, is_content_addressed
+from .metrics import metrics
+from .profiling import request_profiler
+from .static_assets import static_assets
+
+
+class SnapshotJSONProvider(DefaultJSONProvider):
+    """支持序列化只读配置快照（MappingProxyType）的 JSON 提供器"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__)
+app.json = SnapshotJSONProvider(app)
 
 # 使用配置系统设置应用参数
 app.config['MAX_CONTENT_LENGTH'] = app_config.max_content_length
 app.config['DEBUG'] = app_config.debug
 
+# 模板中生成图标多分辨率版本的 srcset
+app.add_template_filter(srcset, 'icon_srcset')
+
+# 计算静态文件指纹并生成预压缩版本
+static_assets.build()
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """url_for('static', ...) 生成带内容指纹的文件名"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = static_assets.url_filename(values['filename'])
+
+def serve_static(filename):
+    """
+    提供静态文件
+    
+    带当前指纹的 URL 永久缓存；按 Accept-Encoding 返回预压缩的 .br / .gz 版本。
+    """
+    original, digest, encodings = static_assets.resolve(filename)
+    path = safe_join(app.static_folder, original)
+    if path is None:
+        abort(404)
+    try:
+        st = os.stat(path)
+    except OSError:
+        abort(404)
+    if not stat.S_ISREG(st.st_mode):
+        abort(404)
+    
+    immutable = filename != original and static_assets.fingerprint_of(filename) == digest
+    route = 'static_immutable' if immutable else 'static'
+    if digest is None:
+        etag, last_modified = file_validators(path, st)
+    else:
+        etag, last_modified = digest, st.st_mtime
+    response = not_modified(route, etag, last_modified, variants=encodings)
+    if response:
+        return response
+    
+    encoding = negotiate(request.headers.get('Accept-Encoding'), encodings)
+    suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+    mimetype = mimetypes.guess_type(original)[0] or 'application/octet-stream'
+    response = send_file(path + suffix, mimetype=mimetype, conditional=False,
+                         etag=False, max_age=None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    return apply_validators(response, route, etag, last_modified)
+
+app.view_functions['static'] = serve_static
+
+# 压缩动态响应（已压缩的缓存页面和预压缩静态文件原样通过）
+if app_config.compression_enabled:
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        level=app_config.compression_level,
+        min_size=app_config.compression_min_size,
+        mimetypes=app_config.compression_types,
+    )
+
+# 记录各路由的请求数和处理时间
+if metrics.enabled:
+    metrics.init_app(app)
+
+# 按需剖析请求（PROFILE_SAMPLE_RATE / PROFILE_SECRET），未启用时不注册钩子
+if request_profiler.enabled:
+    request_profiler.init_app(app)
+
 # 添加从config/img提供静态文件的路由
 @app.route('/config/img/<path:filename>')
 def serve_config_images(filename):
-    """提供配置文件中的图片"""
-    return send_from_directory(app_config.images_path, filename)
+    """
+    提供配置文件中的图片（ETag 基于文件内容哈希，内容寻址的文件永久缓存）
+    
+    小文件从内存 LRU 缓存返回，大文件通过 wsgi.file_wrapper 以文件流发送。
+    """
+    route = 'icons_immutable' if is_content_addressed(filename) else 'icons'
+    
+    entry = icon_cache.get(filename)
+    if entry is None:
+        path = safe_join(app_config.images_path, filename)
+        if path is None:
+            abort(404)
+        try:
+            st = os.stat(path)
+        except OSError:
+            abort(404)
+        if not stat.S_ISREG(st.st_mode):
+            abort(404)
+        entry = icon_cache.load(filename, path, st)
+        if entry is None:
+            return _send_large_image(filename, path, st, route)
+    
+    response = not_modified(route, entry.etag, entry.last_modified, variants=())
+    if response:
+        return response
+    
+    if metrics.enabled:
+        metrics.icon_bytes.inc(('memory',), len(entry.body))
+    response = Response(entry.body, mimetype=entry.content_type)
+    return apply_validators(response, route, entry.etag, entry.last_modified)
+
+def _send_large_image(filename: str, path: str, st: os.stat_result, route: str):
+    """以文件流发送不缓存的大图片（服务器支持时使用 sendfile）"""
+    if route == 'icons_immutable':
+        # 文件名就是内容哈希，无需读取文件计算
+        etag, last_modified = content_hash(filename), st.st_mtime
+    else:
+        etag, last_modified = file_validators(path, st)
+    response = not_modified(route, etag, last_modified, variants=())
+    if response:
+        return response
+    
+    if metrics.enabled:
+        metrics.icon_bytes.inc(('file',), st.st_size)
+    response = Response(wrap_file(request.environ, open(path, 'rb')),
+                        mimetype=guess_mime(filename) or 'application/octet-stream',
+                        direct_passthrough=True)
+    response.content_length = st.st_size
+    return apply_validators(response, route, etag, last_modified)
 
 from app import routes
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+变化推送模块 - 通过 Server-Sent Events 推送配置变化
+ConfigManager 每发布一个新版本就生成一个事件：由操作产生的版本附带精简后的操作列表，
+页面按相同规则增量更新 DOM；其他变化（整体保存、外部修改）只通知页面重新加载。
+页面以配置内容摘要作为初始位置，不依赖渲染页面的进程
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from .config import config as app_config
+from .config_manager import config_manager
+from .config_snapshot import ConfigSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 推送给页面的项目字段
+ITEM_FIELDS = ('title', 'url', 'icon', 'icon_variants')
+# 等待事件时的检查间隔（秒）：校验配置是否被其他进程修改、客户端是否已断开
+POLL_INTERVAL = 1.0
+
+
+def compact_operations(operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """精简操作列表，项目只保留页面显示需要的字段"""
+    compacted = []
+    for op in operations:
+        op = dict(op)
+        if 'item' in op:
+            op['item'] = {field: op['item'][field] for field in ITEM_FIELDS
+                          if op['item'].get(field) is not None}
+        compacted.append(op)
+    return compacted
+
+
+class ChangeEvent:
+    """
+    一次版本变化
+
+    Attributes:
+        version: 变化后的配置版本号
+        base: 变化前的配置版本号
+        digest: 变化后的配置内容摘要
+        payload: SSE 消息（含 id / event / data 行）
+    """
+
+    __slots__ = ('version', 'base', 'digest', 'payload')
+
+    def __init__(self, version: int, base: int, digest: str, payload: bytes):
+        self.version = version
+        self.base = base
+        self.digest = digest
+        self.payload = payload
+
+
+class Subscriber:
+    """一个 SSE 连接的事件队列"""
+
+    __slots__ = ('queue', 'overflowed')
+
+    def __init__(self, max_queue: int):
+        self.queue: Deque[ChangeEvent] = deque(maxlen=max_queue)
+        # 队列满时置位，之后只通知页面重新加载
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """
+    配置变化推送
+
+    每个连接有独立的有界队列，另外保留最近 history 个事件，断线重连时按 Last-Event-ID 补发。
+    waitress 以线程处理请求，一个连接会占用一个工作线程，因此连接数有上限
+    （默认为工作线程数的四分之一，见 AppConfig.events_max_subscribers），
+    每个连接最多保持 max_duration 秒（之后由浏览器按 retry 自动重连），
+    期间每 heartbeat 秒发送一次心跳，写入失败即释放线程。
+    """
+
+    def __init__(self, enabled: bool = True, max_subscribers: int = 4, max_queue: int = 64,
+                 history: int = 256, heartbeat: float = 15.0, max_duration: float = 60.0,
+                 retry_ms: int = 1000):
+        """
+        初始化推送
+
+        Args:
+            enabled: 是否启用
+            max_subscribers: 同时连接数上限（应明显小于 waitress 工作线程数）
+            max_queue: 每个连接的事件队列长度，溢出时通知页面重新加载
+            history: 保留的最近事件数，用于断线补发
+            heartbeat: 心跳间隔（秒）
+            max_duration: 单个连接的最长保持时间（秒）
+            retry_ms: 浏览器重连间隔（毫秒）
+        """
+        self.enabled = enabled
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self.retry_ms = retry_ms
+        # 进程实例标识：版本号只在进程内连续，其他进程的事件 ID 只能按内容摘要比较
+        self.instance = os.urandom(4).hex()
+        self._history: Deque[ChangeEvent] = deque(maxlen=history)
+        self._subscribers: List[Subscriber] = []
+        self._cond = threading.Condition()
+        self._stats = {"published": 0, "rejected": 0, "overflows": 0}
+
+    def event_id(self, version: int, digest: str) -> str:
+        """SSE 事件 ID（进程实例:版本号:内容摘要）"""
+        return f'{self.instance}:{version}:{digest}'
+
+    def _parse_id(self, event_id: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+        """
+        解析事件 ID 或页面渲染时的内容摘要
+
+        Returns:
+            (版本号, 内容摘要)，不属于当前进程实例时版本号为 None
+        """
+        parts = (event_id or '').split(':')
+        digest = parts[-1] or None
+        if len(parts) == 3 and parts[0] == self.instance and parts[1].isdigit():
+            return int(parts[1]), digest
+        return None, digest
+
+    def _make_event(self, version: int, base: int, digest: str,
+                    data: Dict[str, Any]) -> ChangeEvent:
+        """生成 SSE 消息"""
+        body = json.dumps(dict(data, version=version), ensure_ascii=False,
+                          separators=(',', ':'))
+        payload = f'id: {self.event_id(version, digest)}\nevent: change\ndata: {body}\n\n'
+        return ChangeEvent(version, base, digest, payload.encode('utf-8'))
+
+    def publish(self, snapshot: ConfigSnapshot, base: int,
+                operations: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        发布一次版本变化（由 ConfigManager 在持有锁时调用，不能阻塞）
+
+        事件 ID 需要内容摘要，因此启用时每个版本在发布时计算一次摘要（页面 ETag 同样需要）。
+
+        Args:
+            snapshot: 新发布的快照
+            base: 变化前的配置版本号
+            operations: 产生此版本的操作列表，为 None 时页面需要重新加载
+        """
+        if not self.enabled:
+            return
+        if operations:
+            data = {"base": base, "ops": compact_operations(operations)}
+        else:
+            data = {"base": base, "reload": True}
+        event = self._make_event(snapshot.version, base, snapshot.digest, data)
+
+        with self._cond:
+            self._history.append(event)
+            self._stats["published"] += 1
+            for subscriber in self._subscribers:
+                if len(subscriber.queue) == self.max_queue:
+                    subscriber.queue.clear()
+                    subscriber.overflowed = True
+                    self._stats["overflows"] += 1
+                if not subscriber.overflowed:
+                    subscriber.queue.append(event)
+            self._cond.notify_all()
+
+    def _backlog(self, last_version: Optional[int], last_digest: Optional[str],
+                 current: int, current_digest: str) -> Tuple[List[ChangeEvent], bool]:
+        """
+        连接时需要补发的事件（需持有 _cond）
+
+        页面位置来自其他进程（或进程重启前）时无法按版本号补发：
+        内容与当前配置相同则从当前版本继续，否则页面需要重新加载。
+
+        Returns:
+            (事件列表, 是否无法补发需要页面重新加载)
+        """
+        if last_version is None:
+            return [], last_digest != current_digest
+        if last_version == current:
+            return [], False
+        if last_version > current:
+            return [], True
+        events = [event for event in self._history if event.version > last_version]
+        if not events or events[0].base != last_version:
+            return [], True
+        return events, False
+
+    def subscribe(self, last_event_id: Optional[str],
+                  disconnected: Callable[[], bool]) -> Iterator[bytes]:
+        """
+        SSE 连接的消息流
+
+        连接在开始迭代时才注册，结束（包括写入失败时被服务器关闭）后注销；
+        连接数已满时只告诉浏览器稍后重连。
+
+        Args:
+            last_event_id: 页面最后收到的事件 ID（或页面渲染时的内容摘要）
+            disconnected: 判断客户端是否已断开
+        """
+        # 先校验配置，发现的外部修改会先发布到历史中
+        snapshot = config_manager.get_snapshot()
+        current_version, current_digest = snapshot.version, snapshot.digest
+        subscriber = Subscriber(self.max_queue)
+        with self._cond:
+            if len(self._subscribers) >= self.max_subscribers:
+                self._stats["rejected"] += 1
+                yield f'retry: {max(self.retry_ms, int(self.heartbeat * 1000))}\n\n'.encode('utf-8')
+                return
+            if self._history and self._history[-1].version > current_version:
+                # 校验之后、加锁之前发布的事件也需要补发
+                current_version = self._history[-1].version
+                current_digest = self._history[-1].digest
+            last_version, last_digest = self._parse_id(last_event_id)
+            backlog, reload = self._backlog(last_version, last_digest,
+                                            current_version, current_digest)
+            subscriber.queue.extend(backlog)
+            subscriber.overflowed = reload or len(backlog) > self.max_queue
+            self._subscribers.append(subscriber)
+
+        try:
+            yield f'retry: {self.retry_ms}\n\n'.encode('utf-8')
+            now = time.monotonic()
+            deadline = now + self.max_duration
+            next_heartbeat = now + self.heartbeat
+            while True:
+                with self._cond:
+                    if not subscriber.queue and not subscriber.overflowed:
+                        self._cond.wait(POLL_INTERVAL)
+                    events = list(subscriber.queue)
+                    subscriber.queue.clear()
+                    overflowed = subscriber.overflowed
+                    latest = self._history[-1] if self._history else None
+
+                if overflowed:
+                    # 丢失了部分事件，通知页面重新加载
+                    version, digest = ((latest.version, latest.digest) if latest
+                                       else (current_version, current_digest))
+                    yield self._make_event(version, version, digest, {"reload": True}).payload
+                    return
+                if events:
+                    yield b''.join(event.payload for event in events)
+                    next_heartbeat = time.monotonic() + self.heartbeat
+                    continue
+
+                now = time.monotonic()
+                if now >= deadline or disconnected():
+                    return
+                if now >= next_heartbeat:
+                    yield b': ping\n\n'
+                    next_heartbeat = now + self.heartbeat
+                try:
+                    # 多进程部署时其他进程的写入在校验时才会发现并发布
+                    config_manager.get_snapshot()
+                except Exception as e:
+                    logger.warning(f"校验配置失败: {e}")
+        finally:
+            with self._cond:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        推送统计
+
+        Returns:
+            {"subscribers": 当前连接数, "published": 发布的事件数,
+             "rejected": 因连接数已满被拒绝的连接数, "overflows": 队列溢出次数}
+        """
+        with self._cond:
+            return dict(self._stats, subscribers=len(self._subscribers))
+
+
+# 全局变化推送实例，订阅配置管理器发布的新版本
+change_feed = ChangeFeed(
+    enabled=app_config.events_enabled,
+    max_subscribers=app_config.events_max_subscribers,
+    max_queue=app_config.events_queue_size,
+    heartbeat=app_config.events_heartbeat,
+    max_duration=app_config.events_max_duration,
+)
+config_manager.add_listener(change_feed.publish)
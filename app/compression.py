@@ -0,0 +1,202 @@
+"""
+压缩模块 - gzip / brotli 压缩和内容编码协商
+CompressionMiddleware 在 WSGI 层压缩 HTML、JSON 等动态响应；
+已带有 Content-Encoding 的响应（缓存页面、预压缩静态文件）原样通过
+"""
+import gzip
+from typing import Callable, Iterable, Optional, Tuple
+import logging
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 服务端优先使用的编码顺序
+PREFERRED_ENCODINGS: Tuple[str, ...] = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """
+    解析 Accept-Encoding 请求头
+
+    Returns:
+        客户端接受的编码集合（q=0 的编码不包含在内）
+    """
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name)
+    return accepted
+
+
+def negotiate(header: Optional[str], available: Iterable[str] = PREFERRED_ENCODINGS) -> Optional[str]:
+    """
+    按服务端优先顺序选择客户端接受的编码
+
+    Args:
+        header: Accept-Encoding 请求头
+        available: 可用的编码（按优先顺序）
+
+    Returns:
+        选择的编码，没有可用编码时返回 None
+    """
+    accepted = accepted_encodings(header)
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    压缩数据
+
+    Args:
+        data: 原始数据
+        encoding: "gzip" 或 "br"
+        level: 压缩级别（1-9，brotli 按比例映射到 1-11）
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=round(level * 11 / 9))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    动态响应压缩中间件
+
+    只压缩状态码为 200、类型在允许列表中、且不小于 min_size 的响应。
+    压缩后的响应 ETag 追加编码后缀（与 http_cache.apply_validators 一致），并设置 Vary。
+    """
+
+    def __init__(self, app: Callable, level: int = 6, min_size: int = 1024,
+                 mimetypes: Iterable[str] = ('text/html', 'application/json')):
+        """
+        初始化中间件
+
+        Args:
+            app: 被包装的 WSGI 应用
+            level: 压缩级别（1-9）
+            min_size: 最小压缩大小（字节）
+            mimetypes: 允许压缩的 Content-Type（不含参数）
+        """
+        self.app = app
+        self.level = level
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if environ.get('REQUEST_METHOD') != 'HEAD':
+            encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'))
+
+        captured = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            if exc_info is not None and captured:
+                raise exc_info[1].with_traceback(exc_info[2])
+            captured[:] = [status, headers, exc_info]
+            return buffered.append
+
+        buffered = []
+        app_iter = self.app(environ, capture_start_response)
+        if not captured:
+            # 应用在迭代响应体时才调用 start_response，只能先完整读取
+            try:
+                buffered.extend(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            app_iter = []
+        status, headers, exc_info = captured
+
+        compressible = self._should_compress(status, headers)
+        if not compressible or encoding is None:
+            # 不压缩：原样转发（可能是流式响应，不能缓冲）
+            if compressible:
+                # 其他客户端会得到压缩后的表示
+                headers = list(headers)
+                self._add_vary(headers)
+            write = start_response(status, headers, exc_info)
+            for chunk in buffered:
+                write(chunk)
+            return app_iter
+
+        try:
+            body = b''.join(buffered) + b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        if len(body) < self.min_size:
+            return self._finish(start_response, status, headers, exc_info, body)
+
+        compressed = compress(body, encoding, self.level)
+        headers = [(name, value) for name, value in headers
+                   if name.lower() not in ('content-length', 'etag')] + [
+            ('Content-Encoding', encoding),
+            ('Content-Length', str(len(compressed))),
+        ]
+        etag = self._header(captured[1], 'etag')
+        if etag:
+            headers.append(('ETag', self._encoded_etag(etag, encoding)))
+        self._add_vary(headers)
+        start_response(status, headers, exc_info)
+        return [compressed]
+
+    @staticmethod
+    def _finish(start_response, status, headers, exc_info, body):
+        """发送未压缩的已缓冲响应"""
+        headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+        headers.append(('Content-Length', str(len(body))))
+        start_response(status, headers, exc_info)
+        return [body]
+
+    @staticmethod
+    def _header(headers, name: str) -> Optional[str]:
+        """获取响应头（不区分大小写）"""
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    @staticmethod
+    def _add_vary(headers) -> None:
+        """添加 Vary: Accept-Encoding"""
+        for i, (key, value) in enumerate(headers):
+            if key.lower() == 'vary':
+                if 'accept-encoding' not in value.lower():
+                    headers[i] = (key, f'{value}, Accept-Encoding')
+                return
+        headers.append(('Vary', 'Accept-Encoding'))
+
+    @staticmethod
+    def _encoded_etag(etag: str, encoding: str) -> str:
+        """为压缩表示的 ETag 追加编码后缀"""
+        weak = etag.startswith('W/')
+        value = etag[2:] if weak else etag
+        value = f'"{value.strip(chr(34))}-{encoding}"'
+        return f'W/{value}' if weak else value
+
+    def _should_compress(self, status: str, headers) -> bool:
+        """判断响应是否需要压缩"""
+        if not status.startswith('200'):
+            return False
+        if self._header(headers, 'content-encoding'):
+            return False
+        content_type = (self._header(headers, 'content-type') or '').split(';')[0].strip().lower()
+        if content_type not in self.mimetypes:
+            return False
+        length = self._header(headers, 'content-length')
+        if length is not None and length.isdigit() and int(length) < self.min_size:
+            return False
+        cache_control = (self._header(headers, 'cache-control') or '').lower()
+        return 'no-transform' not in cache_control
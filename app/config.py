@@ -9,6 +9,25 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 各路由默认的 Cache-Control 策略，可通过 CACHE_CONTROL_<ROUTE> 环境变量覆盖
+DEFAULT_CACHE_CONTROL = {
+    'index': 'no-cache',
+    'config': 'no-cache',
+    'search': 'no-cache',
+    'icons': 'public, max-age=86400',
+    # 按内容哈希命名的图标，内容永不改变
+    'icons_immutable': 'public, max-age=31536000, immutable',
+    # 合并图标 CSS，URL 中带有内容摘要
+    'icon_bundle': 'public, max-age=31536000, immutable',
+    # Font Awesome 子集 CSS，URL 中带有内容摘要
+    'fontawesome': 'public, max-age=31536000, immutable',
+    # 紧凑搜索索引，URL 中带有内容摘要
+    'search_index': 'public, max-age=31536000, immutable',
+    # 静态文件：不带指纹的 URL 每次校验，带当前指纹的 URL 永久缓存
+    'static': 'no-cache',
+    'static_immutable': 'public, max-age=31536000, immutable',
+}
+
 class AppConfig:
     """应用配置类"""
     
@@ -39,7 +58,13 @@ class AppConfig:
     
     def _setup_paths(self):
         """设置各种路径"""
-        if self.is_docker:
+        data_dir = os.environ.get('DATA_DIR')
+        if data_dir:
+            # 显式指定的数据目录（基准测试、多实例部署等）
+            self.base_dir = self._find_project_root()
+            self.config_dir = Path(data_dir)
+            self.data_dir = Path(data_dir)
+        elif self.is_docker:
             # Docker环境路径
             self.base_dir = Path('/app')
             self.config_dir = Path('/config')
@@ -53,6 +78,7 @@ class AppConfig:
         # 具体文件路径
         self.config_file = self.config_dir / 'config.json'
         self.images_dir = self.data_dir / 'img'
+        self.profiles_dir = self.data_dir / 'profiles'
         
         # 确保目录存在
         self._ensure_directories()
@@ -76,7 +102,7 @@ class AppConfig:
     
     def _ensure_directories(self):
         """确保必要的目录存在"""
-        if not self.is_docker:
+        if not self.is_docker or os.environ.get('DATA_DIR'):
             # 仅在非Docker环境创建目录
             self.config_dir.mkdir(parents=True, exist_ok=True)
             self.images_dir.mkdir(parents=True, exist_ok=True)
@@ -121,6 +147,11 @@ class AppConfig:
         """获取图片目录路径"""
         return str(self.images_dir)
     
+    @property
+    def profiles_path(self) -> str:
+        """获取请求剖析结果目录路径"""
+        return str(self.profiles_dir)
+    
     @property
     def debug(self) -> bool:
         """是否启用调试模式"""
@@ -136,6 +167,11 @@ class AppConfig:
         """获取监听端口"""
         return int(os.environ.get('PORT', '8080'))
     
+    @property
+    def threads(self) -> int:
+        """获取 waitress 工作线程数（Dockerfile 以 --threads 传入 waitress-serve）"""
+        return int(os.environ.get('THREADS', '8'))
+    
     @property
     def max_content_length(self) -> int:
         """获取最大上传文件大小（字节）"""
@@ -146,6 +182,189 @@ class AppConfig:
         """获取缓存TTL（秒）"""
         return int(os.environ.get('CACHE_TTL', '30'))
     
+    @property
+    def cache_validation(self) -> str:
+        """获取配置缓存校验模式（ttl/stat/inotify）"""
+        mode = os.environ.get('CACHE_VALIDATION', 'stat').lower()
+        return mode if mode in ('ttl', 'stat', 'inotify') else 'stat'
+    
+    @property
+    def write_mode(self) -> str:
+        """获取配置写入模式（sync/coalesced）"""
+        mode = os.environ.get('WRITE_MODE', 'sync').lower()
+        return mode if mode in ('sync', 'coalesced') else 'sync'
+    
+    @property
+    def flush_interval_ms(self) -> int:
+        """获取合并写入模式的最长写入间隔（毫秒）"""
+        return int(os.environ.get('FLUSH_INTERVAL_MS', '200'))
+    
+    @property
+    def storage_mode(self) -> str:
+        """获取配置存储模式（json/journal/sqlite）"""
+        mode = os.environ.get('STORAGE_MODE', 'json').lower()
+        return mode if mode in ('json', 'journal', 'sqlite') else 'json'
+    
+    @property
+    def multi_process(self) -> bool:
+        """是否有多个进程共享同一配置（启用跨进程文件锁和共享版本计数器）"""
+        return os.environ.get('MULTI_PROCESS', 'false').lower() == 'true'
+    
+    @property
+    def journal_max_bytes(self) -> int:
+        """获取操作日志压缩阈值（字节）"""
+        return int(os.environ.get('JOURNAL_MAX_BYTES', 1024 * 1024))  # 1MB
+    
+    @property
+    def journal_max_records(self) -> int:
+        """获取操作日志压缩阈值（记录数）"""
+        return int(os.environ.get('JOURNAL_MAX_RECORDS', '1000'))
+    
+    @property
+    def icon_sizes(self) -> tuple:
+        """获取上传图标生成的 WebP 版本尺寸（像素，需要安装 Pillow）"""
+        sizes = os.environ.get('ICON_SIZES', '32,64,128')
+        return tuple(sorted({int(size) for size in sizes.split(',') if size.strip()})) or (64,)
+    
+    @property
+    def icon_gc_grace(self) -> int:
+        """获取图标垃圾回收的保护期（秒），期内修改过的文件不会被删除"""
+        return int(os.environ.get('ICON_GC_GRACE', '3600'))
+    
+    @property
+    def icon_bundle_enabled(self) -> bool:
+        """主页是否将小图标合并为一个 CSS 文件"""
+        return os.environ.get('ICON_BUNDLE', 'true').lower() == 'true'
+    
+    @property
+    def icon_bundle_max_bytes(self) -> int:
+        """获取合并到 CSS 中的图标文件大小上限（字节）"""
+        return int(os.environ.get('ICON_BUNDLE_MAX_BYTES', '8192'))
+    
+    @property
+    def fontawesome_subset(self) -> bool:
+        """主页是否只加载配置中用到的 Font Awesome 图标（需要安装 fontTools）"""
+        return os.environ.get('FONTAWESOME_SUBSET', 'true').lower() == 'true'
+    
+    @property
+    def icon_cache_max_bytes(self) -> int:
+        """获取 /config/img 内存缓存的总大小上限（字节），为 0 时禁用"""
+        return int(os.environ.get('ICON_CACHE_MAX_BYTES', 8 * 1024 * 1024))  # 8MB
+    
+    @property
+    def icon_cache_max_file_bytes(self) -> int:
+        """获取可缓存的单个图标文件大小上限（字节），更大的文件以文件流发送"""
+        return int(os.environ.get('ICON_CACHE_MAX_FILE_BYTES', 256 * 1024))  # 256KB
+    
+    @property
+    def page_cache_enabled(self) -> bool:
+        """是否缓存渲染好的页面"""
+        return os.environ.get('PAGE_CACHE', 'true').lower() == 'true'
+    
+    @property
+    def page_cache_gzip(self) -> bool:
+        """页面缓存是否同时保存 gzip 压缩版本"""
+        return os.environ.get('PAGE_CACHE_GZIP', 'true').lower() == 'true'
+    
+    @property
+    def search_limit(self) -> int:
+        """获取 /search 默认返回的结果数（请求可用 limit 参数指定）"""
+        return int(os.environ.get('SEARCH_LIMIT', '50'))
+    
+    @property
+    def search_mode(self) -> str:
+        """获取主页搜索模式：client（加载紧凑索引在浏览器端搜索）或 server（每次请求 /search）"""
+        mode = os.environ.get('SEARCH_MODE', 'client').lower()
+        return mode if mode in ('client', 'server') else 'client'
+    
+    @property
+    def events_enabled(self) -> bool:
+        """是否通过 /events 推送配置变化（每个连接占用一个 waitress 工作线程，默认关闭）"""
+        return os.environ.get('EVENTS', 'false').lower() == 'true'
+    
+    @property
+    def events_max_subscribers(self) -> int:
+        """
+        获取 /events 同时连接数上限
+        
+        每个连接在保持期间占用一个 waitress 工作线程：默认为线程数的四分之一，
+        指定的值不超过线程数的一半，其余线程始终用于处理普通请求。
+        """
+        value = os.environ.get('EVENTS_MAX_SUBSCRIBERS')
+        if value is None:
+            return max(self.threads // 4, 1)
+        return min(int(value), self.threads // 2)
+    
+    @property
+    def events_queue_size(self) -> int:
+        """获取每个 /events 连接的事件队列长度"""
+        return int(os.environ.get('EVENTS_QUEUE_SIZE', '64'))
+    
+    @property
+    def events_heartbeat(self) -> float:
+        """获取 /events 心跳间隔（秒）"""
+        return float(os.environ.get('EVENTS_HEARTBEAT', '15'))
+    
+    @property
+    def events_max_duration(self) -> float:
+        """获取单个 /events 连接的最长保持时间（秒），之后浏览器自动重连"""
+        return float(os.environ.get('EVENTS_MAX_DURATION', '60'))
+    
+    @property
+    def metrics_enabled(self) -> bool:
+        """是否记录请求指标并通过 /metrics 以 Prometheus 格式导出"""
+        return os.environ.get('METRICS', 'true').lower() == 'true'
+    
+    @property
+    def profile_sample_rate(self) -> int:
+        """获取请求剖析采样间隔：每 N 个请求剖析一个，0 表示不按比例采样"""
+        return max(int(os.environ.get('PROFILE_SAMPLE_RATE', '0')), 0)
+    
+    @property
+    def profile_secret(self) -> str:
+        """获取请求剖析密钥：带有匹配 X-Profile-Token 请求头的请求总是被剖析，为空时不启用"""
+        return os.environ.get('PROFILE_SECRET', '')
+    
+    @property
+    def profile_mode(self) -> str:
+        """获取请求剖析方式：sample（定时采样调用栈）或 cprofile（确定性剖析）"""
+        mode = os.environ.get('PROFILE_MODE', 'sample').lower()
+        return mode if mode in ('sample', 'cprofile') else 'sample'
+    
+    @property
+    def profile_interval_ms(self) -> float:
+        """获取 sample 方式的调用栈采样间隔（毫秒）"""
+        return float(os.environ.get('PROFILE_INTERVAL_MS', '2'))
+    
+    @property
+    def compression_level(self) -> int:
+        """获取压缩级别（1-9）"""
+        level = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+        return min(max(level, 1), 9)
+    
+    @property
+    def compression_enabled(self) -> bool:
+        """是否压缩动态响应（HTML、JSON 等）"""
+        return os.environ.get('COMPRESSION', 'true').lower() == 'true'
+    
+    @property
+    def compression_min_size(self) -> int:
+        """获取动态响应的最小压缩大小（字节）"""
+        return int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    
+    @property
+    def compression_types(self) -> tuple:
+        """获取允许压缩的 Content-Type 列表"""
+        types = os.environ.get('COMPRESSION_TYPES',
+                               'text/html,text/css,text/plain,text/javascript,'
+                               'application/javascript,application/json,image/svg+xml')
+        return tuple(t.strip().lower() for t in types.split(',') if t.strip())
+    
+    def cache_control(self, route: str) -> str:
+        """获取指定路由的 Cache-Control 策略"""
+        return os.environ.get(f'CACHE_CONTROL_{route.upper()}',
+                              DEFAULT_CACHE_CONTROL.get(route, ''))
+    
     @property
     def timezone(self) -> str:
         """获取时区设置"""
@@ -0,0 +1,192 @@
+"""
+配置日志模块 - 追加写入的配置操作日志
+每次修改只追加一条 JSON 行记录，启动时在配置快照上重放，超过阈值后压缩
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+from .config_operations import OperationError, apply_operation
+
+logger = logging.getLogger(__name__)
+
+
+class JournalConflictError(RuntimeError):
+    """config.json 在日志压缩前被外部修改，日志中的修改无法确定是否已包含在内"""
+
+
+def content_digest(data: bytes) -> str:
+    """计算配置文件内容摘要，用于标识日志所基于的快照"""
+    return hashlib.sha1(data).hexdigest()
+
+
+class ConfigJournal:
+    """
+    配置操作日志
+
+    文件格式为 JSON Lines：第一行是头记录 {"base": 快照摘要}，记录日志基于的
+    config.json 内容；其后每行是一次提交 {"ops": [操作, ...]}。
+
+    压缩时先追加压缩标记 {"compacted": 新快照摘要}，再原子替换 config.json，最后清空日志。
+    若替换后、清空前崩溃，日志以与新 config.json 一致的压缩标记结尾，重放时整个日志被丢弃，
+    因此操作不会被重复应用。日志头与 config.json 不一致且没有对应的压缩标记时，
+    说明 config.json 被外部修改而日志中仍有未压缩的修改，此时保留日志并抛出 JournalConflictError。
+    """
+
+    def __init__(self, path: Path):
+        """
+        初始化日志
+
+        Args:
+            path: 日志文件路径
+        """
+        self.path = Path(path)
+        self.records = 0
+        self.size = 0
+        # 当前 config.json 的内容摘要，写入头记录时使用
+        self._base: Optional[str] = None
+
+    def replay(self, config: Dict[str, Any], base: str) -> int:
+        """
+        在配置上重放日志
+
+        最后一条记录不完整（写入时崩溃）时忽略，由下一次追加在持有写锁时截断
+        （读取路径只持有进程内的锁，多进程时截断可能破坏其他进程正在追加的记录）；
+        中间损坏的记录被跳过。
+
+        Args:
+            config: 从 config.json 读取的可修改配置
+            base: config.json 的内容摘要
+
+        Returns:
+            int: 成功应用的记录数
+
+        Raises:
+            JournalConflictError: config.json 与日志头不一致且日志中有未压缩的记录
+        """
+        self._base = base
+        self.records = 0
+        self.size = 0
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return 0
+
+        lines = data.split(b'\n')
+        # 最后一段没有换行符，说明写入被中断
+        torn = lines.pop()
+        good_size = len(data) - len(torn)
+
+        if lines:
+            header = _parse_record(lines[0])
+            if header.get('base') != base:
+                if len(lines) > 1 and _parse_record(lines[-1]).get('compacted') != base:
+                    raise JournalConflictError(
+                        f"config.json 在配置日志压缩前被修改，日志 {self.path} 中有 "
+                        f"{len(lines) - 1} 条未写入 config.json 的记录。"
+                        f"请恢复 config.json，或确认不再需要这些修改后删除该日志文件")
+                # 日志已压缩到当前 config.json（或没有记录），由下一次追加清空
+                logger.info(f"配置日志已包含在当前快照中，将被丢弃: {self.path}")
+                return 0
+
+        for number, line in enumerate(lines[1:], start=2):
+            try:
+                record = json.loads(line)
+                if 'compacted' in record:
+                    # 压缩标记之后 config.json 没有被替换（压缩中途崩溃），继续重放
+                    continue
+                for op in record['ops']:
+                    apply_operation(config, op)
+            except OperationError as e:
+                # OperationError 是 ValueError 的子类，需先于解析错误处理
+                logger.error(f"配置日志记录无法应用: 第 {number} 行, 错误: {e}")
+            except (ValueError, KeyError, TypeError) as e:
+                if number == len(lines):
+                    # 最后一条记录损坏，视为写入中断
+                    torn = line + b'\n' + torn
+                    good_size -= len(line) + 1
+                    break
+                logger.error(f"跳过损坏的配置日志记录: 第 {number} 行, 错误: {e}")
+            else:
+                # 只统计实际应用的记录
+                self.records += 1
+
+        if torn:
+            logger.warning(f"忽略不完整的配置日志记录: {self.path}, {len(torn)} 字节，下次写入时截断")
+
+        self.size = good_size
+        if self.records:
+            logger.info(f"已重放配置日志: {self.records} 条记录")
+        return self.records
+
+    def append(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        追加一条提交记录并 fsync（需持有写锁）
+
+        文件中超出 size 的部分（重放时忽略的不完整记录）先被截断。
+
+        Args:
+            operations: 本次提交的操作列表
+        """
+        chunks = []
+        if self.size == 0:
+            chunks.append(json.dumps({'base': self._base}) + '\n')
+        chunks.append(json.dumps({'ops': operations}, ensure_ascii=False,
+                                 separators=(',', ':')) + '\n')
+        self._write(''.join(chunks).encode('utf-8'))
+        self.records += 1
+
+    def mark_compacted(self, digest: str) -> None:
+        """
+        追加压缩标记并 fsync（需持有写锁，在替换 config.json 之前调用）
+
+        Args:
+            digest: 即将写入的 config.json 的内容摘要
+        """
+        if self.size == 0:
+            return
+        self._write((json.dumps({'compacted': digest}) + '\n').encode('utf-8'))
+
+    def _write(self, payload: bytes) -> None:
+        """追加写入并 fsync，文件中超出 size 的部分先被截断"""
+        with open(self.path, 'ab') as f:
+            if os.fstat(f.fileno()).st_size > self.size:
+                # 清除不完整的记录或可能残留的旧内容
+                f.truncate(self.size)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.size += len(payload)
+
+    def reset(self, base: str) -> None:
+        """
+        清空日志（config.json 已包含全部修改后调用）
+
+        Args:
+            base: 新 config.json 的内容摘要
+        """
+        self._base = base
+        self.records = 0
+        self.size = 0
+        try:
+            with open(self.path, 'r+b') as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            pass
+
+    def needs_compaction(self, max_bytes: int, max_records: int) -> bool:
+        """日志是否超过压缩阈值"""
+        return self.size >= max_bytes or self.records >= max_records
+
+
+def _parse_record(line: bytes) -> Dict[str, Any]:
+    """解析一行日志记录，无法解析时返回空字典"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {}
+    return record if isinstance(record, dict) else {}
@@ -1,15 +1,23 @@
 """
 配置管理模块 - 封装配置文件操作
-提供文件锁、缓存和错误处理功能
+提供文件锁、版本化只读快照和错误处理功能
 """
+import atexit
 import json
 import threading
 import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Mapping, Optional
 import logging
 
 from .config import config as app_config
+from .config_operations import OperationError, apply_operation
+from .config_snapshot import ConfigSnapshot, freeze
+from .config_storage import create_storage, write_json_atomic
+from .config_watcher import ConfigWatcher
+from .process_sync import ProcessSync
+from .search_index import SearchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -21,22 +29,236 @@ class ConfigManager:
         self.config_path = Path(app_config.config_path)
         self.config_dir = self.config_path.parent
         self._lock = threading.RLock()
-        self._cache = None
-        self._cache_time = 0
+        # 当前发布的只读快照，读取方无需加锁直接获取
+        self._snapshot: Optional[ConfigSnapshot] = None
+        # 最近一次分配的版本号，只在持有 _lock 时修改
+        self._version = 0
+        # 调用 invalidate_cache 后置位，强制下次读取时重新加载
+        self._stale = False
         self._cache_ttl = app_config.cache_ttl
+        # 缓存校验模式: ttl / stat / inotify
+        self._validation = app_config.cache_validation
+        # inotify 模式下，收到文件变化通知后置位
+        self._dirty = True
+        self._watcher = None
+        self._search_index = SearchIndex()
+        # 同一时间只由一个线程完整重建搜索索引（不持有 _lock）
+        self._index_build_lock = threading.Lock()
+        # 新版本发布监听器 (快照, 原版本号, 操作列表或 None)，在持有 _lock 时调用
+        self._listeners: List[Callable[[ConfigSnapshot, int, Optional[List[Dict[str, Any]]]], None]] = []
+        # 写入模式: sync（每次修改立即写入）/ coalesced（后台合并写入）
+        self._write_mode = app_config.write_mode
+        self._flush_interval = app_config.flush_interval_ms / 1000
+        self._flush_cond = threading.Condition()
+        self._flush_write_lock = threading.Lock()
+        self._pending = None
+        self._pending_since = 0.0
+        self._pending_count = 0
+        self._closing = False
+        # 已发布但尚未写入文件的快照版本
+        self._unflushed_version = None
+        self._flush_stats = {"flushes": 0, "mutations": 0, "last_batch": 0, "max_batch": 0}
+        # 写锁等待和持有时间（秒），只在持有写锁时修改
+        self._lock_stats = {"acquisitions": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                            "hold_seconds": 0.0, "max_hold_seconds": 0.0}
+        # 快照缓存命中（无锁计数，并发时可能略少）/ 未命中 / 实际重新加载次数 /
+        # 因其他线程持有 _lock 而返回当前快照的次数
+        self._cache_stats = {"hits": 0, "misses": 0, "reloads": 0, "stale": 0}
+        # 读取解析和序列化写入的次数和耗时（秒）
+        self._io_stats = {"loads": 0, "load_seconds": 0.0, "saves": 0, "save_seconds": 0.0}
+        self._flusher = None
         
         # 验证配置
         if not app_config.validate_config():
             raise RuntimeError("Configuration validation failed")
         
-        logger.info(f"ConfigManager initialized with path: {self.config_path}")
+        # 多进程部署时的跨进程写锁和共享配置代数
+        self._sync: Optional[ProcessSync] = None
+        if app_config.multi_process:
+            if ProcessSync.is_supported():
+                self._sync = ProcessSync(self.config_path)
+                if self._write_mode == 'coalesced':
+                    # 内存中未写入的修改对其他进程不可见，且会覆盖其他进程的写入
+                    logger.warning("多进程模式不支持合并写入，使用 sync 写入模式")
+                    self._write_mode = 'sync'
+            else:
+                logger.warning("当前平台不支持 fcntl 文件锁，多进程同步未启用")
+        
+        # 存储后端: json（每次修改重写整个文件）/ journal（追加操作日志）/ sqlite
+        self._storage = create_storage(
+            app_config.storage_mode, self.config_path,
+            journal_max_bytes=app_config.journal_max_bytes,
+            journal_max_records=app_config.journal_max_records,
+        )
+        
+        if self._validation == 'inotify':
+            self._start_watcher()
+        
+        if self._write_mode == 'coalesced':
+            self._flusher = threading.Thread(target=self._flush_loop, name='config-flusher',
+                                             daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+        
+        logger.info(f"ConfigManager initialized with path: {self.config_path}, "
+                    f"cache validation: {self._validation}, write mode: {self._write_mode}, "
+                    f"storage: {self._storage.name}, multi-process: {self._sync is not None}")
+    
+    def _start_watcher(self) -> None:
+        """启动 inotify 监视，失败时回退到 stat 校验"""
+        main_path, *extra_paths = self._storage.watch_paths()
+        self._watcher = ConfigWatcher(main_path, self._on_file_changed, extra_paths)
+        if not self._watcher.start():
+            logger.warning("回退到 stat 缓存校验模式")
+            self._watcher = None
+            self._validation = 'stat'
+    
+    def _on_file_changed(self) -> None:
+        """inotify 通知回调，标记缓存需要校验"""
+        self._dirty = True
+    
+    def _stat_signature(self) -> Optional[tuple]:
+        """获取存储签名（各存储文件的 mtime_ns, size, inode），不存在时返回 None"""
+        return self._storage.signature()
+    
+    def _is_snapshot_valid(self, snapshot: Optional[ConfigSnapshot]) -> bool:
+        """检查快照是否仍与配置文件一致"""
+        if snapshot is None or self._stale:
+            return False
+        
+        # 其他进程写入后会递增共享代数，只需一次内存读取即可发现
+        if self._sync is not None and self._sync.generation() != snapshot.generation:
+            return False
+        
+        # 内存中有尚未写入文件的修改时，以内存快照为准
+        if self._unflushed_version is not None:
+            return True
+        
+        if self._validation == 'ttl':
+            return time.time() - snapshot.loaded_at < self._cache_ttl
+        
+        if self._validation == 'inotify':
+            if not self._dirty:
+                return True
+            # 收到通知后用 stat 确认，忽略自身写入引起的事件
+            self._dirty = False
+        
+        return self._stat_signature() == snapshot.signature
+    
+    def _publish(self, config: Dict[str, Any], signature: Optional[tuple],
+                 force_new_version: bool = True, generation: int = 0,
+                 operations: Optional[List[Dict[str, Any]]] = None) -> ConfigSnapshot:
+        """
+        发布新快照（需持有 _lock）
+        
+        Args:
+            config: 配置字典
+            signature: 配置文件签名
+            force_new_version: 为 False 时，内容与当前快照相同则沿用原版本号
+            generation: 快照对应的共享配置代数
+            operations: 产生此配置的操作列表（未知时为 None），传给监听器
+        """
+        frozen = freeze(config)
+        current = self._snapshot
+        if not force_new_version and current is not None and current.data == frozen:
+            version = current.version
+        else:
+            self._version += 1
+            version = self._version
+        
+        snapshot = ConfigSnapshot(version, frozen, signature, generation)
+        self._snapshot = snapshot
+        self._stale = False
+        
+        if current is None or version != current.version:
+            for listener in self._listeners:
+                try:
+                    listener(snapshot, current.version if current else 0, operations)
+                except Exception as e:
+                    logger.error(f"配置变化监听器出错: {e}")
+        return snapshot
+    
+    def add_listener(self, listener: Callable[[ConfigSnapshot, int,
+                                               Optional[List[Dict[str, Any]]]], None]) -> None:
+        """
+        注册新版本发布监听器
+        
+        监听器在持有写锁时调用，参数为 (新快照, 原版本号, 操作列表)；
+        操作列表只在版本由 apply_operations 产生时提供，不能阻塞。
+        """
+        self._listeners.append(listener)
+    
+    def get_snapshot(self, use_cache: bool = True) -> ConfigSnapshot:
+        """
+        获取当前配置快照
+        
+        快照有效时直接返回共享的只读对象，不复制也不加锁。快照需要校验或重新加载时，
+        若其他线程正持有 _lock（写入中或正在重新加载），不等待而是返回当前快照：
+        写入方完成后会发布新快照，读取永远不会阻塞在写入后面。
+        没有快照、use_cache 为 False 或当前线程自己持有 _lock 时总是等待并返回最新配置。
+        
+        Args:
+            use_cache: 是否使用缓存的快照
+            
+        Returns:
+            当前配置快照
+            
+        Raises:
+            FileNotFoundError: 配置文件不存在
+            json.JSONDecodeError: JSON格式错误
+            PermissionError: 文件权限错误
+        """
+        snapshot = self._snapshot
+        if use_cache and self._is_snapshot_valid(snapshot):
+            self._cache_stats["hits"] += 1
+            return snapshot
+        
+        self._cache_stats["misses"] += 1
+        if not self._lock.acquire(blocking=snapshot is None or not use_cache):
+            self._cache_stats["stale"] += 1
+            if self._validation == 'inotify':
+                # 校验时已清除通知标记，恢复后由下次读取重新校验
+                self._dirty = True
+            return snapshot
+        try:
+            # 等待锁期间其他线程可能已完成重新加载
+            if use_cache and self._snapshot is not snapshot and \
+                    self._is_snapshot_valid(self._snapshot):
+                return self._snapshot
+            return self._reload()
+        finally:
+            self._lock.release()
     
-    def _is_cache_valid(self) -> bool:
-        """检查缓存是否有效"""
-        return (self._cache is not None and 
-                time.time() - self._cache_time < self._cache_ttl)
+    def _reload(self) -> ConfigSnapshot:
+        """从文件重新加载配置并发布快照（需持有 _lock）"""
+        try:
+            if not self._storage.exists():
+                # 创建默认配置
+                return self._save_config_internal({"categories": []})
+            
+            # 先取签名和共享代数再读取，读取期间的修改会在下次校验时被发现
+            signature = self._stat_signature()
+            generation = self._sync.generation() if self._sync else 0
+            started = time.perf_counter()
+            config = self._storage.load()
+            self._record_io("load", time.perf_counter() - started)
+            self._cache_stats["reloads"] += 1
+            
+            # 内容未变化时沿用原版本号
+            return self._publish(config, signature, force_new_version=False,
+                                 generation=generation)
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON解析错误: {self.config_path}, 错误: {e}")
+            raise
+        except PermissionError as e:
+            logger.error(f"文件权限错误: {self.config_path}, 错误: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"加载配置文件失败: {self.config_path}, 错误: {e}")
+            raise
     
-    def load_config(self, use_cache: bool = True) -> Dict[str, Any]:
+    def load_config(self, use_cache: bool = True) -> Mapping[str, Any]:
         """
         加载配置文件
         
@@ -44,66 +266,186 @@ class ConfigManager:
             use_cache: 是否使用缓存
             
         Returns:
-            配置字典
+            只读配置映射（需要修改时使用 update_config）
             
         Raises:
             FileNotFoundError: 配置文件不存在
             json.JSONDecodeError: JSON格式错误
             PermissionError: 文件权限错误
         """
-        with self._lock:
-            # 检查缓存
-            if use_cache and self._is_cache_valid():
-                return self._cache.copy()
+        return self.get_snapshot(use_cache).data
+    
+    def _save_config_internal(self, config: Dict[str, Any],
+                              operations: Optional[List[Dict[str, Any]]] = None) -> ConfigSnapshot:
+        """
+        内部保存配置方法（需持有 _lock），返回新发布的快照
+        
+        Args:
+            config: 修改后的完整配置
+            operations: 产生此配置的操作列表；支持增量写入的存储只持久化这些操作
+        """
+        if self._write_mode == 'coalesced':
+            # 合并写入：立即发布快照，由后台线程稍后写入文件
+            snapshot = self._publish(config, None, operations=operations)
+            self._unflushed_version = snapshot.version
+            with self._flush_cond:
+                if self._pending is None:
+                    self._pending_since = time.monotonic()
+                self._pending = (config, snapshot.version)
+                self._pending_count += 1
+                self._flush_cond.notify()
+            return snapshot
+        
+        started = time.perf_counter()
+        if operations:
+            self._storage.commit(config, operations)
+        else:
+            self._storage.save(config)
+        self._record_io("save", time.perf_counter() - started)
+        
+        generation = self._sync.bump() if self._sync else 0
+        snapshot = self._publish(config, self._stat_signature(), generation=generation,
+                                 operations=operations)
+        self._record_flush(1)
+        return snapshot
+    
+    def _flush_loop(self) -> None:
+        """后台刷新线程：距第一次未写入的修改满 flush_interval 后写入文件"""
+        while True:
+            with self._flush_cond:
+                while self._pending is None and not self._closing:
+                    self._flush_cond.wait()
+                if self._pending is None:
+                    return
+                deadline = self._pending_since + self._flush_interval
+                while not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._flush_cond.wait(remaining)
             
             try:
-                if not self.config_path.exists():
-                    # 创建默认配置
-                    default_config = {"categories": []}
-                    self._save_config_internal(default_config)
-                    return default_config
-                
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                
-                # 更新缓存
-                self._cache = config.copy()
-                self._cache_time = time.time()
-                
-                return config
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON解析错误: {self.config_path}, 错误: {e}")
-                raise
-            except PermissionError as e:
-                logger.error(f"文件权限错误: {self.config_path}, 错误: {e}")
-                raise
+                self.flush()
             except Exception as e:
-                logger.error(f"加载配置文件失败: {self.config_path}, 错误: {e}")
-                raise
+                # 写入失败时保留内存中的修改，稍后重试
+                logger.error(f"后台写入配置失败: {e}")
+                time.sleep(self._flush_interval)
     
-    def _save_config_internal(self, config: Dict[str, Any]) -> None:
-        """内部保存配置方法（不加锁）"""
-        # 创建临时文件
-        temp_path = self.config_path.with_suffix('.tmp')
-        
-        try:
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+    def flush(self) -> None:
+        """将合并写入模式下尚未写入的修改立即写入文件"""
+        with self._flush_write_lock:
+            with self._flush_cond:
+                pending, count = self._pending, self._pending_count
+                self._pending = None
+                self._pending_count = 0
+            if pending is None:
+                return
             
-            # 原子性替换
-            temp_path.replace(self.config_path)
+            config, version = pending
+            try:
+                started = time.perf_counter()
+                self._storage.save(config)
+                self._record_io("save", time.perf_counter() - started)
+                signature = self._stat_signature()
+            except Exception:
+                # 放回待写入队列（期间若有更新的修改则以更新的为准）
+                with self._flush_cond:
+                    if self._pending is None:
+                        self._pending = pending
+                        self._pending_since = time.monotonic()
+                    self._pending_count += count
+                raise
             
-            # 更新缓存
-            self._cache = config.copy()
-            self._cache_time = time.time()
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is not None and snapshot.version == version:
+                    self._snapshot = snapshot.with_signature(signature)
+                    self._unflushed_version = None
             
-        except Exception as e:
-            # 清理临时文件
-            if temp_path.exists():
-                temp_path.unlink()
-            logger.error(f"保存配置文件失败: {self.config_path}, 错误: {e}")
-            raise
+            self._record_flush(count)
+            logger.debug(f"配置已写入: 版本 {version}, 合并 {count} 次修改")
+    
+    def _record_flush(self, count: int) -> None:
+        """记录一次文件写入合并的修改数"""
+        stats = self._flush_stats
+        stats["flushes"] += 1
+        stats["mutations"] += count
+        stats["last_batch"] = count
+        stats["max_batch"] = max(stats["max_batch"], count)
+    
+    def flush_stats(self) -> Dict[str, int]:
+        """
+        合并写入统计
+        
+        Returns:
+            {"flushes": 写入次数, "mutations": 写入的修改总数,
+             "last_batch": 最近一次写入合并的修改数, "max_batch": 单次最多合并数,
+             "pending": 尚未写入的修改数}
+        """
+        with self._flush_cond:
+            pending = self._pending_count
+        return dict(self._flush_stats, pending=pending)
+    
+    def _record_io(self, kind: str, seconds: float) -> None:
+        """记录一次读取解析（load）或序列化写入（save）的耗时"""
+        stats = self._io_stats
+        stats[f"{kind}s"] += 1
+        stats[f"{kind}_seconds"] += seconds
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        快照缓存统计
+        
+        Returns:
+            {"hits": 直接返回缓存快照的次数, "misses": 需要加锁校验的次数,
+             "reloads": 从存储重新加载的次数, "stale": 因其他线程持有写锁而直接返回当前快照的次数}
+        """
+        return dict(self._cache_stats)
+    
+    def io_stats(self) -> Dict[str, Any]:
+        """
+        存储读写统计
+        
+        Returns:
+            {"loads" / "load_seconds": 读取并解析配置的次数 / 耗时,
+             "saves" / "save_seconds": 序列化并写入的次数 / 耗时,
+             "bytes_written": 写入的字节数, "storage": 存储后端名称}
+        """
+        return dict(self._io_stats, bytes_written=self._storage.bytes_written,
+                    storage=self._storage.name)
+    
+    @contextmanager
+    def _write_lock(self):
+        """
+        写入锁：进程内的 _lock，多进程模式下再加跨进程文件锁
+        
+        持有期间读取到的快照一定包含其他进程已完成的全部写入。
+        """
+        started = time.perf_counter()
+        with self._lock, (self._sync.locked() if self._sync is not None else nullcontext()):
+            acquired = time.perf_counter()
+            try:
+                yield
+            finally:
+                stats = self._lock_stats
+                wait = acquired - started
+                hold = time.perf_counter() - acquired
+                stats["acquisitions"] += 1
+                stats["wait_seconds"] += wait
+                stats["hold_seconds"] += hold
+                stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+                stats["max_hold_seconds"] = max(stats["max_hold_seconds"], hold)
+    
+    def lock_stats(self) -> Dict[str, float]:
+        """
+        写锁统计
+        
+        Returns:
+            {"acquisitions": 获取次数, "wait_seconds" / "max_wait_seconds": 等待时间总计 / 最大值,
+             "hold_seconds" / "max_hold_seconds": 持有时间总计 / 最大值}
+        """
+        # 只读取计数，不等待写锁
+        return dict(self._lock_stats)
     
     def save_config(self, config: Dict[str, Any]) -> None:
         """
@@ -115,7 +457,7 @@ class ConfigManager:
         Raises:
             PermissionError: 文件权限错误
         """
-        with self._lock:
+        with self._write_lock():
             self._save_config_internal(config)
     
     def update_config(self, updater_func) -> None:
@@ -123,160 +465,187 @@ class ConfigManager:
         更新配置文件的原子操作
         
         Args:
-            updater_func: 更新函数，接受当前配置，返回更新后的配置
+            updater_func: 更新函数，接受当前配置的可修改副本，返回更新后的配置
             
         Raises:
             Exception: 更新过程中的任何错误
         """
-        with self._lock:
-            config = self.load_config(use_cache=False)
-            updated_config = updater_func(config)
-            self._save_config_internal(updated_config)
+        with self._write_lock():
+            # ttl 模式下无法得知文件是否被外部修改，写入前总是重新读取
+            snapshot = self.get_snapshot(use_cache=self._validation != 'ttl')
+            self._save_config_internal(updater_func(snapshot.to_dict()))
+    
+    @property
+    def version(self) -> int:
+        """当前配置版本号"""
+        return self.get_snapshot().version
     
-    def get_categories(self) -> list:
-        """获取所有分类"""
-        config = self.load_config()
-        return config.get("categories", [])
+    def get_categories(self) -> tuple:
+        """获取所有分类（只读）"""
+        return self.get_snapshot().categories
+    
+    def get_search_index(self) -> SearchIndex:
+        """
+        获取搜索索引，与当前配置版本不一致时重建
+        
+        重建不持有 _lock，不会阻塞写入；其他线程正在重建时直接返回旧索引
+        （调用方可比较 version 判断结果是否来自当前版本），还没有索引时等待重建完成。
+        """
+        index = self._search_index
+        if index.version == self.get_snapshot().version:
+            return index
+        if not self._index_build_lock.acquire(blocking=index.version < 0):
+            return index
+        try:
+            snapshot = self.get_snapshot()
+            if index.version != snapshot.version:
+                index.build(snapshot.categories, snapshot.version)
+        finally:
+            self._index_build_lock.release()
+        return index
     
-    def find_category_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+    def find_category_by_name(self, name: str) -> Optional[Mapping[str, Any]]:
         """根据名称查找分类"""
-        categories = self.get_categories()
-        for category in categories:
-            if category.get("name") == name:
-                return category
-        return None
+        return self.get_snapshot().find_category(name)
     
-    def find_item_in_category(self, category_name: str, item_title: str) -> Optional[Dict[str, Any]]:
+    def find_item_in_category(self, category_name: str, item_title: str) -> Optional[Mapping[str, Any]]:
         """在指定分类中查找项目"""
-        category = self.find_category_by_name(category_name)
-        if not category:
-            return None
+        return self.get_snapshot().find_item(category_name, item_title)
+    
+    def apply_operations(self, operations: List[Dict[str, Any]],
+                         atomic: bool = True) -> Dict[str, Any]:
+        """
+        批量执行配置操作（格式见 config_operations 模块）
+        
+        所有操作基于同一快照、在一次加锁内执行，最后只进行一次原子写入。
+        
+        Args:
+            operations: 操作字典列表
+            atomic: 为 True 时任一操作失败则全部不生效；
+                    为 False 时跳过失败的操作，其余操作照常写入
+            
+        Returns:
+            {"success": 是否全部成功, "version": 执行后的配置版本号,
+             "results": 每个操作的结果 {"success": bool, "error": 错误信息}}
+        """
+        with self._write_lock():
+            # ttl 模式下无法得知文件是否被外部修改，写入前总是重新读取
+            snapshot = self.get_snapshot(use_cache=self._validation != 'ttl')
+            config = snapshot.to_dict()
+            results = []
+            applied = []
+            
+            for op in operations:
+                try:
+                    apply_operation(config, op)
+                except OperationError as e:
+                    results.append({"success": False, "error": str(e)})
+                    if atomic:
+                        break
+                else:
+                    results.append({"success": True})
+                    applied.append(op)
+            
+            success = len(applied) == len(operations)
+            if atomic and not success:
+                # 回滚：不写入任何修改，未执行的操作标记为跳过
+                for result in results:
+                    if result["success"]:
+                        result.update(success=False, error="事务已回滚")
+                results.extend({"success": False, "error": "事务已回滚"}
+                               for _ in range(len(operations) - len(results)))
+                return {"success": False, "version": snapshot.version, "results": results}
+            
+            if not applied:
+                return {"success": success, "version": snapshot.version, "results": results}
+            
+            new_snapshot = self._save_config_internal(config, applied)
+            self._update_search_index(snapshot.version, new_snapshot.version, applied)
+            return {"success": success, "version": new_snapshot.version, "results": results}
+    
+    def _update_search_index(self, base_version: int, version: int,
+                             operations: List[Dict[str, Any]]) -> None:
+        """
+        按操作增量更新搜索索引（需持有 _lock）
+        
+        仅当索引与操作前的配置同步、且操作只涉及添加、同分类编辑和删除时增量更新；
+        其余情况（顺序变化、跨分类移动）保留旧版本，下次搜索时完整重建。
+        """
+        changes = []
+        for op in operations:
+            if op["op"] not in ("add", "edit", "delete"):
+                return
+            if op["op"] == "edit" and op.get("new_category", op["category"]) != op["category"]:
+                return
+            item = freeze(op["item"]) if "item" in op else None
+            changes.append((op["op"], op["category"], op.get("title"), item))
         
-        items = category.get("items", [])
-        for item in items:
-            if item.get("title") == item_title:
-                return item
-        return None
+        self._search_index.apply(base_version, version, changes)
     
     def add_item_to_category(self, category_name: str, item: Dict[str, Any]) -> None:
         """向分类添加项目"""
-        def updater(config):
-            for category in config.get("categories", []):
-                if category.get("name") == category_name:
-                    if "items" not in category:
-                        category["items"] = []
-                    category["items"].append(item)
-                    break
-            return config
-        
-        self.update_config(updater)
+        self.apply_operations([{"op": "add", "category": category_name, "item": item}])
     
     def update_item_in_category(self, category_name: str, old_title: str, 
                                new_item: Dict[str, Any]) -> None:
         """更新分类中的项目"""
-        def updater(config):
-            for category in config.get("categories", []):
-                if category.get("name") == category_name:
-                    items = category.get("items", [])
-                    for i, item in enumerate(items):
-                        if item.get("title") == old_title:
-                            items[i] = new_item
-                            break
-                    break
-            return config
-        
-        self.update_config(updater)
+        self.apply_operations([{"op": "edit", "category": category_name,
+                                "title": old_title, "item": new_item}])
     
     def remove_item_from_category(self, category_name: str, item_title: str) -> None:
         """从分类中删除项目"""
-        def updater(config):
-            for category in config.get("categories", []):
-                if category.get("name") == category_name:
-                    items = category.get("items", [])
-                    category["items"] = [item for item in items 
-                                       if item.get("title") != item_title]
-                    break
-            return config
-        
-        self.update_config(updater)
+        self.apply_operations([{"op": "delete", "category": category_name,
+                                "title": item_title}])
     
     def reorder_items_in_category(self, category_name: str, order: list) -> None:
         """重新排序分类中的项目"""
-        def updater(config):
-            for category in config.get("categories", []):
-                if category.get("name") == category_name:
-                    items = category.get("items", [])
-                    items_map = {item.get("title"): item for item in items}
-                    
-                    new_items = []
-                    for title in order:
-                        if title in items_map:
-                            new_items.append(items_map.pop(title))
-                    
-                    # 追加任何未出现在 order 中的剩余项，保持相对顺序
-                    for item in items:
-                        if item.get("title") in items_map:
-                            new_items.append(item)
-                    
-                    category["items"] = new_items
-                    break
-            return config
-        
-        self.update_config(updater)
+        self.apply_operations([{"op": "reorder", "category": category_name,
+                                "order": order}])
     
     def move_item_in_category(self, category_name: str, item_title: str, 
                             direction: str) -> None:
         """在分类中移动项目"""
-        def updater(config):
-            for category in config.get("categories", []):
-                if category.get("name") == category_name:
-                    items = category.get("items", [])
-                    for i, item in enumerate(items):
-                        if item.get("title") == item_title:
-                            if direction == "up" and i > 0:
-                                items[i], items[i - 1] = items[i - 1], items[i]
-                            elif direction == "down" and i < len(items) - 1:
-                                items[i], items[i + 1] = items[i + 1], items[i]
-                            break
-                    break
-            return config
-        
-        self.update_config(updater)
+        self.apply_operations([{"op": "move", "category": category_name,
+                                "title": item_title, "direction": direction}])
     
     def move_item_between_categories(self, old_category: str, new_category: str, 
                                    item_title: str) -> None:
         """在分类间移动项目"""
-        def updater(config):
-            item_to_move = None
-            
-            # 从原分类移除
-            for category in config.get("categories", []):
-                if category.get("name") == old_category:
-                    items = category.get("items", [])
-                    for i, item in enumerate(items):
-                        if item.get("title") == item_title:
-                            item_to_move = items.pop(i)
-                            break
-                    break
-            
-            # 添加到新分类
-            if item_to_move:
-                for category in config.get("categories", []):
-                    if category.get("name") == new_category:
-                        if "items" not in category:
-                            category["items"] = []
-                        category["items"].append(item_to_move)
-                        break
-            
-            return config
+        self.apply_operations([{"op": "move_between", "category": old_category,
+                                "new_category": new_category, "title": item_title}])
+    
+    def export_config(self, path: str) -> None:
+        """
+        将当前配置导出为 config.json 格式（例如从 SQLite 存储导出回 JSON）
         
-        self.update_config(updater)
+        Args:
+            path: 导出文件路径
+        """
+        write_json_atomic(Path(path), self.get_snapshot().to_dict())
+        logger.info(f"配置已导出到: {path}")
     
     def invalidate_cache(self) -> None:
-        """使缓存失效"""
-        with self._lock:
-            self._cache = None
-            self._cache_time = 0
+        """使缓存失效（先写入尚未保存的修改）"""
+        self.flush()
+        self._stale = True
+    
+    def close(self) -> None:
+        """释放资源（写入未保存的修改、停止后台线程和文件监视）"""
+        if self._flusher:
+            with self._flush_cond:
+                self._closing = True
+                self._flush_cond.notify()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+        self._storage.close()
+        if self._sync:
+            self._sync.close()
+            self._sync = None
 
 
 # 全局配置管理器实例
@@ -0,0 +1,152 @@
+"""
+配置操作模块 - 以数据描述的配置修改操作
+ConfigManager 的所有项目修改都表示为操作字典，便于批量、原子地执行
+"""
+from typing import Any, Callable, Dict, List, Mapping
+
+# 操作字典格式：
+#   {"op": "add",          "category": 分类, "item": 项目}
+#   {"op": "edit",         "category": 分类, "title": 原标题, "item": 新项目,
+#                          "new_category": 新分类（可选，跨分类编辑时使用）}
+#   {"op": "delete",       "category": 分类, "title": 标题}
+#   {"op": "move",         "category": 分类, "title": 标题, "direction": "up" | "down"}
+#   {"op": "reorder",      "category": 分类, "order": [标题, ...]}
+#   {"op": "move_between", "category": 原分类, "new_category": 新分类, "title": 标题}
+
+
+class OperationError(ValueError):
+    """配置操作无法执行（目标不存在或参数无效）"""
+
+
+def _find_category(config: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """查找分类，不存在时抛出 OperationError"""
+    for category in config.get("categories", []):
+        if category.get("name") == name:
+            return category
+    raise OperationError(f"分类未找到: {name}")
+
+
+def _find_item_index(category: Dict[str, Any], title: str) -> int:
+    """查找项目位置，不存在时抛出 OperationError"""
+    for i, item in enumerate(category.get("items", [])):
+        if item.get("title") == title:
+            return i
+    raise OperationError(f"项目未找到: {title}")
+
+
+def _op_add(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """向分类末尾添加项目"""
+    category = _find_category(config, op["category"])
+    category.setdefault("items", []).append(dict(op["item"]))
+
+
+def _op_edit(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """更新项目，new_category 与原分类不同时移动到新分类末尾"""
+    category = _find_category(config, op["category"])
+    index = _find_item_index(category, op["title"])
+    new_category_name = op.get("new_category") or op["category"]
+
+    if new_category_name == op["category"]:
+        category["items"][index] = dict(op["item"])
+    else:
+        # 先确认目标分类存在再修改，保证操作要么完整执行要么不执行
+        target = _find_category(config, new_category_name)
+        category["items"].pop(index)
+        target.setdefault("items", []).append(dict(op["item"]))
+
+
+def _op_delete(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """删除分类中所有同名项目"""
+    category = _find_category(config, op["category"])
+    items = category.get("items", [])
+    remaining = [item for item in items if item.get("title") != op["title"]]
+    if len(remaining) == len(items):
+        raise OperationError(f"项目未找到: {op['title']}")
+    category["items"] = remaining
+
+
+def _op_move(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """在分类内上移或下移项目，已在边界时不做修改"""
+    category = _find_category(config, op["category"])
+    items = category.get("items", [])
+    i = _find_item_index(category, op["title"])
+    if op["direction"] == "up" and i > 0:
+        items[i], items[i - 1] = items[i - 1], items[i]
+    elif op["direction"] == "down" and i < len(items) - 1:
+        items[i], items[i + 1] = items[i + 1], items[i]
+
+
+def _op_reorder(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """按标题列表重新排序，未出现在列表中的项目保持相对顺序追加到末尾"""
+    category = _find_category(config, op["category"])
+    items = category.get("items", [])
+    items_map = {item.get("title"): item for item in items}
+
+    new_items = []
+    for title in op["order"]:
+        if title in items_map:
+            new_items.append(items_map.pop(title))
+
+    for item in items:
+        if item.get("title") in items_map:
+            new_items.append(item)
+
+    category["items"] = new_items
+
+
+def _op_move_between(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """将项目移动到另一个分类末尾"""
+    source = _find_category(config, op["category"])
+    target = _find_category(config, op["new_category"])
+    index = _find_item_index(source, op["title"])
+    target.setdefault("items", []).append(source["items"].pop(index))
+
+
+OPERATIONS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], None]] = {
+    "add": _op_add,
+    "edit": _op_edit,
+    "delete": _op_delete,
+    "move": _op_move,
+    "reorder": _op_reorder,
+    "move_between": _op_move_between,
+}
+
+# 各操作的必需字段
+REQUIRED_FIELDS: Dict[str, List[str]] = {
+    "add": ["category", "item"],
+    "edit": ["category", "title", "item"],
+    "delete": ["category", "title"],
+    "move": ["category", "title", "direction"],
+    "reorder": ["category", "order"],
+    "move_between": ["category", "new_category", "title"],
+}
+
+
+def apply_operation(config: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """
+    在配置上执行单个操作
+
+    每个操作在修改前完成全部检查，失败时配置保持不变。
+
+    Args:
+        config: 可修改的配置字典
+        op: 操作字典
+
+    Raises:
+        OperationError: 操作无效或目标不存在
+    """
+    handler = OPERATIONS.get(op.get("op"))
+    if handler is None:
+        raise OperationError(f"未知操作: {op.get('op')}")
+
+    missing = [field for field in REQUIRED_FIELDS[op["op"]] if field not in op]
+    if missing:
+        raise OperationError(f"缺少字段: {', '.join(missing)}")
+    if "item" in op and not isinstance(op["item"], Mapping):
+        raise OperationError("项目格式无效")
+    if "order" in op and not isinstance(op["order"], (list, tuple)):
+        raise OperationError("排序列表格式无效")
+    if op["op"] == "move" and op["direction"] not in ("up", "down"):
+        raise OperationError(f"无效的移动方向: {op['direction']}")
+
+    handler(config, op)
@@ -0,0 +1,125 @@
+"""
+配置快照模块 - 不可变、带版本号的配置快照
+读取方直接共享同一快照对象，写入方构建新快照后整体替换
+"""
+import hashlib
+import json
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+
+def freeze(value: Any) -> Any:
+    """
+    将配置数据递归转换为只读结构
+
+    dict 转换为 MappingProxyType，list 转换为 tuple，其余值原样返回。
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """将只读配置数据递归转换回可修改的 dict / list（深拷贝）"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot:
+    """
+    配置快照
+
+    Attributes:
+        version: 单调递增的配置版本号
+        data: 只读的配置数据
+        signature: 快照对应的文件签名 (mtime_ns, size, inode)
+        loaded_at: 快照创建时间
+        generation: 快照对应的跨进程共享配置代数（未启用多进程同步时为 0）
+    """
+
+    __slots__ = ('version', 'data', 'signature', 'loaded_at', 'generation',
+                 '_digest', '_lookup')
+
+    def __init__(self, version: int, data: Mapping[str, Any],
+                 signature: Optional[tuple] = None, generation: int = 0):
+        self.version = version
+        self.data = data
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.generation = generation
+        self._digest: Optional[str] = None
+        self._lookup: Optional[tuple] = None
+
+    @classmethod
+    def from_dict(cls, version: int, config: Dict[str, Any],
+                  signature: Optional[tuple] = None) -> 'ConfigSnapshot':
+        """由普通配置字典创建快照（会深拷贝为只读结构）"""
+        return cls(version, freeze(config), signature)
+
+    def with_signature(self, signature: Optional[tuple]) -> 'ConfigSnapshot':
+        """返回内容和版本相同、文件签名不同的快照（配置写入文件后使用）"""
+        snapshot = ConfigSnapshot(self.version, self.data, signature, self.generation)
+        snapshot.loaded_at = self.loaded_at
+        snapshot._digest = self._digest
+        snapshot._lookup = self._lookup
+        return snapshot
+
+    @property
+    def categories(self) -> tuple:
+        """只读的分类元组"""
+        return self.data.get('categories', ())
+
+    def _build_lookup(self) -> tuple:
+        """构建 分类名 -> 分类、(分类名, 标题) -> 项目 的查找表（同名时取第一个）"""
+        categories = {}
+        items = {}
+        for category in self.categories:
+            name = category.get('name')
+            if name in categories:
+                continue
+            categories[name] = category
+            for item in category.get('items', ()):
+                items.setdefault((name, item.get('title')), item)
+        self._lookup = (categories, items)
+        return self._lookup
+
+    def find_category(self, name: str) -> Optional[Mapping[str, Any]]:
+        """按名称查找分类（首次调用时构建查找表，之后为 O(1)）"""
+        lookup = self._lookup or self._build_lookup()
+        return lookup[0].get(name)
+
+    def find_item(self, category_name: str, title: str) -> Optional[Mapping[str, Any]]:
+        """按分类名和标题查找项目"""
+        lookup = self._lookup or self._build_lookup()
+        return lookup[1].get((category_name, title))
+
+    @property
+    def digest(self) -> str:
+        """
+        配置内容摘要（首次访问时计算）
+
+        版本号只在进程内单调递增，进程重启后会重新计数，
+        因此需要跨进程稳定的标识（如 ETag）时使用内容摘要。
+        """
+        if self._digest is None:
+            canonical = json.dumps(self.data, default=dict, sort_keys=True,
+                                   ensure_ascii=False, separators=(',', ':'))
+            self._digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+        return self._digest
+
+    @property
+    def modified_at(self) -> float:
+        """配置最后修改时间（文件 mtime，未知时为快照创建时间）"""
+        if self.signature:
+            return self.signature[0] / 1e9
+        return self.loaded_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """返回可修改的配置深拷贝，供写入方使用"""
+        return thaw(self.data)
@@ -0,0 +1,446 @@
+"""
+配置存储模块 - 可插拔的配置持久化后端
+提供 JSON 文件、JSON 文件 + 操作日志和 SQLite 三种实现
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from .config_journal import ConfigJournal, content_digest
+
+logger = logging.getLogger(__name__)
+
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    """获取文件签名 (mtime_ns, size, inode)，文件不存在时返回 None"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def encode_config(config: Dict[str, Any]) -> bytes:
+    """序列化配置为 config.json 的文件内容"""
+    return json.dumps(config, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def write_json_atomic(path: Path, config: Dict[str, Any], data: Optional[bytes] = None) -> bytes:
+    """
+    原子写入 JSON 文件（写临时文件 + fsync + 原子替换）
+
+    Args:
+        path: 文件路径
+        config: 配置
+        data: 已序列化的文件内容，为 None 时由 config 序列化
+
+    Returns:
+        bytes: 写入的文件内容
+    """
+    # 创建临时文件
+    temp_path = path.with_suffix('.tmp')
+
+    try:
+        if data is None:
+            data = encode_config(config)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 原子性替换
+        temp_path.replace(path)
+        return data
+
+    except Exception as e:
+        # 清理临时文件
+        if temp_path.exists():
+            temp_path.unlink()
+        logger.error(f"保存配置文件失败: {path}, 错误: {e}")
+        raise
+
+
+class ConfigStorage(ABC):
+    """
+    配置存储接口
+
+    所有方法都由 ConfigManager 在持有写锁时调用（signature 除外，
+    它会在无锁的读取路径上调用，必须足够廉价）。
+    """
+
+    name = 'base'
+    # 写入的字节数（JSON 文件和操作日志；SQLite 的页写入由数据库管理，不统计）
+    bytes_written = 0
+
+    @abstractmethod
+    def signature(self) -> Optional[tuple]:
+        """返回用于检测外部修改的廉价签名，存储不存在时返回 None"""
+
+    def exists(self) -> bool:
+        """存储是否已存在"""
+        return self.signature() is not None
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """读取完整配置"""
+
+    @abstractmethod
+    def save(self, config: Dict[str, Any]) -> None:
+        """写入完整配置"""
+
+    def commit(self, config: Dict[str, Any], operations: List[Dict[str, Any]]) -> None:
+        """
+        持久化一组已在 config 上成功执行的操作
+
+        默认实现写入完整配置，支持增量写入的后端可以只持久化 operations。
+
+        Args:
+            config: 执行操作后的完整配置
+            operations: 本次执行的操作列表
+        """
+        self.save(config)
+
+    @abstractmethod
+    def watch_paths(self) -> List[Path]:
+        """需要 inotify 监视的文件（第一个为主文件）"""
+
+    def close(self) -> None:
+        """释放资源"""
+
+
+class JsonFileStorage(ConfigStorage):
+    """JSON 文件存储：每次修改原子重写整个 config.json"""
+
+    name = 'json'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def signature(self) -> Optional[tuple]:
+        return _file_signature(self.path)
+
+    def load(self) -> Dict[str, Any]:
+        return json.loads(self.path.read_bytes())
+
+    def save(self, config: Dict[str, Any]) -> None:
+        self.bytes_written += len(write_json_atomic(self.path, config))
+
+    def watch_paths(self) -> List[Path]:
+        return [self.path]
+
+
+class JournalStorage(JsonFileStorage):
+    """
+    JSON 文件 + 操作日志存储
+
+    修改追加到 config.journal，读取时在 config.json 上重放日志；
+    日志超过阈值后写入完整快照并清空日志（压缩）。
+    """
+
+    name = 'journal'
+
+    def __init__(self, path: Path, max_bytes: int, max_records: int):
+        super().__init__(path)
+        self.journal = ConfigJournal(self.path.with_suffix('.journal'))
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+
+    def signature(self) -> Optional[tuple]:
+        signature = _file_signature(self.path)
+        if signature is None:
+            return None
+        return signature + (_file_signature(self.journal.path) or (None, None, None))
+
+    def load(self) -> Dict[str, Any]:
+        raw = self.path.read_bytes()
+        config = json.loads(raw)
+        self.journal.replay(config, content_digest(raw))
+        return config
+
+    def save(self, config: Dict[str, Any]) -> None:
+        data = encode_config(config)
+        digest = content_digest(data)
+        # 先标记压缩目标，替换 config.json 后、清空日志前崩溃时重放可以识别
+        size = self.journal.size
+        self.journal.mark_compacted(digest)
+        write_json_atomic(self.path, config, data)
+        self.bytes_written += len(data) + self.journal.size - size
+        self.journal.reset(digest)
+
+    def commit(self, config: Dict[str, Any], operations: List[Dict[str, Any]]) -> None:
+        size = self.journal.size
+        self.journal.append(operations)
+        self.bytes_written += self.journal.size - size
+        if self.journal.needs_compaction(self.max_bytes, self.max_records):
+            logger.info(f"压缩配置日志: {self.journal.records} 条记录, {self.journal.size} 字节")
+            self.save(config)
+
+    def watch_paths(self) -> List[Path]:
+        return [self.path, self.journal.path]
+
+
+class SqliteStorage(ConfigStorage):
+    """
+    SQLite 存储
+
+    分类和项目各占一张表，按 position 列排序，分类名称和项目标题上有索引，
+    增量写入时按索引定位受影响的行，单个项目的修改只写入这些行。
+    读取和查找由 ConfigManager 的内存快照完成，不查询数据库。
+    库不存在时自动从同目录的 config.json 迁移。
+    """
+
+    name = 'sqlite'
+
+    # 分类和项目中单独建列的字段，其余字段以 JSON 保存在 extra 列
+    _CATEGORY_COLUMNS = ('name', 'icon')
+    _ITEM_COLUMNS = ('title', 'icon', 'url')
+
+    _SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            icon TEXT,
+            position INTEGER NOT NULL,
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name);
+        CREATE INDEX IF NOT EXISTS idx_categories_position ON categories(position);
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+            title TEXT NOT NULL,
+            icon TEXT,
+            url TEXT,
+            position INTEGER NOT NULL,
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_items_category_position ON items(category_id, position);
+        CREATE INDEX IF NOT EXISTS idx_items_category_title ON items(category_id, title);
+        CREATE INDEX IF NOT EXISTS idx_items_title ON items(title);
+    '''
+
+    def __init__(self, path: Path, json_path: Optional[Path] = None):
+        """
+        初始化 SQLite 存储
+
+        Args:
+            path: 数据库文件路径
+            json_path: 首次启动时用于迁移的 config.json 路径
+        """
+        self.path = Path(path)
+        self.wal_path = Path(f'{self.path}-wal')
+        self.json_path = Path(json_path) if json_path else None
+        self._lock = threading.RLock()
+
+        is_new = not self.path.exists()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(self._SCHEMA)
+
+        if is_new and self.json_path and self.json_path.exists():
+            self.migrate_from_json(self.json_path)
+
+    # ---- 行与配置字典的转换 ----
+
+    @staticmethod
+    def _split(data: Dict[str, Any], columns: Tuple[str, ...]) -> Tuple[list, str]:
+        """将字典拆分为列值和 extra JSON"""
+        values = [data.get(column) for column in columns]
+        extra = {key: value for key, value in data.items()
+                 if key not in columns and key != 'items'}
+        return values, json.dumps(extra, ensure_ascii=False)
+
+    def _insert_item(self, category_id: int, item: Dict[str, Any], position: int) -> None:
+        values, extra = self._split(item, self._ITEM_COLUMNS)
+        self._conn.execute(
+            'INSERT INTO items (category_id, title, icon, url, position, extra) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (category_id, *values, position, extra)
+        )
+
+    def _write_all(self, config: Dict[str, Any]) -> None:
+        """在当前事务中重写全部数据"""
+        self._conn.execute('DELETE FROM items')
+        self._conn.execute('DELETE FROM categories')
+        extra = {key: value for key, value in config.items() if key != 'categories'}
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                           ('extra', json.dumps(extra, ensure_ascii=False)))
+        for position, category in enumerate(config.get('categories', [])):
+            values, category_extra = self._split(category, self._CATEGORY_COLUMNS)
+            cursor = self._conn.execute(
+                'INSERT INTO categories (name, icon, position, extra) VALUES (?, ?, ?, ?)',
+                (*values, position, category_extra)
+            )
+            for item_position, item in enumerate(category.get('items', [])):
+                self._insert_item(cursor.lastrowid, item, item_position)
+
+    # ---- ConfigStorage 接口 ----
+
+    def signature(self) -> Optional[tuple]:
+        # WAL 模式下提交写入 -wal 文件，检查点时才写回主库，因此两个文件都要比较
+        signature = _file_signature(self.path)
+        if signature is None:
+            return None
+        return signature + (_file_signature(self.wal_path) or (None, None, None))
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'extra'").fetchone()
+            config = json.loads(row[0]) if row else {}
+
+            categories = []
+            by_id = {}
+            for category_id, name, icon, extra in self._conn.execute(
+                    'SELECT id, name, icon, extra FROM categories ORDER BY position, id'):
+                category = {'name': name}
+                if icon is not None:
+                    category['icon'] = icon
+                category.update(json.loads(extra))
+                category['items'] = []
+                categories.append(category)
+                by_id[category_id] = category
+
+            for category_id, title, icon, url, extra in self._conn.execute(
+                    'SELECT category_id, title, icon, url, extra FROM items '
+                    'ORDER BY category_id, position, id'):
+                item = {'title': title, 'icon': icon, 'url': url}
+                item.update(json.loads(extra))
+                by_id[category_id]['items'].append(item)
+
+            config['categories'] = categories
+            return config
+
+    def save(self, config: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._write_all(config)
+
+    def commit(self, config: Dict[str, Any], operations: List[Dict[str, Any]]) -> None:
+        """在一个事务中把操作转换为行级修改"""
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for op in operations:
+                handler = getattr(self, f'_commit_{op["op"]}')
+                handler(op, config)
+
+    def watch_paths(self) -> List[Path]:
+        return [self.path, self.wal_path]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- 行级操作（操作已在内存配置上验证成功）----
+
+    def _category_id(self, name: str) -> int:
+        row = self._conn.execute(
+            'SELECT id FROM categories WHERE name = ? ORDER BY position, id LIMIT 1', (name,)
+        ).fetchone()
+        return row[0]
+
+    def _item_row(self, category_id: int, title: str) -> Tuple[int, int]:
+        """返回分类中第一个同名项目的 (id, position)"""
+        return self._conn.execute(
+            'SELECT id, position FROM items WHERE category_id = ? AND title = ? '
+            'ORDER BY position, id LIMIT 1', (category_id, title)
+        ).fetchone()
+
+    def _next_position(self, category_id: int) -> int:
+        row = self._conn.execute(
+            'SELECT MAX(position) FROM items WHERE category_id = ?', (category_id,)
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def _commit_add(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        category_id = self._category_id(op['category'])
+        self._insert_item(category_id, op['item'], self._next_position(category_id))
+
+    def _commit_edit(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        category_id = self._category_id(op['category'])
+        item_id, position = self._item_row(category_id, op['title'])
+        new_category = op.get('new_category') or op['category']
+        if new_category != op['category']:
+            category_id = self._category_id(new_category)
+            position = self._next_position(category_id)
+        values, extra = self._split(op['item'], self._ITEM_COLUMNS)
+        self._conn.execute(
+            'UPDATE items SET category_id = ?, title = ?, icon = ?, url = ?, position = ?, '
+            'extra = ? WHERE id = ?',
+            (category_id, *values, position, extra, item_id)
+        )
+
+    def _commit_delete(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        self._conn.execute('DELETE FROM items WHERE category_id = ? AND title = ?',
+                           (self._category_id(op['category']), op['title']))
+
+    def _commit_move(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        category_id = self._category_id(op['category'])
+        item_id, position = self._item_row(category_id, op['title'])
+        if op['direction'] == 'up':
+            neighbor = self._conn.execute(
+                'SELECT id, position FROM items WHERE category_id = ? AND position < ? '
+                'ORDER BY position DESC LIMIT 1', (category_id, position)
+            ).fetchone()
+        else:
+            neighbor = self._conn.execute(
+                'SELECT id, position FROM items WHERE category_id = ? AND position > ? '
+                'ORDER BY position LIMIT 1', (category_id, position)
+            ).fetchone()
+        if neighbor:
+            self._conn.execute('UPDATE items SET position = ? WHERE id = ?', (neighbor[1], item_id))
+            self._conn.execute('UPDATE items SET position = ? WHERE id = ?', (position, neighbor[0]))
+
+    def _commit_reorder(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        # 排序结果以内存中已执行操作的配置为准，只重写该分类的项目行
+        category_id = self._category_id(op['category'])
+        category = next(category for category in config.get('categories', [])
+                        if category.get('name') == op['category'])
+        self._conn.execute('DELETE FROM items WHERE category_id = ?', (category_id,))
+        for position, item in enumerate(category.get('items', [])):
+            self._insert_item(category_id, item, position)
+
+    def _commit_move_between(self, op: Dict[str, Any], config: Dict[str, Any]) -> None:
+        source_id = self._category_id(op['category'])
+        target_id = self._category_id(op['new_category'])
+        item_id, _ = self._item_row(source_id, op['title'])
+        self._conn.execute('UPDATE items SET category_id = ?, position = ? WHERE id = ?',
+                           (target_id, self._next_position(target_id), item_id))
+
+    # ---- 迁移与导出 ----
+
+    def migrate_from_json(self, json_path: Path) -> None:
+        """从 config.json 一次性导入全部数据"""
+        config = json.loads(Path(json_path).read_bytes())
+        self.save(config)
+        logger.info(f"已从 {json_path} 迁移配置到 SQLite: {self.path}")
+
+
+def create_storage(mode: str, config_path: Path, journal_max_bytes: int = 1024 * 1024,
+                   journal_max_records: int = 1000) -> ConfigStorage:
+    """
+    根据存储模式创建存储后端
+
+    Args:
+        mode: json / journal / sqlite
+        config_path: config.json 路径（SQLite 库位于同目录的 config.db）
+        journal_max_bytes: 日志模式的压缩阈值（字节）
+        journal_max_records: 日志模式的压缩阈值（记录数）
+    """
+    config_path = Path(config_path)
+    if mode == 'journal':
+        return JournalStorage(config_path, journal_max_bytes, journal_max_records)
+    if mode == 'sqlite':
+        return SqliteStorage(config_path.with_suffix('.db'), json_path=config_path)
+    return JsonFileStorage(config_path)
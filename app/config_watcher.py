@@ -0,0 +1,166 @@
+"""
+配置文件监视模块 - 基于 inotify 推送配置文件变化
+仅在 Linux 上可用，不可用时由调用方回退到 stat 校验
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件常量（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+               IN_MOVED_TO | IN_CREATE | IN_DELETE)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    """加载提供 inotify 接口的 libc，不可用时返回 None"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+
+    监视配置文件所在目录（原子替换会改变 inode，因此不能只监视文件本身），
+    当目标文件被修改、替换或删除时调用回调函数。
+    监视线程同时等待 inotify 和一个唤醒管道，停止时写入管道唤醒线程，
+    文件描述符由监视线程退出时关闭，不会在 read 阻塞期间被关闭或复用。
+    """
+
+    def __init__(self, file_path: Path, on_change: Callable[[], None],
+                 extra_paths: Iterable[Path] = ()):
+        """
+        初始化监视器
+
+        Args:
+            file_path: 要监视的文件路径
+            on_change: 文件变化时调用的回调函数
+            extra_paths: 同一目录下需要一起监视的其他文件
+        """
+        self.file_path = Path(file_path)
+        self._names = {os.fsencode(self.file_path.name)}
+        self._names.update(os.fsencode(Path(path).name) for path in extra_paths)
+        self._on_change = on_change
+        # 唤醒管道的写端，停止时写入一个字节
+        self._wake_fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """当前平台是否支持 inotify"""
+        return _load_libc() is not None
+
+    @property
+    def running(self) -> bool:
+        """监视线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """
+        启动监视线程
+
+        Returns:
+            bool: 是否成功启动
+        """
+        libc = _load_libc()
+        if libc is None:
+            logger.warning("inotify 不可用，无法启动配置文件监视")
+            return False
+
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify 初始化失败: {os.strerror(ctypes.get_errno())}")
+            return False
+
+        watch_dir = os.fsencode(self.file_path.parent)
+        if libc.inotify_add_watch(fd, watch_dir, _WATCH_MASK) < 0:
+            logger.warning(f"无法监视目录 {self.file_path.parent}: "
+                           f"{os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return False
+
+        wake_r, self._wake_fd = os.pipe()
+        self._thread = threading.Thread(target=self._run, args=(fd, wake_r),
+                                        name='config-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"已启动配置文件监视: {self.file_path}")
+        return True
+
+    def stop(self) -> None:
+        """停止监视并等待监视线程退出"""
+        wake_fd, self._wake_fd = self._wake_fd, None
+        if wake_fd is None:
+            return
+        try:
+            os.write(wake_fd, b'\0')
+        except OSError:
+            pass
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        os.close(wake_fd)
+
+    def _run(self, fd: int, wake_fd: int) -> None:
+        """读取 inotify 事件的循环，唤醒管道可读时退出"""
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        poller.register(wake_fd, select.POLLIN)
+        try:
+            self._read_events(poller, fd, wake_fd)
+        finally:
+            os.close(fd)
+            os.close(wake_fd)
+        logger.info("配置文件监视已停止")
+
+    def _read_events(self, poller: select.poll, fd: int, wake_fd: int) -> None:
+        """等待并处理 inotify 事件，直到被唤醒管道唤醒或读取失败"""
+        while True:
+            ready = {ready_fd for ready_fd, _ in poller.poll()}
+            if wake_fd in ready:
+                return
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                return
+            if not data:
+                return
+
+            changed = False
+            offset = 0
+            while offset < len(data):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if mask & IN_Q_OVERFLOW or name in self._names:
+                    changed = True
+
+            if changed:
+                try:
+                    self._on_change()
+                except Exception as e:
+                    logger.error(f"处理配置文件变化失败: {e}")
@@ -0,0 +1,280 @@
+"""
+Font Awesome 子集模块 - 只包含页面实际使用的图标字形
+扫描配置中的 fa* 图标类和模板、脚本中固定使用的图标，用 fontTools 从本地字体中
+裁剪出子集，与核心样式一起生成一个 CSS 文件（字体以 data URI 内联）。
+字形集合变化时才重新生成；未安装 fontTools 时页面使用完整的本地 Font Awesome
+"""
+import base64
+import hashlib
+import io
+import re
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+import logging
+
+try:
+    import brotli  # noqa: F401  woff2 读写需要 brotli
+    from fontTools import subset as ft_subset
+except ImportError:  # fontTools 为可选依赖
+    ft_subset = None
+
+from .compression import PREFERRED_ENCODINGS, compress
+from .config import config as app_config
+from .config_snapshot import ConfigSnapshot
+
+logger = logging.getLogger(__name__)
+# fontTools 在 INFO 级别逐步输出裁剪过程
+logging.getLogger('fontTools').setLevel(logging.ERROR)
+
+APP_DIR = Path(__file__).resolve().parent
+FONTAWESOME_DIR = APP_DIR / 'static' / 'vendor' / 'fontawesome'
+
+# 图标类前缀（与 utils.validate_icon_path 一致）-> 字体样式
+# 免费版没有 light 样式，fal 使用 solid 字体
+PREFIX_STYLES = {'fas': 'solid', 'fa': 'solid', 'fal': 'solid', 'far': 'regular', 'fab': 'brands'}
+# 字体样式 -> (字体文件, font-family, font-weight)
+STYLE_FONTS = {
+    'solid': ('fa-solid-900.woff2', 'Font Awesome 5 Free', 900),
+    'regular': ('fa-regular-400.woff2', 'Font Awesome 5 Free', 400),
+    'brands': ('fa-brands-400.woff2', 'Font Awesome 5 Brands', 400),
+}
+# 各样式的前缀类对应的字体
+FAMILY_RULES = (
+    '.fa,.fal,.fas{font-family:"Font Awesome 5 Free";font-weight:900}'
+    '.far{font-family:"Font Awesome 5 Free";font-weight:400}'
+    '.fab{font-family:"Font Awesome 5 Brands";font-weight:400}'
+)
+
+# 图标类，如 "fas fa-robot" 或 "fa fa-server fa-fw"
+_ICON_CLASS = re.compile(r'(?<![\w-])(fas|fab|far|fal|fa)((?:\s+fa-[a-z0-9-]+)+)')
+# all.min.css 中的字形规则，如 .fa-robot:before{content:"\f544"}
+_GLYPH_RULE = re.compile(r'((?:\.fa-[a-z0-9-]+:before,?)+)\{content:"\\([0-9a-f]+)"\}')
+
+Glyph = Tuple[str, str]
+
+
+def icon_glyphs(text: str) -> Set[Glyph]:
+    """
+    提取文本中的 Font Awesome 图标
+
+    Returns:
+        (字体样式, 图标名) 集合，如 {("solid", "fa-robot")}；
+        fa-fw 等非字形的类也会包含在内，由调用方按字形表过滤
+    """
+    glyphs = set()
+    for match in _ICON_CLASS.finditer(text):
+        style = PREFIX_STYLES[match.group(1)]
+        for name in match.group(2).split():
+            glyphs.add((style, name))
+    return glyphs
+
+
+def config_glyphs(categories: Iterable[dict]) -> Set[Glyph]:
+    """提取分类和项目中使用的 Font Awesome 图标"""
+    glyphs = set()
+    for category in categories:
+        icon = category.get('icon')
+        if isinstance(icon, str):
+            glyphs |= icon_glyphs(icon)
+        for item in category.get('items', ()):
+            icon = item.get('icon')
+            if isinstance(icon, str):
+                glyphs |= icon_glyphs(icon)
+    return glyphs
+
+
+class FontAwesomeSubset:
+    """
+    某个配置版本的 Font Awesome 子集
+
+    Attributes:
+        version: 配置版本号
+        glyphs: 包含的 (字体样式, 图标名)
+        css: CSS 内容
+        encoded: 内容编码 -> 压缩后的 CSS（未启用压缩时为空）
+        digest: CSS 内容摘要，用于 URL 和 ETag
+    """
+
+    __slots__ = ('version', 'glyphs', 'css', 'encoded', 'digest')
+
+    def __init__(self, version: int, glyphs: FrozenSet[Glyph], css: bytes,
+                 encoded: Optional[Dict[str, bytes]] = None):
+        self.version = version
+        self.glyphs = glyphs
+        self.css = css
+        self.encoded = encoded or {}
+        self.digest = hashlib.sha1(css).hexdigest()[:16]
+
+
+class FontAwesomeSubsetter:
+    """
+    Font Awesome 子集生成器
+
+    字形来自配置中的图标和模板、脚本中固定使用的图标（如新增按钮的 fa-plus）。
+    只保留最新版本的生成结果，配置变化但字形集合不变时不重新裁剪字体。
+    """
+
+    def __init__(self, fontawesome_dir: Path, source_dirs: Iterable[Path] = (),
+                 enabled: bool = True, compression_level: int = 6):
+        """
+        初始化子集生成器
+
+        Args:
+            fontawesome_dir: 本地 Font Awesome 目录（css/all.min.css 和 webfonts/）
+            source_dirs: 需要扫描固定图标的模板和脚本目录
+            enabled: 是否启用（未安装 fontTools 时始终不启用）
+            compression_level: 压缩级别，为 0 时不保存压缩版本
+        """
+        self.fontawesome_dir = Path(fontawesome_dir)
+        self.source_dirs = tuple(Path(d) for d in source_dirs)
+        self.enabled = enabled and ft_subset is not None
+        self.compression_level = compression_level
+        self._subset: Optional[FontAwesomeSubset] = None
+        self._codepoints: Optional[Dict[str, int]] = None
+        self._core_css = ''
+        self._static_glyphs: Optional[Set[Glyph]] = None
+        self._lock = threading.Lock()
+
+        if enabled and ft_subset is None:
+            logger.info("未安装 fontTools/brotli，使用完整的本地 Font Awesome")
+
+    def get(self, snapshot: ConfigSnapshot) -> Optional[FontAwesomeSubset]:
+        """
+        获取与快照版本一致的子集，必要时重新生成
+
+        Returns:
+            FontAwesomeSubset，未启用或生成失败时返回 None（页面使用完整字体）
+        """
+        if not self.enabled:
+            return None
+
+        subset = self._subset
+        if subset is not None and subset.version == snapshot.version:
+            return subset
+
+        with self._lock:
+            subset = self._subset
+            if subset is None or subset.version != snapshot.version:
+                try:
+                    subset = self._refresh(snapshot, subset)
+                except Exception as e:
+                    logger.error(f"生成 Font Awesome 子集失败: {e}")
+                    self.enabled = False
+                    return None
+                self._subset = subset
+        return subset
+
+    @property
+    def current(self) -> Optional[FontAwesomeSubset]:
+        """最近一次生成的子集"""
+        return self._subset
+
+    def _load_metadata(self) -> None:
+        """解析 all.min.css，得到图标名 -> 码位映射和核心样式"""
+        css = (self.fontawesome_dir / 'css' / 'all.min.css').read_text(encoding='utf-8')
+        codepoints = {}
+        first = None
+        for match in _GLYPH_RULE.finditer(css):
+            if first is None:
+                first = match.start()
+            codepoint = int(match.group(2), 16)
+            for selector in match.group(1).split(','):
+                if selector:
+                    codepoints[selector[1:-len(':before')]] = codepoint
+
+        # 许可声明注释和字形规则之前的通用样式（fa-fw、fa-spin 等）
+        self._core_css = css[:first or 0]
+        self._codepoints = codepoints
+
+    def _scan_sources(self) -> Set[Glyph]:
+        """扫描模板和脚本中固定使用的图标"""
+        glyphs = set()
+        for directory in self.source_dirs:
+            for path in sorted(directory.rglob('*')):
+                if path.suffix in ('.html', '.js') and path.is_file():
+                    glyphs |= icon_glyphs(path.read_text(encoding='utf-8', errors='ignore'))
+        return glyphs
+
+    def _refresh(self, snapshot: ConfigSnapshot,
+                 previous: Optional[FontAwesomeSubset]) -> FontAwesomeSubset:
+        """按快照中的图标生成子集，字形集合未变化时复用上一次的结果"""
+        if self._codepoints is None:
+            self._load_metadata()
+        if self._static_glyphs is None:
+            self._static_glyphs = self._scan_sources()
+
+        glyphs = frozenset(glyph for glyph in config_glyphs(snapshot.categories) | self._static_glyphs
+                           if glyph[1] in self._codepoints)
+        if previous is not None and previous.glyphs == glyphs:
+            return FontAwesomeSubset(snapshot.version, glyphs, previous.css, previous.encoded)
+        return self._build(snapshot.version, glyphs)
+
+    def _subset_font(self, filename: str, codepoints: Set[int]) -> Tuple[bytes, Set[int]]:
+        """
+        裁剪字体
+
+        Returns:
+            (woff2 字体数据, 字体中实际存在的码位)
+        """
+        options = ft_subset.Options()
+        options.flavor = 'woff2'
+        options.layout_features = []
+        options.name_IDs = []
+        options.notdef_outline = True
+        font = ft_subset.load_font(str(self.fontawesome_dir / 'webfonts' / filename), options)
+        try:
+            present = codepoints & set(font.getBestCmap())
+            subsetter = ft_subset.Subsetter(options)
+            subsetter.populate(unicodes=sorted(present))
+            subsetter.subset(font)
+            buffer = io.BytesIO()
+            ft_subset.save_font(font, buffer, options)
+        finally:
+            font.close()
+        return buffer.getvalue(), present
+
+    def _build(self, version: int, glyphs: FrozenSet[Glyph]) -> FontAwesomeSubset:
+        """生成子集 CSS"""
+        by_style: Dict[str, Set[int]] = {}
+        for style, name in glyphs:
+            by_style.setdefault(style, set()).add(self._codepoints[name])
+
+        font_faces = []
+        included = set()
+        for style, codepoints in sorted(by_style.items()):
+            filename, family, weight = STYLE_FONTS[style]
+            data, present = self._subset_font(filename, codepoints)
+            if not present:
+                continue
+            included |= present
+            font_faces.append(
+                f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+                f'font-display:block;src:url(data:font/woff2;base64,'
+                f'{base64.b64encode(data).decode("ascii")}) format("woff2")}}'
+            )
+
+        glyph_rules = sorted(
+            f'.{name}:before{{content:"\\{self._codepoints[name]:x}"}}'
+            for name in {name for _, name in glyphs}
+            if self._codepoints[name] in included
+        )
+        css = ''.join([self._core_css, *font_faces, FAMILY_RULES, *glyph_rules]).encode('utf-8')
+
+        encoded = {}
+        if self.compression_level:
+            for encoding in PREFERRED_ENCODINGS:
+                encoded[encoding] = compress(css, encoding, self.compression_level)
+
+        logger.info(f"Font Awesome 子集已生成: 版本 {version}, {len(glyph_rules)} 个图标, "
+                    f"{len(css)} 字节")
+        return FontAwesomeSubset(version, glyphs, css, encoded)
+
+
+# 全局 Font Awesome 子集生成器实例
+fa_subsetter = FontAwesomeSubsetter(
+    FONTAWESOME_DIR,
+    source_dirs=(APP_DIR / 'templates', APP_DIR / 'static' / 'js'),
+    enabled=app_config.fontawesome_subset,
+    compression_level=app_config.compression_level if app_config.page_cache_gzip else 0,
+)
@@ -0,0 +1,163 @@
+"""
+HTTP 缓存模块 - ETag / Last-Modified 条件请求和 Cache-Control 策略
+在渲染模板或执行搜索之前判断是否可以直接返回 304
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+import logging
+
+from flask import Response, request
+
+from .config import config as app_config
+from .config_snapshot import ConfigSnapshot
+from .static_assets import static_assets
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / 'templates'
+
+
+def _scan_templates() -> Tuple[str, float]:
+    """计算模板目录的内容指纹和最新修改时间"""
+    digest = hashlib.sha1()
+    latest = 0.0
+    for path in sorted(TEMPLATES_DIR.rglob('*')):
+        if not path.is_file():
+            continue
+        st = path.stat()
+        latest = max(latest, st.st_mtime)
+        digest.update(path.name.encode('utf-8'))
+        if app_config.is_development:
+            # 开发环境每次请求都会重新扫描，只使用修改时间
+            digest.update(str(st.st_mtime_ns).encode())
+        else:
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:8], latest
+
+
+# 模板在生产环境中不会变化，启动时计算一次
+_TEMPLATE_FINGERPRINT = _scan_templates()
+
+
+def template_fingerprint() -> Tuple[str, float]:
+    """获取模板指纹和最新修改时间（开发环境实时计算）"""
+    if app_config.is_development:
+        return _scan_templates()
+    return _TEMPLATE_FINGERPRINT
+
+
+def make_etag(*parts: str) -> str:
+    """由若干部分生成强 ETag 值（不含引号）"""
+    return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def page_validators(template_name: str, snapshot: ConfigSnapshot) -> Tuple[str, float]:
+    """获取页面的 ETag（配置、模板和静态资源清单）和最后修改时间"""
+    fingerprint, templates_mtime = template_fingerprint()
+    etag = make_etag('page', template_name, snapshot.digest, fingerprint, static_assets.digest())
+    return etag, max(snapshot.modified_at, templates_mtime)
+
+
+def search_validators(term: str, snapshot: ConfigSnapshot, *extra: str) -> Tuple[str, float]:
+    """获取搜索结果的 ETag 和最后修改时间"""
+    return make_etag('search', term, snapshot.digest, *extra), snapshot.modified_at
+
+
+def file_validators(path: str, st: Optional[os.stat_result] = None) -> Tuple[str, float]:
+    """获取文件的 ETag（基于内容哈希）和最后修改时间"""
+    if st is None:
+        st = os.stat(path)
+    return file_hasher.hash(path, st), st.st_mtime
+
+
+class FileHasher:
+    """文件内容哈希缓存，文件签名 (mtime_ns, size, inode) 不变时不重复计算"""
+
+    def __init__(self):
+        self._hashes = {}
+
+    def hash(self, path: str, st: os.stat_result) -> str:
+        """获取文件内容的哈希"""
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        value = digest.hexdigest()[:20]
+        self._hashes[path] = (signature, value)
+        return value
+
+
+file_hasher = FileHasher()
+
+
+def _matching_etag(etags: Iterable[str]) -> Optional[str]:
+    """返回 If-None-Match 中匹配的 ETag，没有匹配时返回 None"""
+    if_none_match = request.if_none_match
+    for etag in etags:
+        if if_none_match.star_tag or if_none_match.contains_weak(etag):
+            return etag
+    return None
+
+
+def not_modified(route: str, etag: str, last_modified: Optional[float] = None,
+                 variants: Tuple[str, ...] = ('gzip', 'br')) -> Optional[Response]:
+    """
+    判断请求是否可以返回 304
+
+    If-None-Match 存在时只比较 ETag；否则比较 If-Modified-Since。
+    压缩后的表示使用带编码后缀的 ETag，比较时视为同一资源。
+
+    Args:
+        route: 路由名称（用于 Cache-Control 策略）
+        etag: 资源 ETag（不含引号）
+        last_modified: 最后修改时间戳
+        variants: 可能使用的压缩编码后缀
+
+    Returns:
+        可以返回 304 时的响应，否则为 None
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    if request.if_none_match:
+        candidates = (etag,) + tuple(f'{etag}-{encoding}' for encoding in variants)
+        matched = _matching_etag(candidates)
+        if matched is None:
+            return None
+    elif last_modified is not None and request.if_modified_since is not None:
+        if int(last_modified) > request.if_modified_since.timestamp():
+            return None
+    else:
+        return None
+
+    response = Response(status=304)
+    apply_validators(response, route, etag, last_modified)
+    if request.if_none_match:
+        # 304 响应应携带客户端所持表示的 ETag
+        response.set_etag(matched)
+    return response
+
+
+def apply_validators(response: Response, route: str, etag: str,
+                     last_modified: Optional[float] = None) -> Response:
+    """
+    为响应设置 ETag、Last-Modified 和 Cache-Control
+
+    响应带有 Content-Encoding 时 ETag 追加编码后缀，保证不同表示的强 ETag 不同。
+    """
+    encoding = response.headers.get('Content-Encoding')
+    response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    policy = app_config.cache_control(route)
+    if policy:
+        response.headers['Cache-Control'] = policy
+    return response
@@ -0,0 +1,181 @@
+"""
+图标合并模块 - 将主页上的小图标合并为一个 CSS 文件
+每个配置版本生成一次，图标以 data URI 内联，主页一次请求即可取得全部图标
+"""
+import base64
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import logging
+
+from .compression import PREFERRED_ENCODINGS, compress
+from .config import config as app_config
+from .config_snapshot import ConfigSnapshot
+from .icon_store import guess_mime
+
+logger = logging.getLogger(__name__)
+
+class IconBundle:
+    """
+    某个配置版本的图标合并结果
+
+    Attributes:
+        version: 配置版本号
+        classes: 图标路径（如 "img/a.png"）-> CSS 类名
+        css: CSS 内容
+        encoded: 内容编码 -> 压缩后的 CSS（未启用压缩时为空）
+        digest: CSS 内容摘要，用于 URL 和 ETag
+    """
+
+    __slots__ = ('version', 'classes', 'css', 'encoded', 'digest')
+
+    def __init__(self, version: int, classes: Dict[str, str], css: bytes,
+                 encoded: Optional[Dict[str, bytes]] = None):
+        self.version = version
+        self.classes = classes
+        self.css = css
+        self.encoded = encoded or {}
+        self.digest = hashlib.sha1(css).hexdigest()[:16]
+
+
+class IconBundler:
+    """
+    图标合并器
+
+    为每个项目选择不超过 max_bytes 的最大图标文件（优先使用多分辨率版本中较大的，
+    保证高分屏清晰），超过阈值的图标仍由页面单独请求。只保留最新版本的合并结果。
+    """
+
+    def __init__(self, images_dir: str, enabled: bool = True, max_bytes: int = 8192,
+                 compression_level: int = 6):
+        """
+        初始化图标合并器
+
+        Args:
+            images_dir: 图标目录
+            enabled: 是否启用
+            max_bytes: 内联图标文件的大小上限（字节）
+            compression_level: 压缩级别，为 0 时不保存压缩版本
+        """
+        self.images_dir = images_dir
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self._bundle: Optional[IconBundle] = None
+        # 文件名 -> ((mtime_ns, size), data URI)，避免每个版本重新读取未变化的文件
+        self._data_uris: Dict[str, Tuple[tuple, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: ConfigSnapshot) -> Optional[IconBundle]:
+        """
+        获取与快照版本一致的合并结果，必要时重新生成
+
+        Returns:
+            IconBundle，未启用时返回 None
+        """
+        if not self.enabled:
+            return None
+
+        bundle = self._bundle
+        if bundle is not None and bundle.version == snapshot.version:
+            return bundle
+
+        with self._lock:
+            bundle = self._bundle
+            if bundle is None or bundle.version != snapshot.version:
+                bundle = self._build(snapshot)
+                self._bundle = bundle
+        return bundle
+
+    @property
+    def current(self) -> Optional[IconBundle]:
+        """最近一次生成的合并结果"""
+        return self._bundle
+
+    def _data_uri(self, path: str) -> Optional[str]:
+        """读取图标文件并转换为 data URI，文件不存在或超过阈值时返回 None"""
+        name = path[4:]
+        full_path = os.path.join(self.images_dir, name)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        if st.st_size > self.max_bytes:
+            return None
+
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._data_uris.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        mime = guess_mime(name)
+        if mime is None or not mime.startswith('image/'):
+            return None
+        try:
+            with open(full_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        uri = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+        self._data_uris[name] = (signature, uri)
+        return uri
+
+    def _pick(self, item) -> Tuple[Optional[str], Optional[str]]:
+        """选择项目要内联的图标，返回 (图标路径, data URI)"""
+        candidates = []
+        variants = item.get('icon_variants') or {}
+        for width in sorted(variants, key=int, reverse=True):
+            candidates.append(variants[width])
+        candidates.append(item.get('icon'))
+
+        for path in candidates:
+            if isinstance(path, str) and path.startswith('img/'):
+                uri = self._data_uri(path)
+                if uri is not None:
+                    return path, uri
+        return None, None
+
+    def _build(self, snapshot: ConfigSnapshot) -> IconBundle:
+        """生成合并结果"""
+        classes = {}
+        rules = {}
+        used = set()
+        for category in snapshot.categories:
+            for item in category.get('items', ()):
+                icon = item.get('icon')
+                if not isinstance(icon, str) or icon in classes:
+                    continue
+                path, uri = self._pick(item)
+                if path is None:
+                    continue
+                class_name = 'ib-' + hashlib.sha1(path.encode('utf-8')).hexdigest()[:10]
+                classes[icon] = class_name
+                used.add(path[4:])
+                rules[class_name] = f'.{class_name}{{background-image:url("{uri}")}}'
+
+        css = '\n'.join(rules.values()).encode('utf-8')
+        encoded = {}
+        if self.compression_level:
+            for encoding in PREFERRED_ENCODINGS:
+                encoded[encoding] = compress(css, encoding, self.compression_level)
+        bundle = IconBundle(snapshot.version, classes, css, encoded)
+
+        # 删除已不在配置中的文件缓存
+        for name in list(self._data_uris):
+            if name not in used:
+                del self._data_uris[name]
+
+        logger.debug(f"图标合并完成: 版本 {snapshot.version}, {len(rules)} 个图标, "
+                     f"{len(css)} 字节")
+        return bundle
+
+
+# 全局图标合并器实例
+icon_bundler = IconBundler(
+    app_config.images_path,
+    enabled=app_config.icon_bundle_enabled,
+    max_bytes=app_config.icon_bundle_max_bytes,
+    compression_level=app_config.compression_level if app_config.page_cache_gzip else 0,
+)
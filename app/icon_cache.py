@@ -0,0 +1,159 @@
+"""
+图标缓存模块 - /config/img 小文件的内存 LRU 缓存
+命中时直接返回内存中的字节和预先计算的 ETag / Content-Type；
+内容寻址的文件内容永不改变，命中时无需任何文件系统调用
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import logging
+
+from .config import config as app_config
+from .icon_store import content_hash, guess_mime, is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+
+class CachedIcon:
+    """缓存的图标文件"""
+
+    __slots__ = ('body', 'etag', 'content_type', 'last_modified', 'signature', 'immutable')
+
+    def __init__(self, body: bytes, etag: str, content_type: str, last_modified: float,
+                 signature: tuple, immutable: bool):
+        self.body = body
+        self.etag = etag
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.signature = signature
+        self.immutable = immutable
+
+
+def file_signature(st: os.stat_result) -> tuple:
+    """文件签名 (mtime_ns, size, inode)"""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class IconCache:
+    """
+    图标 LRU 缓存
+
+    总大小超过 max_bytes 时淘汰最久未使用的文件；大于 max_file_bytes 的文件不缓存。
+    非内容寻址的文件每次命中时用一次 stat 校验签名，文件变化后重新读取。
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_file_bytes: int = 256 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存总大小上限（字节），为 0 时禁用缓存
+            max_file_bytes: 可缓存的单个文件大小上限（字节）
+        """
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._entries: 'OrderedDict[str, CachedIcon]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_bytes > 0
+
+    def get(self, filename: str) -> Optional[CachedIcon]:
+        """
+        获取缓存的图标
+
+        Args:
+            filename: 图标目录下的文件名
+
+        Returns:
+            仍然有效的缓存项，未命中或文件已变化时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+
+        if entry is not None and not entry.immutable:
+            try:
+                valid = file_signature(os.stat(os.path.join(app_config.images_path,
+                                                            filename))) == entry.signature
+            except OSError:
+                valid = False
+            if not valid:
+                self.invalidate((filename,))
+                entry = None
+
+        self._stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def load(self, filename: str, path: str, st: os.stat_result) -> Optional[CachedIcon]:
+        """
+        读取文件并放入缓存
+
+        Args:
+            filename: 图标目录下的文件名
+            path: 文件完整路径
+            st: 文件的 stat 结果
+
+        Returns:
+            缓存项；缓存未启用或文件过大时返回 None（由调用方以文件流发送）
+        """
+        if not self.enabled or st.st_size > self.max_file_bytes:
+            return None
+
+        with open(path, 'rb') as f:
+            body = f.read()
+
+        immutable = is_content_addressed(filename)
+        etag = content_hash(filename) if immutable else hashlib.sha1(body).hexdigest()[:20]
+        entry = CachedIcon(body, etag, guess_mime(filename) or 'application/octet-stream',
+                           st.st_mtime, file_signature(st), immutable)
+
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[filename] = entry
+            self._size += len(body)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+                self._stats["evictions"] += 1
+        return entry
+
+    def invalidate(self, filenames: Iterable[str]) -> None:
+        """删除指定文件的缓存（文件被删除或替换后调用）"""
+        with self._lock:
+            for filename in filenames:
+                entry = self._entries.pop(filename, None)
+                if entry is not None:
+                    self._size -= len(entry.body)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存统计
+
+        Returns:
+            {"hits", "misses", "evictions", "entries": 缓存文件数, "bytes": 缓存总字节数}
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._size)
+
+
+# 全局图标缓存实例
+icon_cache = IconCache(
+    max_bytes=app_config.icon_cache_max_bytes,
+    max_file_bytes=app_config.icon_cache_max_file_bytes,
+)
@@ -0,0 +1,150 @@
+"""
+图标处理模块 - 上传图标的缩放、转码和多分辨率版本
+安装 Pillow 时为每个上传的图标生成多个尺寸的 WebP 版本和一个 PNG 兼容版本，
+未安装或图片无法解码（如 SVG）时按原样保存
+"""
+import io
+import os
+from typing import Any, Dict, Mapping, Optional
+import logging
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖
+    Image = None
+
+from .config import config as app_config
+from .icon_store import icon_store
+
+logger = logging.getLogger(__name__)
+
+# PNG 兼容版本的目标尺寸（与页面上图标的显示尺寸接近）
+FALLBACK_SIZE = 64
+
+
+def is_supported() -> bool:
+    """是否可以生成图标的多分辨率版本"""
+    return Image is not None
+
+
+def _best_frame(image):
+    """
+    选择用于缩放的帧
+
+    多分辨率 ICO 文件选择不小于最大目标尺寸的最小帧，没有足够大的帧时选最大帧。
+    """
+    if image.format != 'ICO':
+        return image
+
+    target = max(app_config.icon_sizes)
+    sizes = sorted(image.ico.sizes(), key=lambda size: size[0] * size[1])
+    large_enough = [size for size in sizes if min(size) >= target]
+    return image.ico.getimage(large_enough[0] if large_enough else sizes[-1])
+
+
+def _encode(image, fmt: str) -> bytes:
+    """将图片编码为指定格式"""
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=85, method=6)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _make_variants(name: str) -> Optional[Dict[str, Any]]:
+    """
+    由已保存的原图生成各尺寸的 WebP 版本和 PNG 兼容版本
+
+    Returns:
+        {"icon": PNG 兼容版本路径, "icon_variants": {宽度: WebP 路径}, "icon_original": 原图路径}，
+        图片无法解码时返回 None
+    """
+    try:
+        with Image.open(icon_store.path(name)) as image:
+            image = _best_frame(image)
+            image.load()
+            image = image.convert('RGBA')
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.info(f"图标无法解码，按原样保存: {name}, 原因: {e}")
+        return None
+
+    # 不放大图片：只生成不超过原图尺寸的版本，原图过小时只生成最小的一个
+    sizes = [size for size in app_config.icon_sizes if size <= max(image.size)]
+    sizes = sizes or [min(app_config.icon_sizes)]
+
+    variants = {}
+    fallback = None
+    for size in sizes:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        width = str(resized.width)
+        if width in variants:
+            continue
+
+        variants[width] = f"img/{icon_store.put_bytes(_encode(resized, 'WEBP'), '.webp')}"
+        if fallback is None or size <= FALLBACK_SIZE:
+            fallback = resized
+
+    fallback_name = icon_store.put_bytes(_encode(fallback, 'PNG'), '.png')
+    return {"icon": f"img/{fallback_name}", "icon_variants": variants,
+            "icon_original": f"img/{name}"}
+
+
+def save_icon(file, filename: str) -> Dict[str, Any]:
+    """
+    保存上传的图标并生成多分辨率版本
+
+    原图和各版本都按内容哈希保存在图标存储中（见 icon_store 模块），原图总是保留。
+
+    Args:
+        file: 上传的文件对象（werkzeug FileStorage）
+        filename: 已清理的上传文件名（只使用其扩展名）
+
+    Returns:
+        项目的图标字段 {"icon": 路径, "icon_variants": {宽度: 路径}, "icon_original": 原图路径}；
+        未生成多分辨率版本时只有 "icon"，指向原图
+    """
+    name = icon_store.put_stream(file.stream, os.path.splitext(filename)[1])
+
+    if Image is not None:
+        fields = _make_variants(name)
+        if fields:
+            logger.info(f"已生成图标版本: {filename} -> {', '.join(fields['icon_variants'])}")
+            return fields
+
+    return {"icon": f"img/{name}"}
+
+
+def icon_fields(item: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    从项目中取出图标字段的可修改副本（编辑项目但未上传新图标时沿用）
+
+    Args:
+        item: 原项目
+
+    Returns:
+        {"icon": 路径}，有多分辨率版本时另含 "icon_variants" 和 "icon_original"
+    """
+    fields = {"icon": item.get("icon")}
+    if item.get("icon_variants"):
+        fields["icon_variants"] = dict(item["icon_variants"])
+    if item.get("icon_original"):
+        fields["icon_original"] = item["icon_original"]
+    return fields
+
+
+def srcset(variants: Optional[Mapping[str, str]]) -> str:
+    """
+    生成 <img srcset> 属性值
+
+    Args:
+        variants: {宽度: 路径}
+
+    Returns:
+        如 "/config/img/a-32.webp 32w, /config/img/a-64.webp 64w"，无版本时为空字符串
+    """
+    if not variants:
+        return ''
+    return ', '.join(f"/config/{path} {width}w"
+                     for width, path in sorted(variants.items(), key=lambda kv: int(kv[0])))
@@ -0,0 +1,238 @@
+"""
+图标存储模块 - 按内容哈希保存图标文件
+相同内容只保存一份，文件名即内容哈希，因此可以永久缓存；
+引用计数基于当前配置，未被引用的文件由垃圾回收清除
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterable, Mapping, Optional
+import logging
+
+from .config import config as app_config
+
+logger = logging.getLogger(__name__)
+
+# 内容寻址的文件名：sha256 前 32 位十六进制 + 扩展名
+_HASHED_NAME = re.compile(r'^([0-9a-f]{32})(\.[a-z0-9]+)$')
+# 上传过程中的临时文件前缀（超过保护期的残留文件由垃圾回收清除）
+_TEMP_PREFIX = '.upload-'
+_CHUNK_SIZE = 64 * 1024
+# mimetypes 在部分平台上缺少的图标类型
+_MIME_TYPES = {'.ico': 'image/x-icon', '.svg': 'image/svg+xml', '.webp': 'image/webp'}
+
+
+def is_content_addressed(filename: str) -> bool:
+    """文件名是否为内容哈希名"""
+    return _HASHED_NAME.match(filename) is not None
+
+
+def content_hash(filename: str) -> str:
+    """获取内容哈希名中的哈希部分"""
+    return _HASHED_NAME.match(filename).group(1)
+
+
+def guess_mime(filename: str) -> Optional[str]:
+    """根据扩展名猜测图标文件的 MIME 类型"""
+    ext = os.path.splitext(filename)[1].lower()
+    return _MIME_TYPES.get(ext) or mimetypes.guess_type(filename)[0]
+
+
+def icon_references(categories: Iterable[Mapping[str, Any]]) -> Counter:
+    """
+    统计配置中每个图标文件的引用次数
+
+    Args:
+        categories: 配置中的分类列表
+
+    Returns:
+        Counter: 文件名 -> 引用次数（同一项目的图标、原图和各尺寸版本分别计数）
+    """
+    references = Counter()
+    for category in categories:
+        for item in category.get('items', ()):
+            paths = [item.get('icon'), item.get('icon_original')]
+            paths.extend((item.get('icon_variants') or {}).values())
+            for path in paths:
+                if isinstance(path, str) and path.startswith('img/'):
+                    references[path[4:]] += 1
+    return references
+
+
+class IconStore:
+    """内容寻址的图标存储"""
+
+    def __init__(self, directory: str):
+        """
+        初始化图标存储
+
+        Args:
+            directory: 图标目录
+        """
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        """获取文件的完整路径"""
+        return os.path.join(self.directory, name)
+
+    def put_stream(self, stream: BinaryIO, ext: str) -> str:
+        """
+        边读取边计算哈希，将数据流写入存储
+
+        数据先写入同目录的临时文件，再按内容哈希重命名；内容已存在时丢弃临时文件。
+
+        Args:
+            stream: 数据流
+            ext: 文件扩展名（含点，如 ".png"）
+
+        Returns:
+            str: 存储的文件名
+        """
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            return self._commit(temp_path, digest.hexdigest(), ext)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def put_bytes(self, data: bytes, ext: str) -> str:
+        """
+        将数据写入存储
+
+        Args:
+            data: 文件内容
+            ext: 文件扩展名（含点）
+
+        Returns:
+            str: 存储的文件名
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{digest[:32]}{ext.lower()}"
+        if self._reuse(name):
+            return name
+
+        fd, temp_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return self._commit(temp_path, digest, ext)
+
+    def _commit(self, temp_path: str, digest: str, ext: str) -> str:
+        """将临时文件重命名为内容哈希名，已存在相同内容时删除临时文件"""
+        name = f"{digest[:32]}{ext.lower()}"
+        if self._reuse(name):
+            os.unlink(temp_path)
+        else:
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self.path(name))
+        return name
+
+    def _reuse(self, name: str) -> bool:
+        """
+        相同内容的文件已存在时复用它
+
+        更新其修改时间，使垃圾回收在保护期内不会删除尚未写入配置的引用。
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        logger.debug(f"图标内容已存在，复用: {name}")
+        return True
+
+    def _files(self):
+        """遍历存储目录中的图标文件，返回 (文件名, stat)"""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                yield entry.name, entry.stat(follow_symlinks=False)
+
+    def usage(self, references: Counter) -> Dict[str, Any]:
+        """
+        统计磁盘占用
+
+        Args:
+            references: 当前配置的引用计数（见 icon_references）
+
+        Returns:
+            {"files", "bytes": 全部文件, "referenced": {"files", "bytes"},
+             "orphaned": {"files", "bytes"}, "references": 引用总数,
+             "shared_files": 被多处引用的文件数, "missing": 被引用但不存在的文件}
+        """
+        total = {"files": 0, "bytes": 0}
+        referenced = {"files": 0, "bytes": 0}
+        orphaned = {"files": 0, "bytes": 0}
+        present = set()
+        for name, st in self._files():
+            present.add(name)
+            bucket = referenced if references.get(name) else orphaned
+            for counter in (total, bucket):
+                counter["files"] += 1
+                counter["bytes"] += st.st_size
+
+        return dict(
+            total,
+            referenced=referenced,
+            orphaned=orphaned,
+            references=sum(references.values()),
+            shared_files=sum(1 for count in references.values() if count > 1),
+            missing=sorted(name for name in references if name not in present),
+        )
+
+    def collect_garbage(self, references: Counter, grace_seconds: int,
+                        dry_run: bool = False) -> Dict[str, Any]:
+        """
+        删除未被配置引用的图标文件
+
+        修改时间在 grace_seconds 之内的文件不删除，避免删除刚上传、
+        尚未写入配置的图标；中断残留的临时文件超过期限后同样清除。
+
+        Args:
+            references: 当前配置的引用计数（见 icon_references）
+            grace_seconds: 保护期（秒）
+            dry_run: 为 True 时只列出将被删除的文件
+
+        Returns:
+            {"removed": [文件名, ...], "bytes": 释放的字节数, "dry_run": bool}
+        """
+        cutoff = time.time() - grace_seconds
+        removed = []
+        freed = 0
+        with os.scandir(self.directory) as entries:
+            candidates = [(entry.name, entry.stat(follow_symlinks=False))
+                          for entry in entries if entry.is_file(follow_symlinks=False)]
+
+        for name, st in candidates:
+            if name.startswith('.') and not name.startswith(_TEMP_PREFIX):
+                continue
+            if references.get(name) or st.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                try:
+                    os.unlink(self.path(name))
+                except FileNotFoundError:
+                    continue
+            removed.append(name)
+            freed += st.st_size
+
+        if removed and not dry_run:
+            logger.info(f"已清除未引用的图标: {len(removed)} 个文件, {freed} 字节")
+        return {"removed": sorted(removed), "bytes": freed, "dry_run": dry_run}
+
+
+# 全局图标存储实例
+icon_store = IconStore(app_config.images_path)
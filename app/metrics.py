@@ -0,0 +1,196 @@
+"""
+监控指标模块 - 以 Prometheus 文本格式导出运行指标
+请求路径上只做计数（预先分配的直方图桶和计数器，加锁递增），
+各缓存和配置管理器已有的统计在抓取 /metrics 时才读取
+"""
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from flask import Flask, request
+
+from .config import config as app_config
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# 搜索结果数直方图的桶上限
+RESULT_BUCKETS = (0, 1, 5, 10, 20, 50, 100)
+
+# 指标样本：(名称后缀, 标签, 值)
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+# 采集函数返回的指标：(名称, 类型, 说明, 样本列表)
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """格式化标签 {a="1",b="2"}"""
+    text = ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+    return f'{{{text}}}' if text else ''
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值，整数不带小数点"""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """按标签值分组的计数器"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        """递增计数（labels 与 label_names 一一对应）"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            values = list(self._values.items())
+        samples = [('', tuple(zip(self.label_names, labels)), value) for labels, value in values]
+        return [(self.name, 'counter', self.help, samples)]
+
+
+class Histogram:
+    """
+    按标签值分组的直方图
+
+    每组标签第一次出现时分配桶计数数组，之后的观测只递增已有的计数。
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float],
+                 label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # 标签值 -> [各桶计数..., +Inf 桶计数, 总和]
+        self._series: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        """记录一次观测"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        samples = []
+        for labels, values in series:
+            base = tuple(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                samples.append(('_bucket', base + (('le', le),), cumulative))
+            samples.append(('_sum', base, values[-1]))
+            samples.append(('_count', base, cumulative))
+        return [(self.name, 'histogram', self.help, samples)]
+
+
+class MetricsRegistry:
+    """指标注册表：请求路径上直接记录的指标和抓取时读取的统计"""
+
+    def __init__(self, enabled: bool = True):
+        """
+        初始化注册表
+
+        Args:
+            enabled: 是否记录请求指标（禁用时 /metrics 返回 404）
+        """
+        self.enabled = enabled
+        self.requests = Histogram(
+            'homer_http_request_duration_seconds', '请求处理时间（不含响应体发送）',
+            LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.responses = Counter(
+            'homer_http_responses_total', '按状态码统计的响应数', ('endpoint', 'method', 'status'))
+        self.search_latency = Histogram(
+            'homer_search_duration_seconds', '/search 查询时间', LATENCY_BUCKETS)
+        self.search_results = Histogram(
+            'homer_search_results', '/search 返回的结果数', RESULT_BUCKETS)
+        self.icon_bytes = Counter(
+            'homer_icon_bytes_total', '/config/img 发送的图标字节数', ('source',))
+        self._metrics = [self.requests, self.responses, self.search_latency,
+                         self.search_results, self.icon_bytes]
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def init_app(self, app: Flask) -> None:
+        """注册请求计时钩子（未匹配路由的请求记为 endpoint="unmatched"）"""
+        @app.before_request
+        def start_request_timer():
+            request.environ['homer.started'] = perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            started = request.environ.get('homer.started')
+            if started is not None:
+                endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+                self.requests.observe(perf_counter() - started, (endpoint, request.method))
+                self.responses.inc((endpoint, request.method, str(response.status_code)))
+            return response
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """注册抓取时调用的采集函数，返回 (名称, 类型, 说明, 样本列表) 序列"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（0.0.4）"""
+        families: List[Family] = []
+        for metric in self._metrics:
+            families.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.error(f"采集指标失败: {e}")
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def gauge(name: str, help_text: str, value: float,
+          labels: Optional[Dict[str, str]] = None) -> Family:
+    """单个样本的 gauge 指标"""
+    return (name, 'gauge', help_text, [('', tuple((labels or {}).items()), value)])
+
+
+def counter(name: str, help_text: str, value: float,
+            labels: Optional[Dict[str, str]] = None) -> Family:
+    """单个样本的 counter 指标（值由其他模块的统计累计）"""
+    return (name, 'counter', help_text, [('', tuple((labels or {}).items()), value)])
+
+
+def summary(name: str, help_text: str, total: float, count: int) -> Family:
+    """只有总和与次数的 summary 指标"""
+    return (name, 'summary', help_text,
+            [('_sum', (), total), ('_count', (), count)])
+
+
+# 全局指标注册表
+metrics = MetricsRegistry(enabled=app_config.metrics_enabled)
@@ -0,0 +1,178 @@
+"""
+页面缓存模块 - 缓存按配置版本渲染好的 HTML 页面
+页面只在配置变化时才需要重新渲染，命中时直接返回预先渲染的字节
+"""
+import threading
+from typing import Callable, Dict, Optional, Tuple
+import logging
+
+from flask import Response, request
+
+from .compression import PREFERRED_ENCODINGS, compress, negotiate
+from .config import config as app_config
+from .http_cache import TEMPLATES_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPage:
+    """预渲染的页面"""
+
+    __slots__ = ('key', 'body', 'encoded', 'validators')
+
+    def __init__(self, key: tuple, body: bytes, encoded: Optional[Dict[str, bytes]] = None,
+                 validators: Optional[Tuple[str, float]] = None):
+        self.key = key
+        self.body = body
+        # 内容编码 -> 压缩后的页面（按 PREFERRED_ENCODINGS 顺序）
+        self.encoded = encoded or {}
+        # 渲染时的 (ETag, 最后修改时间)，返回旧页面时使用
+        self.validators = validators
+
+
+class PageCache:
+    """
+    渲染页面缓存
+
+    以 (页面名称, 应用挂载路径) 为槽位，每个槽位只保留与最新
+    (配置版本, 模板修改时间, 页面 ETag) 对应的一份页面，因此缓存大小有上限。
+    ETag 包含静态资源清单摘要，开发环境中静态文件修改后页面中带指纹的 URL 会重新生成。
+    每个槽位同一时间只由一个线程渲染，其他请求在渲染期间直接返回上一版本的页面，
+    配置频繁修改时读取不会排队等待渲染。
+    """
+
+    def __init__(self, enabled: bool = True, gzip_enabled: bool = True,
+                 gzip_level: int = 6, check_template_mtime: bool = False):
+        """
+        初始化页面缓存
+
+        Args:
+            enabled: 是否启用缓存
+            gzip_enabled: 是否同时保存压缩版本（gzip，安装 brotli 时另存 br）
+            gzip_level: 压缩级别
+            check_template_mtime: 是否将模板修改时间加入缓存键（开发环境使用）
+        """
+        self.enabled = enabled
+        self.gzip_enabled = gzip_enabled
+        self.gzip_level = gzip_level
+        self.check_template_mtime = check_template_mtime
+        self._pages: Dict[Tuple[str, str], CachedPage] = {}
+        self._lock = threading.Lock()
+        # 槽位 -> 渲染锁
+        self._render_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # 命中计数不加锁，并发时可能略少
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def _template_mtime(self, template_name: str) -> int:
+        """获取模板修改时间，仅在开发环境参与缓存键"""
+        if not self.check_template_mtime:
+            return 0
+        try:
+            return (TEMPLATES_DIR / template_name).stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def get(self, template_name: str, version: int, render_func: Callable[[], str],
+            validators: Optional[Tuple[str, float]] = None) -> CachedPage:
+        """
+        获取页面，未命中时调用 render_func 渲染并缓存
+
+        其他线程正在渲染此页面时返回上一版本的页面（validators 为该版本的校验值），
+        还没有任何版本时等待渲染完成。
+
+        Args:
+            template_name: 模板名称
+            version: 配置版本号
+            render_func: 渲染函数，返回 HTML 字符串
+            validators: 当前版本的 (ETag, 最后修改时间)，随页面保存，ETag 同时作为缓存键的一部分
+
+        Returns:
+            CachedPage: 预渲染页面
+        """
+        slot = (template_name, request.script_root)
+        key = (version, self._template_mtime(template_name), validators and validators[0])
+
+        page = self._pages.get(slot)
+        if page is not None and page.key == key:
+            self._stats["hits"] += 1
+            return page
+        if not self.enabled:
+            self._stats["misses"] += 1
+            return self._render(slot, key, render_func, validators)
+
+        with self._lock:
+            render_lock = self._render_locks.setdefault(slot, threading.Lock())
+        if not render_lock.acquire(blocking=page is None or page.validators is None):
+            self._stats["stale"] += 1
+            return page
+        try:
+            # 等待期间其他线程可能已完成渲染
+            page = self._pages.get(slot)
+            if page is not None and page.key == key:
+                self._stats["hits"] += 1
+                return page
+            self._stats["misses"] += 1
+            return self._render(slot, key, render_func, validators)
+        finally:
+            render_lock.release()
+
+    def _render(self, slot: Tuple[str, str], key: tuple, render_func: Callable[[], str],
+                validators: Optional[Tuple[str, float]]) -> CachedPage:
+        """渲染页面并生成压缩版本，启用缓存时保存到槽位"""
+        template_name, version = slot[0], key[0]
+        body = render_func().encode('utf-8')
+        encoded = {}
+        if self.gzip_enabled:
+            # 每个版本只压缩一次，之后的请求直接返回压缩结果
+            for encoding in PREFERRED_ENCODINGS:
+                encoded[encoding] = compress(body, encoding, self.gzip_level)
+        page = CachedPage(key, body, encoded, validators)
+
+        if self.enabled:
+            with self._lock:
+                current = self._pages.get(slot)
+                # 并发渲染时不要用旧版本覆盖新版本
+                if current is None or current.key[0] <= version:
+                    self._pages[slot] = page
+            logger.debug(f"页面已缓存: {template_name}, 版本 {version}")
+
+        return page
+
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存统计
+
+        Returns:
+            {"hits", "misses", "stale": 渲染期间返回上一版本页面的次数,
+             "pages": 缓存的页面数, "bytes": 页面及压缩版本的总字节数}
+        """
+        with self._lock:
+            pages = list(self._pages.values())
+        size = sum(len(page.body) + sum(map(len, page.encoded.values())) for page in pages)
+        return dict(self._stats, pages=len(pages), bytes=size)
+
+    def make_response(self, page: CachedPage) -> Response:
+        """根据客户端支持的编码构造响应"""
+        encoding = negotiate(request.headers.get('Accept-Encoding'), page.encoded)
+        if encoding is not None:
+            response = Response(page.encoded[encoding], mimetype='text/html')
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = Response(page.body, mimetype='text/html')
+        if page.encoded:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._pages.clear()
+
+
+# 全局页面缓存实例
+page_cache = PageCache(
+    enabled=app_config.page_cache_enabled,
+    gzip_enabled=app_config.page_cache_gzip,
+    gzip_level=app_config.compression_level,
+    check_template_mtime=app_config.is_development,
+)
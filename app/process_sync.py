@@ -0,0 +1,114 @@
+"""
+多进程同步模块 - 跨进程写锁和共享配置代数
+多个工作进程共享同一配置时，用 fcntl 文件锁串行化写入，
+用 mmap 映射的计数器让每个进程以一次内存读取判断快照是否过期
+"""
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_COUNTER = struct.Struct('<Q')
+
+
+class ProcessSync:
+    """
+    跨进程配置同步
+
+    - config.lock: 写入方持有 flock 排他锁期间完成“读取最新配置 -> 修改 -> 写入 -> 递增代数”
+    - config.version: 8 字节的共享代数计数器，通过 mmap 映射，读取无需系统调用
+    """
+
+    def __init__(self, config_path: Path):
+        """
+        初始化同步文件
+
+        Args:
+            config_path: 配置文件路径，锁文件和计数器文件位于同一目录
+        """
+        config_path = Path(config_path)
+        self.lock_path = config_path.with_suffix('.lock')
+        self.version_path = config_path.with_suffix('.version')
+        self._depth = 0
+
+        self._lock_fd = self._open_lock()
+        # flock 锁属于打开的文件描述，fork 出的子进程继承后会与父进程共享同一把锁，
+        # 因此子进程需要重新打开锁文件（如 gunicorn --preload）
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reopen_lock)
+        fd = os.open(self.version_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < _COUNTER.size:
+                # 多个进程同时初始化时 ftruncate 到相同长度是幂等的
+                os.ftruncate(fd, _COUNTER.size)
+            self._mmap = mmap.mmap(fd, _COUNTER.size)
+        finally:
+            os.close(fd)
+
+        logger.info(f"已启用多进程配置同步: {self.lock_path}, {self.version_path}")
+
+    def _open_lock(self) -> int:
+        """打开锁文件"""
+        return os.open(self.lock_path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+
+    def _reopen_lock(self) -> None:
+        """fork 后在子进程中重新打开锁文件"""
+        if self._lock_fd is None:
+            return
+        os.close(self._lock_fd)
+        self._lock_fd = self._open_lock()
+        self._depth = 0
+
+    @staticmethod
+    def is_supported() -> bool:
+        """当前平台是否支持 fcntl 文件锁"""
+        return fcntl is not None
+
+    def generation(self) -> int:
+        """读取共享配置代数"""
+        return _COUNTER.unpack_from(self._mmap, 0)[0]
+
+    @contextmanager
+    def locked(self):
+        """
+        持有跨进程排他锁（同一进程内可重入）
+
+        调用方需保证同一时刻只有一个线程进入（ConfigManager 在持有 _lock 时调用）。
+        """
+        if self._depth == 0:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def bump(self) -> int:
+        """
+        递增共享配置代数（写入存储后调用）
+
+        Returns:
+            int: 新的代数
+        """
+        with self.locked():
+            value = self.generation() + 1
+            _COUNTER.pack_into(self._mmap, 0, value)
+            return value
+
+    def close(self) -> None:
+        """释放资源"""
+        self._mmap.close()
+        fd, self._lock_fd = self._lock_fd, None
+        if fd is not None:
+            os.close(fd)
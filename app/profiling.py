@@ -0,0 +1,318 @@
+"""
+请求剖析模块 - 按需剖析请求，按路由累计结果
+每 N 个请求剖析一个，或剖析带有密钥请求头的请求，结果按路由累计在内存中，
+由后台线程定期（或在查看、下载结果时）写入数据目录的 profiles/ 下：
+sample 方式定时采样请求线程的调用栈，输出折叠栈文件（flamegraph.pl、speedscope 可直接读取）；
+cprofile 方式输出 pstats 文件。未启用时不注册任何请求钩子
+"""
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional
+import logging
+
+from flask import Flask, request
+
+from .config import config as app_config
+
+logger = logging.getLogger(__name__)
+
+# 触发剖析和访问剖析结果时携带密钥的请求头
+PROFILE_HEADER = 'X-Profile-Token'
+# 剖析方式 -> 结果文件扩展名
+SUFFIXES = {'sample': '.folded', 'cprofile': '.prof'}
+# 不剖析的路由：剖析结果接口本身和长连接的事件流
+EXCLUDED_ENDPOINTS = frozenset({'profiles', 'profile_download', 'profiles_reset', 'events'})
+# 后台写入结果文件的间隔（秒）
+WRITE_INTERVAL = 10.0
+
+
+@lru_cache(maxsize=4096)
+def _frame_label(code: CodeType) -> str:
+    """调用栈中一帧的名称：函数名 (文件名:行号)"""
+    return f'{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """将调用栈折叠为一行（从最外层到当前帧，以分号分隔）"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """
+    调用栈采样器
+
+    有线程登记时才运行一个后台线程，每 interval 秒读取一次登记线程的当前调用栈。
+    采样只能在采样线程获得 GIL 时进行，实际间隔可能大于 interval。
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        # 线程 ID -> 折叠栈计数
+        self._targets: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: int) -> None:
+        """开始采样指定线程"""
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-sampler',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id: int) -> Counter:
+        """停止采样指定线程，返回采集到的折叠栈计数"""
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self) -> None:
+        while True:
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                for thread_id, stacks in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+class RouteProfile:
+    """一个路由累计的剖析结果"""
+
+    __slots__ = ('requests', 'seconds', 'stacks', 'stats', 'pending')
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.stacks: Counter = Counter()
+        self.stats: Optional[pstats.Stats] = None
+        # 尚未合并写入文件的剖析结果（折叠栈计数或 cProfile.Profile）
+        self.pending: List[Any] = []
+
+
+class RequestProfiler:
+    """
+    请求剖析器
+
+    Python 3.12 起 cProfile 基于 sys.monitoring，同一时间只能有一个剖析器，且会记录所有线程的调用，
+    因此 cprofile 方式同时只剖析一个请求（其余被选中的请求直接跳过），结果可能混入并发请求的调用；
+    sample 方式只采样被剖析请求所在的线程，可以同时剖析多个请求。
+
+    请求结束时只把结果加入该路由的待写入列表，合并和写入文件由后台线程每 WRITE_INTERVAL 秒
+    进行一次（查看列表或下载文件时也会先写入），不在请求路径上进行文件 IO。
+    """
+
+    def __init__(self, output_dir: str, sample_rate: int = 0, secret: str = '',
+                 mode: str = 'sample', interval: float = 0.002):
+        """
+        初始化剖析器
+
+        Args:
+            output_dir: 结果目录
+            sample_rate: 每 sample_rate 个请求剖析一个，0 表示不按比例采样
+            secret: 请求头密钥，带有匹配 X-Profile-Token 的请求总是被剖析，为空时不启用
+            mode: sample（采样调用栈）或 cprofile
+            interval: sample 方式的采样间隔（秒）
+        """
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.mode = mode
+        self.enabled = bool(sample_rate or secret)
+        self._counter = itertools.count(1)
+        self._sampler = StackSampler(interval)
+        # cprofile 方式同时只剖析一个请求
+        self._cprofile_lock = threading.Lock()
+        self._routes: Dict[str, RouteProfile] = {}
+        self._lock = threading.Lock()
+        # 合并和写入结果文件时持有，保证同一路由的文件不会被并发写入
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    def authorized(self) -> bool:
+        """当前请求是否带有匹配的密钥（未设置密钥时总是拒绝）"""
+        if not self.secret:
+            return False
+        token = request.headers.get(PROFILE_HEADER, '')
+        return hmac.compare_digest(token.encode('utf-8'), self.secret.encode('utf-8'))
+
+    def _should_profile(self) -> bool:
+        """当前请求是否需要剖析"""
+        if request.endpoint in EXCLUDED_ENDPOINTS:
+            return False
+        if self.secret and PROFILE_HEADER in request.headers:
+            return self.authorized()
+        return bool(self.sample_rate) and next(self._counter) % self.sample_rate == 0
+
+    def init_app(self, app: Flask) -> None:
+        """注册请求钩子"""
+        @app.before_request
+        def start_profiling():
+            if not self._should_profile():
+                return
+            if self.mode == 'cprofile':
+                if not self._cprofile_lock.acquire(blocking=False):
+                    return
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # 已有其他剖析工具在运行
+                    self._cprofile_lock.release()
+                    return
+                request.environ['homer.profile'] = profile
+            else:
+                self._sampler.start(threading.get_ident())
+                request.environ['homer.profile'] = True
+            request.environ['homer.profile_started'] = time.perf_counter()
+
+        @app.teardown_request
+        def stop_profiling(exc):
+            profile = request.environ.pop('homer.profile', None)
+            if profile is None:
+                return
+            elapsed = time.perf_counter() - request.environ['homer.profile_started']
+            if isinstance(profile, cProfile.Profile):
+                profile.disable()
+                self._cprofile_lock.release()
+            else:
+                profile = self._sampler.stop(threading.get_ident())
+            endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+            try:
+                self._record(endpoint, profile, elapsed)
+            except Exception as e:
+                logger.error(f"保存剖析结果失败: {endpoint}, 错误: {e}")
+
+        logger.info(f"请求剖析已启用: 方式 {self.mode}, 采样间隔 {self.sample_rate or '-'} 个请求, "
+                    f"请求头触发 {'是' if self.secret else '否'}, 结果目录 {self.output_dir}")
+
+    def _filename(self, endpoint: str) -> str:
+        """路由的结果文件名"""
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint) + SUFFIXES[self.mode]
+
+    def _record(self, endpoint: str, profile: Any, elapsed: float) -> None:
+        """记录一次剖析结果（只加入待写入列表）"""
+        with self._lock:
+            route = self._routes.get(endpoint)
+            if route is None:
+                route = self._routes[endpoint] = RouteProfile()
+            route.requests += 1
+            route.seconds += elapsed
+            route.pending.append(profile)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='profile-writer',
+                                                daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            time.sleep(WRITE_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"保存剖析结果失败: {e}")
+
+    def flush(self) -> None:
+        """合并待写入的剖析结果并重写有变化的路由的结果文件"""
+        with self._write_lock:
+            with self._lock:
+                changed = []
+                for endpoint, route in self._routes.items():
+                    if route.pending:
+                        changed.append((endpoint, route, route.pending))
+                        route.pending = []
+            if not changed:
+                return
+
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            for endpoint, route, profiles in changed:
+                path = self.output_dir / self._filename(endpoint)
+                temp_path = path.with_suffix(path.suffix + '.tmp')
+                if self.mode == 'sample':
+                    for stacks in profiles:
+                        route.stacks.update(stacks)
+                    lines = [f'{stack} {count}\n' for stack, count in route.stacks.most_common()]
+                    temp_path.write_text(''.join(lines), encoding='utf-8')
+                else:
+                    if route.stats is None:
+                        route.stats = pstats.Stats(profiles.pop(0))
+                    if profiles:
+                        route.stats.add(*profiles)
+                    route.stats.dump_stats(temp_path)
+                temp_path.replace(path)
+
+    def listing(self) -> List[Dict[str, Any]]:
+        """
+        结果文件列表（包括之前运行留下的文件）
+
+        Returns:
+            [{"file", "bytes", "modified", "endpoint", "requests", "seconds"}, ...]，
+            本次运行没有剖析过的路由 endpoint 等字段为 None
+        """
+        self.flush()
+        with self._lock:
+            routes = {self._filename(endpoint): (endpoint, route.requests, route.seconds)
+                      for endpoint, route in self._routes.items()}
+        files = []
+        if self.output_dir.is_dir():
+            for path in sorted(self.output_dir.iterdir()):
+                if path.suffix not in SUFFIXES.values():
+                    continue
+                st = path.stat()
+                endpoint, requests, seconds = routes.get(path.name, (None, None, None))
+                files.append({
+                    "file": path.name, "bytes": st.st_size, "modified": st.st_mtime,
+                    "endpoint": endpoint, "requests": requests,
+                    "seconds": round(seconds, 6) if seconds is not None else None,
+                })
+        return files
+
+    def path(self, filename: str) -> Optional[Path]:
+        """结果文件路径（先写入待写入的结果），文件名无效或不存在时返回 None"""
+        if os.path.basename(filename) != filename or Path(filename).suffix not in SUFFIXES.values():
+            return None
+        self.flush()
+        path = self.output_dir / filename
+        return path if path.is_file() else None
+
+    def reset(self) -> int:
+        """清除累计结果和结果文件，返回删除的文件数"""
+        with self._write_lock, self._lock:
+            self._routes.clear()
+            removed = 0
+            if self.output_dir.is_dir():
+                for path in self.output_dir.iterdir():
+                    if path.suffix in SUFFIXES.values():
+                        path.unlink(missing_ok=True)
+                        removed += 1
+        return removed
+
+
+# 全局请求剖析器
+request_profiler = RequestProfiler(
+    app_config.profiles_path,
+    sample_rate=app_config.profile_sample_rate,
+    secret=app_config.profile_secret,
+    mode=app_config.profile_mode,
+    interval=app_config.profile_interval_ms / 1000,
+)
@@ -1,17 +1,26 @@
 import json
-import os
 import logging
-from pypinyin import lazy_pinyin
+import time
 
-from flask import redirect, render_template, request, url_for, jsonify
+from flask import Response, redirect, render_template, request, send_file, url_for, jsonify
 from werkzeug.utils import secure_filename
 
 from app import app
+from app.change_feed import change_feed
 from app.config_manager import config_manager
 from app.config import config as app_config
+from app.http_cache import apply_validators, not_modified, page_validators, search_validators
+from app.fa_subset import fa_subsetter
+from app.icon_bundle import icon_bundler
+from app.icon_cache import icon_cache
+from app.icon_pipeline import icon_fields, save_icon
+from app.icon_store import icon_references, icon_store
+from app.compression import negotiate
+from app.page_cache import page_cache
+from app.metrics import counter, gauge, metrics, summary
+from app.profiling import request_profiler
 from app.utils import (
-    validate_form_data, error_handler,
-    validate_title, validate_url, validate_category_name,
+    validate_form_data, validate_operation, error_handler,
     sanitize_filename, format_error_message
 )
 
@@ -20,17 +29,41 @@ logger = logging.getLogger(__name__)
 
 CONFIG_IMG_PATH = app_config.images_path
 
+def render_categories_page(template_name: str, route: str):
+    """渲染分类页面，按配置版本缓存渲染结果并支持条件请求"""
+    snapshot = config_manager.get_snapshot()
+    
+    # 先检查条件请求，未修改时不进行任何渲染
+    etag, last_modified = page_validators(template_name, snapshot)
+    response = not_modified(route, etag, last_modified)
+    if response:
+        return response
+    
+    def render():
+        categories_data = [
+            {"name": category["name"], "nav_items": category["items"]}
+            for category in snapshot.categories
+        ]
+        return render_template(template_name, categories=categories_data,
+                               icon_bundle=icon_bundler.get(snapshot),
+                               fontawesome=fa_subsetter.get(snapshot),
+                               search_index=(compact_search_index()
+                                             if app_config.search_mode == 'client' else None),
+                               events_url=(url_for("events", last=snapshot.digest)
+                                           if change_feed.enabled else None))
+    
+    page = page_cache.get(template_name, snapshot.version, render, (etag, last_modified))
+    # 其他线程正在渲染新版本时返回的是上一版本的页面，使用该页面自己的校验值
+    etag, last_modified = page.validators or (etag, last_modified)
+    return apply_validators(page_cache.make_response(page), route, etag, last_modified)
+
+
 @app.route("/")
 @error_handler
 def index():
     """主页 - 显示导航分类"""
     try:
-        categories = config_manager.get_categories()
-        categories_data = [
-            {"name": category["name"], "nav_items": category["items"]}
-            for category in categories
-        ]
-        return render_template("index.html", categories=categories_data)
+        return render_categories_page("index.html", "index")
     except Exception as e:
         logger.error(f"加载主页失败: {e}")
         return render_template("index.html", categories=[])
@@ -44,12 +77,7 @@ def config():
         return handle_config_post()
     
     try:
-        categories = config_manager.get_categories()
-        categories_data = [
-            {"name": category["name"], "nav_items": category["items"]}
-            for category in categories
-        ]
-        return render_template("config.html", categories=categories_data)
+        return render_categories_page("config.html", "config")
     except Exception as e:
         logger.error(f"加载配置页面失败: {e}")
         return render_template("config.html", categories=[])
@@ -89,13 +117,13 @@ def handle_add_item():
         if not filename:
             return jsonify({"error": "无效的文件名"}), 400
         
-        icon.save(os.path.join(CONFIG_IMG_PATH, filename))
-        icon_path = f"img/{filename}"
+        # 保存原图并生成多分辨率版本
+        icon_data = save_icon(icon, filename)
     else:
-        icon_path = "fas fa-link"
+        icon_data = {"icon": "fas fa-link"}
 
     # 添加项目
-    new_item = {"title": title, "icon": icon_path, "url": url}
+    new_item = {"title": title, "icon": icon_data["icon"], "url": url, **icon_data}
     config_manager.add_item_to_category(category, new_item)
     
     return jsonify({"success": True, "message": "项目已添加"})
@@ -115,12 +143,11 @@ def handle_edit_item():
     new_icon = request.files.get("new_icon")
 
     # 处理新图标
-    icon_path = None
+    icon_data = None
     if new_icon and new_icon.filename:
         filename = sanitize_filename(secure_filename(new_icon.filename))
         if filename:
-            new_icon.save(os.path.join(CONFIG_IMG_PATH, filename))
-            icon_path = f"img/{filename}"
+            icon_data = save_icon(new_icon, filename)
 
     # 获取原项目信息
     original_item = config_manager.find_item_in_category(old_category, old_title)
@@ -128,19 +155,21 @@ def handle_edit_item():
         return jsonify({"error": "项目未找到"}), 404
 
     # 创建更新后的项目
+    icon_data = icon_data or icon_fields(original_item)
     updated_item = {
         "title": new_title,
+        "icon": icon_data["icon"],
         "url": new_url,
-        "icon": icon_path if icon_path else original_item["icon"]
+        **icon_data
     }
 
-    if old_category == new_category:
-        # 同一分类内更新
-        config_manager.update_item_in_category(old_category, old_title, updated_item)
-    else:
-        # 跨分类更新 - 先删除再添加
-        config_manager.remove_item_from_category(old_category, old_title)
-        config_manager.add_item_to_category(new_category, updated_item)
+    # 同分类更新和跨分类移动都在一次原子写入中完成
+    result = config_manager.apply_operations([{
+        "op": "edit", "category": old_category, "title": old_title,
+        "new_category": new_category, "item": updated_item
+    }])
+    if not result["success"]:
+        return jsonify({"error": result["results"][0]["error"]}), 409
     
     return jsonify({"success": True, "message": "项目已更新"})
 
@@ -202,37 +231,303 @@ def handle_move_item():
     return jsonify({"success": True, "message": "项目顺序已更新"})
 
 
+@app.route("/config/batch", methods=["POST"])
+@error_handler
+def config_batch():
+    """
+    批量配置操作 - 一次加锁、一次原子写入执行多个操作
+    
+    请求体: {"operations": [操作, ...], "atomic": true}
+    操作格式见 config_operations 模块；add/edit 操作的 item 未提供 icon 时
+    分别使用默认图标和原项目图标。
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("operations"), list):
+        return jsonify({"error": "请求体必须包含 operations 列表"}), 400
+    
+    operations = data["operations"]
+    if not operations:
+        return jsonify({"error": "操作列表不能为空"}), 400
+    
+    # 先验证全部操作，任何格式错误都不执行
+    results = []
+    for op in operations:
+        validation = validate_operation(op)
+        results.append({"success": validation["valid"],
+                        "error": format_error_message(validation["errors"])})
+    if not all(result["success"] for result in results):
+        return jsonify({"success": False, "results": results}), 400
+    
+    operations = [normalize_batch_operation(op) for op in operations]
+    result = config_manager.apply_operations(operations, atomic=bool(data.get("atomic", True)))
+    return jsonify(result), 200 if result["success"] else 409
+
+def normalize_batch_operation(op: dict) -> dict:
+    """整理批量操作中的项目字段，补全缺省的图标"""
+    if "item" not in op:
+        return op
+    
+    item = op["item"]
+    if item.get("icon"):
+        icon_data = {"icon": item["icon"]}
+        for field in ("icon_variants", "icon_original"):
+            if item.get(field):
+                icon_data[field] = item[field]
+    else:
+        original = None
+        if op.get("op") == "edit":
+            original = config_manager.find_item_in_category(op.get("category"), op.get("title"))
+        icon_data = icon_fields(original) if original else {"icon": "fas fa-link"}
+    
+    normalized = dict(op)
+    normalized["item"] = {"title": item["title"], "icon": icon_data["icon"],
+                          "url": item["url"], **icon_data}
+    return normalized
+
+
+def send_versioned(digest: str, body: bytes, encoded: dict, route: str,
+                   mimetype: str) -> Response:
+    """发送按配置版本生成的内容（?v= 与当前内容摘要一致时永久缓存）"""
+    response = not_modified(route, digest)
+    if response is None:
+        encoding = negotiate(request.headers.get("Accept-Encoding"), encoded)
+        if encoding is not None:
+            response = Response(encoded[encoding], mimetype=mimetype)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = Response(body, mimetype=mimetype)
+        if encoded:
+            response.vary.add("Accept-Encoding")
+        apply_validators(response, route, digest)
+    
+    if request.args.get("v") != digest:
+        # 旧页面引用的版本已被替换，返回当前内容但不长期缓存
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def send_versioned_css(bundle, route: str) -> Response:
+    """发送按配置版本生成的 CSS"""
+    return send_versioned(bundle.digest, bundle.css, bundle.encoded, route, "text/css")
+
+
+def compact_search_index():
+    """当前配置的紧凑搜索索引"""
+    level = app_config.compression_level if app_config.page_cache_gzip else 0
+    return config_manager.get_search_index().compact(level)
+
+
+@app.route("/icons.css")
+@error_handler
+def icon_bundle_css():
+    """合并图标 CSS"""
+    bundle = icon_bundler.get(config_manager.get_snapshot())
+    if bundle is None:
+        return Response("", mimetype="text/css")
+    return send_versioned_css(bundle, "icon_bundle")
+
+
+@app.route("/fa.css")
+@error_handler
+def fontawesome_css():
+    """Font Awesome 子集 CSS（未启用时重定向到完整的本地字体）"""
+    subset = fa_subsetter.get(config_manager.get_snapshot())
+    if subset is None:
+        return redirect(url_for("static", filename="vendor/fontawesome/css/all.min.css"))
+    return send_versioned_css(subset, "fontawesome")
+
+
+@app.route("/search-index.json")
+@error_handler
+def search_index_json():
+    """紧凑搜索索引（标题、拼音、首字母、主机名和图标），供浏览器端本地搜索"""
+    compact = compact_search_index()
+    return send_versioned(compact.digest, compact.data, compact.encoded, "search_index",
+                          "application/json")
+
+
+@app.route("/events")
+@error_handler
+def events():
+    """配置变化推送（Server-Sent Events），断线重连时按 Last-Event-ID 补发"""
+    if not change_feed.enabled:
+        # 204 使浏览器不再重连
+        return Response(status=204)
+    
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last")
+    disconnected = request.environ.get("waitress.client_disconnected") or (lambda: False)
+    response = Response(change_feed.subscribe(last_event_id, disconnected),
+                        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # 避免反向代理缓冲事件流
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/config/icons")
+@error_handler
+def icon_usage():
+    """图标存储的磁盘占用和引用统计"""
+    references = icon_references(config_manager.get_categories())
+    return jsonify(icon_store.usage(references))
+
+
+@app.route("/config/icons/gc", methods=["POST"])
+@error_handler
+def icon_gc():
+    """清除未被配置引用的图标文件（?dry_run=true 时只列出将被删除的文件）"""
+    dry_run = request.args.get("dry_run", "false").lower() == "true"
+    references = icon_references(config_manager.get_categories())
+    result = icon_store.collect_garbage(references, app_config.icon_gc_grace, dry_run)
+    if not dry_run:
+        icon_cache.invalidate(result["removed"])
+    return jsonify(result)
+
+
 @app.route('/search')
 @error_handler
 def search():
-    """搜索功能 - 支持中文、拼音和URL搜索"""
+    """搜索功能 - 支持中文、拼音、拼音首字母和URL主机名，按匹配程度排序"""
     search_term = request.args.get('term', '').strip()
     
     if not search_term:
         return jsonify([])
     
-    search_term_lower = search_term.lower()
+    limit = request.args.get('limit', type=int)
+    if limit is None or limit <= 0:
+        limit = app_config.search_limit
     
     try:
-        categories = config_manager.get_categories()
-        results = []
+        snapshot = config_manager.get_snapshot()
+        etag, last_modified = search_validators(search_term, snapshot, str(limit))
+        response = not_modified('search', etag, last_modified)
+        if response:
+            return response
         
-        for category in categories:
-            for item in category.get('items', []):
-                title = item.get('title', '')
-                url = item.get('url', '')
-                
-                # 生成拼音
-                title_pinyin = ''.join(lazy_pinyin(title)).lower()
-                
-                # 搜索匹配逻辑（移除冗余的正则匹配）
-                if (search_term_lower in title.lower() or 
-                    search_term_lower in url.lower() or 
-                    search_term_lower in title_pinyin):
-                    results.append(item)
-        
-        return jsonify(results)
+        # 使用预计算的搜索索引，查询时不再进行拼音转换
+        started = time.perf_counter()
+        index = config_manager.get_search_index()
+        current = index.version == snapshot.version
+        results = index.search(search_term, limit)
+        if metrics.enabled:
+            metrics.search_latency.observe(time.perf_counter() - started)
+            metrics.search_results.observe(len(results))
+        if not current:
+            # 索引正由其他线程重建，结果来自旧版本，不能附带当前版本的校验值
+            return jsonify(results)
+        return apply_validators(jsonify(results), 'search', etag, last_modified)
         
     except Exception as e:
         logger.error(f"搜索失败: {e}")
         return jsonify([])
+
+
+def collect_app_metrics():
+    """抓取 /metrics 时读取各缓存、配置管理器和变化推送的统计"""
+    families = []
+    
+    cache = config_manager.cache_stats()
+    icons = icon_cache.stats()
+    pages = page_cache.stats()
+    families.append(("homer_cache_requests_total", "counter", "缓存命中和未命中次数", [
+        ("", (("cache", name), ("result", result)), stats[key])
+        for name, stats in (("config", cache), ("icon", icons), ("page", pages))
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    ]))
+    families.append(("homer_cache_bytes", "gauge", "缓存占用的字节数", [
+        ("", (("cache", "icon"),), icons["bytes"]),
+        ("", (("cache", "page"),), pages["bytes"]),
+    ]))
+    families.append(counter("homer_icon_cache_evictions_total", "图标缓存淘汰次数",
+                            icons["evictions"]))
+    families.append(counter("homer_config_reloads_total", "从存储重新加载配置的次数",
+                            cache["reloads"]))
+    families.append(counter("homer_page_cache_stale_total", "渲染新版本期间返回上一版本页面的次数",
+                            pages["stale"]))
+    families.append(counter("homer_config_stale_reads_total", "写入或重新加载期间直接返回当前快照的读取次数",
+                            cache["stale"]))
+    families.append(gauge("homer_config_version", "当前配置版本号", config_manager.version))
+    
+    locks = config_manager.lock_stats()
+    families.append(summary("homer_config_lock_wait_seconds", "等待配置写锁的时间",
+                            locks["wait_seconds"], locks["acquisitions"]))
+    families.append(summary("homer_config_lock_hold_seconds", "持有配置写锁的时间",
+                            locks["hold_seconds"], locks["acquisitions"]))
+    families.append(gauge("homer_config_lock_wait_max_seconds", "单次等待配置写锁的最长时间",
+                          locks["max_wait_seconds"]))
+    families.append(gauge("homer_config_lock_hold_max_seconds", "单次持有配置写锁的最长时间",
+                          locks["max_hold_seconds"]))
+    
+    io = config_manager.io_stats()
+    storage = {"storage": io["storage"]}
+    families.append(summary("homer_config_load_seconds", "读取并解析配置的时间",
+                            io["load_seconds"], io["loads"]))
+    families.append(summary("homer_config_save_seconds", "序列化并写入配置的时间",
+                            io["save_seconds"], io["saves"]))
+    families.append(counter("homer_config_written_bytes_total", "写入配置文件和操作日志的字节数",
+                            io["bytes_written"], storage))
+    
+    flush = config_manager.flush_stats()
+    families.append(counter("homer_config_flushes_total", "配置写入次数", flush["flushes"]))
+    families.append(counter("homer_config_mutations_total", "已写入的配置修改数", flush["mutations"]))
+    families.append(gauge("homer_config_pending_mutations", "尚未写入的配置修改数", flush["pending"]))
+    
+    feed = change_feed.stats()
+    families.append(gauge("homer_events_subscribers", "/events 当前连接数", feed["subscribers"]))
+    families.append(counter("homer_events_published_total", "发布的配置变化事件数", feed["published"]))
+    families.append(counter("homer_events_rejected_total", "因连接数已满被拒绝的 /events 连接数",
+                            feed["rejected"]))
+    families.append(counter("homer_events_overflows_total", "/events 队列溢出次数", feed["overflows"]))
+    return families
+
+
+metrics.add_collector(collect_app_metrics)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus 格式的运行指标"""
+    if not metrics.enabled:
+        return Response(status=404)
+    response = Response(metrics.render(), mimetype="text/plain")
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def profiles_guard():
+    """剖析未启用或未设置 PROFILE_SECRET 时返回 404，密钥不匹配时返回 403，允许访问时返回 None"""
+    if not request_profiler.enabled or not request_profiler.secret:
+        return Response(status=404)
+    if not request_profiler.authorized():
+        return Response(status=403)
+    return None
+
+
+@app.route("/admin/profiles")
+def profiles():
+    """按路由累计的剖析结果文件列表"""
+    return profiles_guard() or jsonify({
+        "mode": request_profiler.mode,
+        "sample_rate": request_profiler.sample_rate,
+        "files": request_profiler.listing(),
+    })
+
+
+@app.route("/admin/profiles/<filename>")
+def profile_download(filename):
+    """下载剖析结果文件（.folded 折叠栈或 .prof pstats）"""
+    denied = profiles_guard()
+    if denied:
+        return denied
+    path = request_profiler.path(filename)
+    if path is None:
+        return Response(status=404)
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     max_age=0)
+
+
+@app.route("/admin/profiles/reset", methods=["POST"])
+def profiles_reset():
+    """清除剖析结果"""
+    return profiles_guard() or jsonify({"removed": request_profiler.reset()})
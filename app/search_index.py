@@ -0,0 +1,697 @@
+"""
+搜索索引模块 - 带排序的模糊搜索
+每个配置版本构建一次：预先计算标题、全拼、拼音首字母、URL 主机名和完整 URL，
+并在这些字段上建立三元组（trigram）倒排索引。查询时只做集合运算和少量字符串比较，
+按完全匹配、前缀、词首、子串和容错匹配打分，返回前 limit 个结果及高亮位置
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import re
+import threading
+from collections import Counter
+from operator import itemgetter
+from typing import Callable, Dict, Any, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import logging
+
+from pypinyin import lazy_pinyin
+
+from .compression import PREFERRED_ENCODINGS, compress
+
+logger = logging.getLogger(__name__)
+
+# 匹配类型得分
+SCORE_EXACT = 100
+SCORE_PREFIX = 80
+SCORE_WORD_PREFIX = 65
+SCORE_SUBSTRING = 50
+SCORE_FUZZY = 40
+# 字段得分权重，依次为标题、全拼、拼音首字母、URL 主机名、完整 URL（路径等，排在最后）
+FIELD_WEIGHTS = (1.0, 0.9, 0.85, 0.8, 0.6)
+# tag 中字段序号占用的位数
+FIELD_BITS = 3
+FIELD_MASK = (1 << FIELD_BITS) - 1
+# 条目顺序号 order = (分类序号 << ITEM_BITS) | 项目在分类中的序号，key 中顺序号占用的位数
+ITEM_BITS = 32
+ORDER_BITS = 56
+# 容错匹配要求的查询三元组命中比例和最少命中数
+FUZZY_THRESHOLD = 0.4
+FUZZY_MIN_SHARED = 3
+# 容错匹配的最短查询长度
+FUZZY_MIN_LENGTH = 4
+
+# 词：连续的字母、数字或汉字
+_WORD = re.compile(r'[^\W_]+')
+# 字段开头（前一两个字符）和完整字段的索引项标记
+_START = '\x02'
+_EXACT = '\x03'
+_EMPTY: FrozenSet[int] = frozenset()
+
+# 分组的候选：[(得分, [tag 集合, ...]), ...]
+Groups = List[Tuple[float, List[FrozenSet[int]]]]
+
+
+def _trigrams(word: str) -> Iterable[str]:
+    """词的三元组，词首补两个空格、词尾补一个空格（"ab" -> "  a", " ab", "ab "）"""
+    padded = f'  {word} '
+    return (padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _field_grams(text: str) -> Set[str]:
+    """字段的索引项"""
+    grams = {_START + text[:1], _START + text[:2], _EXACT + text}
+    for word in _WORD.findall(text):
+        grams.update(_trigrams(word))
+        if not word.isascii():
+            # 中文没有空格分词，另外索引单字和双字，支持从词中间开始的一两个字的查询
+            grams.update(word)
+            grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def _required_grams(words: List[str]) -> Set[str]:
+    """
+    子串匹配的字段必须包含的索引项
+
+    查询中第一个词可以从字段中某个词的中间开始，一两个字母的第一个词没有可用的索引项
+    （只有汉字索引了单字和双字）；其后的词前面是空格，一定位于词首，使用词首三元组。
+    """
+    grams = set()
+    for i, word in enumerate(words):
+        if len(word) >= 3:
+            grams.update(word[j:j + 3] for j in range(len(word) - 2))
+        elif not word.isascii():
+            grams.add(word)
+        elif i > 0:
+            grams.add(('  ' + word)[-3:])
+    return grams
+
+
+def _fuzzy_grams(words: List[str]) -> Set[str]:
+    """容错匹配使用的查询三元组"""
+    grams = set()
+    for word in words:
+        grams.update(_trigrams(word))
+    return grams
+
+
+def _host_of(url: str) -> str:
+    """获取 URL 的主机名（小写，去掉 www.）"""
+    try:
+        host = urlsplit(url).hostname or ''
+    except ValueError:
+        host = ''
+    if not host:
+        host = url.split('//', 1)[-1].split('/', 1)[0].lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _merge_spans(positions: Iterable[int]) -> List[List[int]]:
+    """将字符位置合并为 [起始, 结束) 区间列表"""
+    spans = []
+    for pos in sorted(set(positions)):
+        if spans and spans[-1][1] == pos:
+            spans[-1][1] = pos + 1
+        else:
+            spans.append([pos, pos + 1])
+    return spans
+
+
+class SearchEntry:
+    """
+    单个项目的搜索条目
+
+    fields 依次为小写标题、全拼、拼音首字母、URL 主机名和小写的完整 URL（顺序与 FIELD_WEIGHTS 一致）。
+    pinyin_map / initials_map 记录全拼和首字母中每个字符对应的标题字符位置，
+    用于把拼音匹配的高亮映射回标题。
+
+    key 由标题长度和顺序号组成，倒排索引中保存 tag = (key << FIELD_BITS) + 字段序号，
+    整数大小即得分相同时的排列顺序（标题较短的在前，其次按配置顺序）。
+    顺序号由分类序号和项目位置得到，增量修改时编辑的项目沿用原顺序号、添加的项目排在分类末尾，
+    与完整重建的顺序一致。
+    """
+
+    __slots__ = ('key', 'order', 'item', 'title', 'fields', 'host_offset', 'pinyin_map',
+                 'initials_map')
+
+    def __init__(self, order: int, item: Dict[str, Any], title: str,
+                 pinyin: Tuple[str, Tuple[int, ...]], initials: Tuple[str, Tuple[int, ...]]):
+        self.order = order
+        self.key = (min(len(title), 255) << ORDER_BITS) | order
+        self.item = item
+        self.title = title
+        url = item.get('url', '')
+        host = _host_of(url)
+        self.fields = (title, pinyin[0], initials[0], host, url.lower())
+        self.pinyin_map = pinyin[1]
+        self.initials_map = initials[1]
+        self.host_offset = max(url.lower().find(host), 0)
+
+    def indexed_fields(self) -> Iterator[int]:
+        """需要索引的字段序号：跳过空字段和与前面字段相同的字段（如英文标题的全拼）"""
+        for i, text in enumerate(self.fields):
+            if text and text not in self.fields[:i]:
+                yield i
+
+    def postings(self) -> Iterator[Tuple[str, int]]:
+        """
+        条目的索引项
+
+        Yields:
+            (字段序号 + 索引项, tag)
+        """
+        for i in self.indexed_fields():
+            text = self.fields[i]
+            tag = (self.key << FIELD_BITS) + i
+            for gram in _field_grams(text):
+                yield f'{i}{gram}', tag
+
+    def score(self, field: int, query: str) -> Optional[Tuple[float, int]]:
+        """
+        字段的子串匹配得分
+
+        Returns:
+            (得分, 匹配起始位置)，字段不包含查询词时返回 None
+        """
+        text = self.fields[field]
+        start = text.find(query)
+        if start < 0:
+            return None
+        if len(text) == len(query):
+            score = SCORE_EXACT
+        elif start == 0:
+            score = SCORE_PREFIX
+        else:
+            # 优先使用位于词首的出现位置
+            score = SCORE_SUBSTRING
+            pos = start
+            while pos >= 0:
+                if not text[pos - 1].isalnum():
+                    score, start = SCORE_WORD_PREFIX, pos
+                    break
+                pos = text.find(query, pos + 1)
+        return score * FIELD_WEIGHTS[field], start
+
+    def fuzzy_positions(self, field: int, grams: Set[str]) -> List[int]:
+        """容错匹配时字段中被查询三元组覆盖的字符位置"""
+        positions = []
+        for word in _WORD.finditer(self.fields[field]):
+            padded = f'  {word.group()} '
+            for i in range(len(padded) - 2):
+                if padded[i:i + 3] in grams:
+                    positions.extend(pos for pos in range(word.start() + i - 2, word.start() + i + 1)
+                                     if word.start() <= pos < word.end())
+        return positions
+
+    def highlight(self, field: int, positions: Iterable[int]) -> Dict[str, Any]:
+        """将字段中的字符位置转换为标题或 URL 中的高亮区间"""
+        if field == 4:
+            return {"field": "url", "spans": _merge_spans(positions)}
+        if field == 3:
+            return {"field": "url",
+                    "spans": _merge_spans(self.host_offset + pos for pos in positions)}
+        if field == 1:
+            positions = (self.pinyin_map[pos] for pos in positions)
+        elif field == 2:
+            positions = (self.initials_map[pos] for pos in positions)
+        return {"field": "title", "spans": _merge_spans(positions)}
+
+
+class CompactIndex:
+    """
+    某个索引版本的紧凑导出，供浏览器端加载一次后在本地搜索
+
+    data 为 JSON：{"version", "categories": [分类名, ...], "items": [[分类序号, 标题, URL,
+    图标, 全拼, 首字母, 主机名, 多分辨率图标], ...]}，全拼与小写标题相同时为空字符串。
+
+    Attributes:
+        version: 配置版本号
+        data: JSON 内容
+        encoded: 内容编码 -> 压缩后的 JSON（未启用压缩时为空）
+        digest: 内容摘要，用于 URL 和 ETag
+    """
+
+    __slots__ = ('version', 'data', 'encoded', 'digest')
+
+    def __init__(self, version: int, data: bytes, encoded: Optional[Dict[str, bytes]] = None):
+        self.version = version
+        self.data = data
+        self.encoded = encoded or {}
+        self.digest = hashlib.sha1(data).hexdigest()[:16]
+
+
+class _IndexState:
+    """索引内容，发布后不再修改（compact 为延迟生成的导出），查询无需加锁"""
+
+    __slots__ = ('categories', 'entries', 'postings', 'version', 'compact', '_field_tags')
+
+    def __init__(self, categories: Tuple[Tuple[str, Tuple[SearchEntry, ...]], ...],
+                 postings: Dict[str, FrozenSet[int]], version: int):
+        self.categories = categories
+        self.postings = postings
+        self.version = version
+        self.compact: Optional[CompactIndex] = None
+        self.entries: Dict[int, SearchEntry] = {
+            entry.key: entry for _, entries in categories for entry in entries
+        }
+        # 字段序号 -> 该字段全部条目的 tag 集合（延迟生成）
+        self._field_tags: Dict[int, FrozenSet[int]] = {}
+
+    def field_tags(self, field: int) -> FrozenSet[int]:
+        """字段的全部 tag，查询没有可用的索引项时作为候选（并发时可能重复生成，结果相同）"""
+        tags = self._field_tags.get(field)
+        if tags is None:
+            tags = frozenset((key << FIELD_BITS) + field for key, entry in self.entries.items()
+                             if field in entry.indexed_fields())
+            self._field_tags[field] = tags
+        return tags
+
+
+class SearchIndex:
+    """
+    项目搜索索引
+
+    每个条目保存小写标题、全拼、拼音首字母（如"豆包" -> "db"，"Google Drive" -> "gd"）
+    、URL 主机名和完整 URL，倒排索引按字段保存 三元组 -> tag 集合，另外索引每个字段的开头和完整内容。
+
+    查询长度不少于 3 时用三元组求交得到候选；以一两个字母开头或没有字母和数字的查询
+    （如 "/"）没有可用的三元组，候选为字段的全部条目（逐个确认，与不使用索引的子串匹配结果相同）。
+    候选用集合运算按 字段 x 匹配类型 分为若干组，组的得分是组内条目得分的上限，
+    按上限从高到低确认候选，确认后的实际得分不低于之后各组的上限时才确定选取，
+    因此结果与逐个比较所有候选后取前 limit 个相同。
+    子串匹配不足 limit 个时再按三元组命中比例进行容错匹配，只用于补足剩余的结果数
+    （子串匹配已够 limit 个时，不会因容错匹配得分更高而替换得分较低的子串匹配结果）。
+
+    修改时生成新的索引内容并整体替换（写时复制），查询无需加锁；
+    完整重建在锁外进行，只有替换和增量修改需要加锁。
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        self.version = -1
+        self._state = _IndexState((), {}, -1)
+        # 标题 -> (全拼, 首字母)，避免重复转换相同标题
+        self._pinyin_cache: Dict[str, Tuple[Tuple[str, Tuple[int, ...]],
+                                            Tuple[str, Tuple[int, ...]]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _convert(title: str) -> Tuple[Tuple[str, Tuple[int, ...]], Tuple[str, Tuple[int, ...]]]:
+        """
+        将标题转换为全拼和首字母
+
+        汉字转换为拼音，其余文本原样保留（首字母取每个词的第一个字符）。
+
+        Returns:
+            ((全拼, 位置映射), (首字母, 位置映射))
+        """
+        pinyin, pinyin_map = [], []
+        initials, initials_map = [], []
+        pos = 0
+        for segment in lazy_pinyin(title):
+            if title.startswith(segment, pos):
+                # 非汉字片段，原样保留
+                pinyin.append(segment)
+                pinyin_map.extend(range(pos, pos + len(segment)))
+                for match in _WORD.finditer(segment):
+                    initials.append(match.group()[0])
+                    initials_map.append(pos + match.start())
+                pos += len(segment)
+            else:
+                pinyin.append(segment)
+                pinyin_map.extend([pos] * len(segment))
+                initials.append(segment[:1])
+                initials_map.append(pos)
+                pos += 1
+        return (''.join(pinyin).lower(), tuple(pinyin_map)), \
+            (''.join(initials).lower(), tuple(initials_map))
+
+    def _pinyin_of(self, title: str):
+        """获取标题的全拼和首字母（带缓存）"""
+        cached = self._pinyin_cache.get(title)
+        if cached is None:
+            cached = self._convert(title)
+            self._pinyin_cache[title] = cached
+        return cached
+
+    def _make_entry(self, item: Dict[str, Any], order: int) -> SearchEntry:
+        """为项目创建搜索条目"""
+        title = item.get('title', '')
+        pinyin, initials = self._pinyin_of(title)
+        return SearchEntry(order, item, title.lower(), pinyin, initials)
+
+    def build(self, categories: list, version: int) -> None:
+        """
+        根据分类列表完整重建索引
+
+        构建时不持有锁（可与查询和增量修改并行），完成后只在索引仍旧于 version 时替换，
+        不会用旧版本覆盖并行期间已更新的索引。
+
+        Args:
+            categories: 配置中的分类列表
+            version: 对应的配置版本号
+        """
+        titles = set()
+        built = []
+        postings: Dict[str, Any] = {}
+        for category_index, category in enumerate(categories):
+            entries = []
+            for position, item in enumerate(category.get('items', [])):
+                entry = self._make_entry(item, (category_index << ITEM_BITS) | position)
+                entries.append(entry)
+                titles.add(item.get('title', ''))
+                for gram, tag in entry.postings():
+                    postings.setdefault(gram, []).append(tag)
+            built.append((category.get('name'), tuple(entries)))
+        state = _IndexState(tuple(built),
+                            {gram: frozenset(tags) for gram, tags in postings.items()},
+                            version)
+
+        with self._lock:
+            if self.version >= version:
+                return
+            # 清理已不存在标题的拼音缓存
+            self._pinyin_cache = {title: value for title, value in self._pinyin_cache.items()
+                                  if title in titles}
+            self._state = state
+            self.version = version
+
+        logger.debug(f"搜索索引已重建: 版本 {version}, 分类数 {len(built)}, "
+                     f"索引项 {len(postings)}")
+
+    def _replace_category(self, category_name: str, func, version: int) -> bool:
+        """
+        对第一个匹配的分类条目应用 func(分类序号, 条目列表) 并替换，返回是否找到分类（需持有 _lock）
+        """
+        state = self._state
+        categories = list(state.categories)
+        for i, (name, entries) in enumerate(categories):
+            if name == category_name:
+                new_entries = tuple(func(i, list(entries)))
+                categories[i] = (name, new_entries)
+                break
+        else:
+            self._state = _IndexState(state.categories, state.postings, version)
+            return False
+
+        # 只修改变化的条目涉及的倒排列表（编辑后的条目可能与原条目 key 相同，按对象比较）
+        old_ids = {id(entry) for entry in entries}
+        new_ids = {id(entry) for entry in new_entries}
+        postings = dict(state.postings)
+        for entry in entries:
+            if id(entry) not in new_ids:
+                for gram, tag in entry.postings():
+                    tags = postings[gram] - {tag}
+                    if tags:
+                        postings[gram] = tags
+                    else:
+                        del postings[gram]
+        for entry in new_entries:
+            if id(entry) not in old_ids:
+                for gram, tag in entry.postings():
+                    postings[gram] = postings.get(gram, _EMPTY) | {tag}
+
+        self._state = _IndexState(tuple(categories), postings, version)
+        return True
+
+    def _add(self, category_name: str, item: Dict[str, Any], version: int) -> None:
+        def append(category_index, entries):
+            # 删除留下的空位不影响顺序，添加的项目排在分类中已有条目之后
+            order = entries[-1].order + 1 if entries else category_index << ITEM_BITS
+            return entries + [self._make_entry(item, order)]
+
+        self._replace_category(category_name, append, version)
+
+    def _update(self, category_name: str, old_title: str, item: Dict[str, Any],
+                version: int) -> None:
+        def replace(category_index, entries):
+            for i, entry in enumerate(entries):
+                if entry.item.get('title') == old_title:
+                    entries[i] = self._make_entry(item, entry.order)
+                    break
+            return entries
+
+        self._replace_category(category_name, replace, version)
+
+    def _remove(self, category_name: str, item_title: str, version: int) -> None:
+        self._replace_category(
+            category_name,
+            lambda category_index, entries: [e for e in entries
+                                             if e.item.get('title') != item_title],
+            version
+        )
+
+    def apply(self, base_version: int, version: int,
+              changes: List[Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]]) -> bool:
+        """
+        索引仍对应 base_version 时按顺序应用一组增量修改
+
+        检查版本和修改在同一次加锁中完成，不会与并行的完整重建交错。
+
+        Args:
+            base_version: 修改前的配置版本号
+            version: 修改后的配置版本号
+            changes: [("add" / "edit" / "delete", 分类名称, 原标题, 项目), ...]
+
+        Returns:
+            是否已应用；索引已是其他版本时不修改，由下次搜索完整重建
+        """
+        with self._lock:
+            if self.version != base_version:
+                return False
+            for kind, category_name, title, item in changes:
+                if kind == 'add':
+                    self._add(category_name, item, version)
+                elif kind == 'edit':
+                    self._update(category_name, title, item, version)
+                else:
+                    self._remove(category_name, title, version)
+            self.version = version
+            return True
+
+    def compact(self, compression_level: int = 0) -> CompactIndex:
+        """
+        获取当前索引的紧凑导出（每个索引版本只生成一次）
+
+        Args:
+            compression_level: 压缩级别，为 0 时不保存压缩版本
+        """
+        state = self._state
+        compact = state.compact
+        if compact is None:
+            names = []
+            items = []
+            for i, (name, entries) in enumerate(state.categories):
+                names.append(name)
+                for entry in entries:
+                    title, pinyin, initials, host, _ = entry.fields
+                    item = entry.item
+                    variants = item.get('icon_variants')
+                    items.append([i, item.get('title', ''), item.get('url', ''),
+                                  item.get('icon', ''), '' if pinyin == title else pinyin,
+                                  initials, host, dict(variants) if variants else None])
+            data = json.dumps({"version": state.version, "categories": names, "items": items},
+                              ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+            encoded = {}
+            if compression_level:
+                for encoding in PREFERRED_ENCODINGS:
+                    encoded[encoding] = compress(data, encoding, compression_level)
+            compact = CompactIndex(state.version, data, encoded)
+            # 并发时可能重复生成，结果相同
+            state.compact = compact
+            logger.debug(f"紧凑搜索索引已生成: 版本 {state.version}, {len(items)} 个项目, "
+                         f"{len(data)} 字节")
+        return compact
+
+    def search(self, term: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        搜索项目
+
+        Args:
+            term: 搜索词
+            limit: 最多返回的结果数
+
+        Returns:
+            按得分从高到低排列的结果列表，每个结果是项目字段加上
+            "score" 和 "highlight" {"field": "title" | "url", "spans": [[起始, 结束), ...]}
+        """
+        query = ' '.join(term.lower().split())
+        words = _WORD.findall(query)
+        if not query or limit <= 0:
+            return []
+
+        state = self._state
+        # 条目 key -> (得分, tag, 子串匹配起始位置；容错匹配时为 None)
+        picked: Dict[int, Tuple[float, int, Optional[int]]] = {}
+
+        def verify(tag: int) -> Optional[Tuple[float, int]]:
+            # 三元组候选需要确认确实包含查询词，并得到实际的得分和位置
+            return state.entries[tag >> FIELD_BITS].score(tag & FIELD_MASK, query)
+
+        self._pick(picked, self._substring_groups(state, query, words), limit, verify)
+
+        grams = None
+        if words and len(picked) < limit and len(query) >= FUZZY_MIN_LENGTH:
+            grams = _fuzzy_grams(words)
+            self._pick(picked, self._fuzzy_groups(state, grams, limit + len(picked)), limit)
+
+        results = []
+        for score, tag, start in picked.values():
+            entry = state.entries[tag >> FIELD_BITS]
+            field = tag & FIELD_MASK
+            if start is None:
+                positions = entry.fuzzy_positions(field, grams)
+            else:
+                positions = range(start, start + len(query))
+            results.append((-score, entry.key, entry, entry.highlight(field, positions)))
+
+        results.sort(key=lambda result: result[:2])
+        return [dict(entry.item, score=round(-score, 1), highlight=highlight)
+                for score, _, entry, highlight in results]
+
+    @staticmethod
+    def _intersect(state: _IndexState, keys: Iterable[str]) -> FrozenSet[int]:
+        """包含全部索引项的 tag 集合（从最短的倒排列表开始求交）"""
+        postings = []
+        for key in keys:
+            tags = state.postings.get(key)
+            if not tags:
+                return _EMPTY
+            postings.append(tags)
+        postings.sort(key=len)
+        result = postings[0]
+        for tags in postings[1:]:
+            result = result & tags
+            if not result:
+                break
+        return result
+
+    def _substring_groups(self, state: _IndexState, query: str, words: List[str]) -> Groups:
+        """按 字段 x 匹配类型 划分子串匹配的候选，按得分从高到低排列"""
+        required = _required_grams(words)
+        if words:
+            first = words[0]
+            word_start = ' ' + first[:2] if len(first) >= 2 else '  ' + first
+        else:
+            # 查询中没有字母或数字（如 "/"、"++"）：候选为字段的全部条目，
+            # 无法用索引区分词首匹配，其余候选的得分上限为词首匹配
+            word_start = None
+        groups: Dict[float, List[FrozenSet[int]]] = {}
+        for field, weight in enumerate(FIELD_WEIGHTS):
+            if required:
+                candidates = self._intersect(state, (f'{field}{gram}' for gram in required))
+            else:
+                candidates = state.field_tags(field)
+            if not candidates:
+                continue
+            exact = candidates & state.postings.get(f'{field}{_EXACT}{query}', _EMPTY)
+            prefix = (candidates & state.postings.get(f'{field}{_START}{query[:2]}', _EMPTY)) - exact
+            if word_start is None:
+                word_prefix = _EMPTY
+                rest = SCORE_WORD_PREFIX
+            else:
+                word_prefix = (candidates & state.postings.get(f'{field}{word_start}', _EMPTY)) \
+                    - exact - prefix
+                rest = SCORE_SUBSTRING
+            substring = candidates - exact - prefix - word_prefix
+            for score, tags in ((SCORE_EXACT, exact), (SCORE_PREFIX, prefix),
+                                (SCORE_WORD_PREFIX, word_prefix), (rest, substring)):
+                if tags:
+                    groups.setdefault(score * weight, []).append(tags)
+        return sorted(groups.items(), reverse=True)
+
+    @staticmethod
+    def _fuzzy_groups(state: _IndexState, grams: Set[str], count: int) -> Groups:
+        """
+        按查询三元组命中数划分容错匹配的候选，按得分从高到低排列
+
+        命中数不少于 required 的字段一定出现在最短的 len(grams) - required + 1 个
+        倒排列表中，只统计这些候选的命中数；每个字段只保留命中数最多的 count 个。
+        """
+        required = max(math.ceil(len(grams) * FUZZY_THRESHOLD), FUZZY_MIN_SHARED)
+        if required > len(grams):
+            return []
+
+        groups: Dict[float, Set[int]] = {}
+        scale = SCORE_FUZZY / len(grams)
+        for field, weight in enumerate(FIELD_WEIGHTS):
+            postings = sorted((state.postings.get(f'{field}{gram}', _EMPTY) for gram in grams),
+                              key=len)
+            candidates = _EMPTY.union(*postings[:len(grams) - required + 1])
+            if not candidates:
+                continue
+            counts = Counter()
+            for tags in postings:
+                if tags:
+                    counts.update(candidates & tags)
+            # 命中数从多到少，相同时按 tag 从小到大（排序是稳定的）
+            ranked = sorted(sorted(counts.items()), key=itemgetter(1), reverse=True)
+            for tag, shared in ranked[:count]:
+                if shared < required:
+                    break
+                groups.setdefault(shared * scale * weight, set()).add(tag)
+        return sorted(((score, [tags]) for score, tags in groups.items()), reverse=True)
+
+    @staticmethod
+    def _pick(picked: Dict[int, Tuple[float, int, Optional[int]]], groups: Groups, limit: int,
+              verify: Optional[Callable[[int], Optional[Tuple[float, int]]]] = None) -> None:
+        """
+        按得分从高到低从各组中选取结果，得分相同时按 tag 大小（标题长度、配置顺序）排列
+
+        组的得分是组内条目得分的上限，确认后的实际得分可能更低：这些条目先放入待选堆，
+        直到之后的组的上限低于其实际得分时才选取，不会占用得分更高的条目的位置。
+
+        Args:
+            picked: 已选取的结果，条目 key -> (得分, tag, 匹配起始位置)
+            groups: 分组的候选，按得分上限从高到低排列
+            limit: 结果数上限
+            verify: 子串匹配的确认函数，返回 (实际得分, 起始位置)，不匹配时返回 None；
+                    为 None 时为容错匹配（组的得分即实际得分）
+        """
+        # 已确认、尚未选取的候选：(-实际得分, tag, 起始位置)
+        pending: List[Tuple[float, int, Optional[int]]] = []
+
+        def take(bound: float, inclusive: bool) -> None:
+            # 选取实际得分高于（或等于）bound 的候选
+            while pending and len(picked) < limit:
+                score = -pending[0][0]
+                if score < bound or (score == bound and not inclusive):
+                    return
+                _, tag, start = heapq.heappop(pending)
+                picked.setdefault(tag >> FIELD_BITS, (score, tag, start))
+
+        for bound, tag_sets in groups:
+            # 与本组得分相同的候选需要和本组一起按 tag 排序
+            take(bound, inclusive=False)
+            need = limit - len(picked)
+            if need <= 0:
+                return
+            # 每个条目在每个集合中最多出现一次，没有被确认排除的候选时，取这么多个一定能选够
+            count = (need + len(picked)) * len(tag_sets)
+            seen = 0
+            found: Set[int] = set()
+            while len(found) < need:
+                tags = heapq.nsmallest(count, itertools.chain.from_iterable(tag_sets))
+                for tag in tags[seen:]:
+                    key = tag >> FIELD_BITS
+                    if key in picked or key in found:
+                        continue
+                    matched = (bound, None) if verify is None else verify(tag)
+                    if matched is None:
+                        continue
+                    heapq.heappush(pending, (-matched[0], tag, matched[1]))
+                    if matched[0] >= bound:
+                        # 本组中按 tag 顺序达到上限的候选已够，之后的不会排在它们前面
+                        found.add(key)
+                        if len(found) == need:
+                            break
+                if len(tags) < count:
+                    break
+                seen = len(tags)
+                count *= 2
+            take(bound, inclusive=True)
+        take(float('-inf'), inclusive=True)
@@ -101,8 +101,11 @@ function attachVisitTracking() {
         let icon = 'fas fa-link'; // 默认图标
         const $icon = $this.find('i');
         const $img = $this.find('img');
+        const $bundled = $this.find('[data-icon]');
         
-        if ($icon.length) {
+        if ($bundled.length) {
+            icon = $bundled.attr('data-icon');
+        } else if ($icon.length) {
             icon = $icon.attr('class');
         } else if ($img.length) {
             icon = $img.attr('src').replace('/config/', '');
@@ -112,6 +115,272 @@ function attachVisitTracking() {
     });
 }
 
+// 浏览器端搜索：加载一次紧凑索引（/search-index.json），按与服务端 /search 相同的规则
+// 在本地打分排序；索引未加载或加载失败时输入停顿后再请求 /search
+const SEARCH_LIMIT = 50;
+const SEARCH_DEBOUNCE_MS = 150;
+// 字段得分权重，依次为标题、全拼、拼音首字母、URL 主机名、完整 URL
+const SEARCH_FIELD_WEIGHTS = [1.0, 0.9, 0.85, 0.8, 0.6];
+const SEARCH_WORD = /[\p{L}\p{N}]+/gu;
+const SEARCH_ALNUM = /[\p{L}\p{N}]/u;
+let searchIndex = null;
+
+// 加载紧凑搜索索引
+function loadSearchIndex(url, onLoad) {
+    $.ajax({
+        url: url,
+        method: 'GET',
+        dataType: 'json',
+        success: function(data) {
+            searchIndex = data.items.map(function(row, order) {
+                const title = row[1].toLowerCase();
+                return {
+                    item: { title: row[1], url: row[2], icon: row[3], icon_variants: row[7] },
+                    fields: [title, row[4] || title, row[5], row[6], row[2].toLowerCase()],
+                    order: order,
+                    grams: null
+                };
+            });
+            onLoad();
+        },
+        error: function() {
+            console.warn('无法加载搜索索引，使用服务端搜索');
+        }
+    });
+}
+
+// 词的三元组，词首补两个空格、词尾补一个空格
+function searchTrigrams(words) {
+    const grams = new Set();
+    words.forEach(function(word) {
+        const padded = '  ' + word + ' ';
+        for (let i = 0; i + 3 <= padded.length; i++) {
+            grams.add(padded.slice(i, i + 3));
+        }
+    });
+    return grams;
+}
+
+// 字段的子串匹配得分（完全匹配、前缀、词首、子串），不匹配时返回 0
+function substringScore(text, query) {
+    let start = text.indexOf(query);
+    if (start < 0) return 0;
+    if (text.length === query.length) return 100;
+    if (start === 0) return 80;
+    while (start >= 0) {
+        if (!SEARCH_ALNUM.test(text[start - 1])) return 65;
+        start = text.indexOf(query, start + 1);
+    }
+    return 50;
+}
+
+// 在本地索引中搜索，返回按得分从高到低排列的前 limit 个项目
+function searchLocally(term, limit) {
+    const query = term.toLowerCase().split(/\s+/).filter(Boolean).join(' ');
+    const words = query.match(SEARCH_WORD) || [];
+    if (!query) return [];
+
+    let matches = [];
+    searchIndex.forEach(function(entry) {
+        let best = 0;
+        entry.fields.forEach(function(text, field) {
+            if (text) {
+                best = Math.max(best, substringScore(text, query) * SEARCH_FIELD_WEIGHTS[field]);
+            }
+        });
+        if (best > 0) matches.push({ entry: entry, score: best });
+    });
+
+    // 得分相同时标题较短的在前，其次按配置顺序
+    function byScore(a, b) {
+        return (b.score - a.score) ||
+            (a.entry.item.title.length - b.entry.item.title.length) ||
+            (a.entry.order - b.entry.order);
+    }
+    matches.sort(byScore);
+    matches = matches.slice(0, limit);
+
+    // 子串匹配不足 limit 个时按三元组命中比例进行容错匹配，只用于补足剩余的结果数，
+    // 选出后与子串匹配的结果一起按得分排列
+    if (matches.length < limit && query.length >= 4) {
+        const grams = searchTrigrams(words);
+        const required = Math.max(Math.ceil(grams.size * 0.4), 3);
+        const scale = 40 / grams.size;
+        const matched = new Set(matches.map(function(match) { return match.entry; }));
+        const fuzzy = [];
+        if (required <= grams.size) {
+            searchIndex.forEach(function(entry) {
+                if (matched.has(entry)) return;
+                if (!entry.grams) {
+                    entry.grams = entry.fields.map(function(text) {
+                        return searchTrigrams(text.match(SEARCH_WORD) || []);
+                    });
+                }
+                let best = 0;
+                entry.grams.forEach(function(fieldGrams, field) {
+                    let shared = 0;
+                    grams.forEach(function(gram) {
+                        if (fieldGrams.has(gram)) shared++;
+                    });
+                    if (shared >= required) {
+                        best = Math.max(best, shared * scale * SEARCH_FIELD_WEIGHTS[field]);
+                    }
+                });
+                if (best > 0) fuzzy.push({ entry: entry, score: best });
+            });
+        }
+        fuzzy.sort(byScore);
+        matches = matches.concat(fuzzy.slice(0, limit - matches.length)).sort(byScore);
+    }
+
+    return matches.map(function(match) { return match.entry.item; });
+}
+
+// 配置变化推送：订阅 /events，按与服务端相同的操作规则增量更新页面；
+// 无法增量更新（整体保存、外部修改、错过事件或页面中找不到对应分类）时重新加载页面
+function connectChangeFeed() {
+    const script = document.querySelector('script[data-events]');
+    if (!script || !window.EventSource) return;
+
+    const source = new EventSource(script.dataset.events);
+    source.addEventListener('change', function(e) {
+        const change = JSON.parse(e.data);
+        const applied = !change.reload && change.ops.every(applyConfigChange);
+        if (!applied) {
+            source.close();
+            window.location.reload();
+            return;
+        }
+        // 重新加载搜索索引（不带摘要的地址每次校验）
+        if (searchIndex) {
+            loadSearchIndex('/search-index.json', function() {});
+        }
+    });
+}
+
+// 查找分类对应的网格
+function findCategoryGrid(category) {
+    return $('#original-content .nav-grid').filter(function() {
+        return $(this).prev('h2').text() === category;
+    }).first();
+}
+
+// 查找网格中指定标题的卡片
+function findNavItems($grid, title) {
+    return $grid.children('.nav-item').not('.add-item').filter(function() {
+        return $(this).attr('data-title') === title;
+    });
+}
+
+// 创建项目卡片（与主页模板一致）
+function createNavItem(item, category) {
+    const icon = item.icon || '';
+    const $item = $('<a>')
+        .attr('href', item.url)
+        .addClass('nav-item')
+        .attr('data-category', category)
+        .attr('data-title', item.title);
+    if (icon.startsWith('fas ') || icon.startsWith('fab ')) {
+        $item.append($('<i>').addClass(icon));
+    } else {
+        $item.append(createIconImage(item));
+    }
+    $item.append($('<span>').text(item.title));
+    $item.append($('<div class="nav-item-controls" style="display:none;"></div>'));
+    return $item;
+}
+
+// 将卡片放到网格末尾（“新增”按钮之前）
+function appendNavItem($grid, $item) {
+    const $addBtn = $grid.children('.add-item');
+    if ($addBtn.length) {
+        $item.insertBefore($addBtn);
+    } else {
+        $grid.append($item);
+    }
+}
+
+// 在页面上执行一个配置操作，无法执行时返回 false
+function applyConfigChange(op) {
+    const $grid = findCategoryGrid(op.category);
+    if (!$grid.length) return false;
+
+    if (op.op === 'add') {
+        // 本页面新增时已先显示了一个临时卡片
+        const $pending = $grid.children('.nav-item[data-pending]').filter(function() {
+            return $(this).attr('data-title') === op.item.title;
+        }).first();
+        const $item = createNavItem(op.item, op.category);
+        if ($pending.length) {
+            $pending.replaceWith($item);
+        } else {
+            appendNavItem($grid, $item);
+        }
+        return true;
+    }
+
+    if (op.op === 'edit' || op.op === 'move_between') {
+        const target = op.new_category || op.category;
+        const $target = findCategoryGrid(target);
+        if (!$target.length) return false;
+        let $item = findNavItems($grid, op.title).first();
+        if (!$item.length && op.item) {
+            // 本页面编辑时已先更新了卡片
+            $item = findNavItems($target, op.item.title).first();
+        }
+        if (!$item.length) return false;
+        if (op.item) {
+            const $updated = createNavItem(op.item, target);
+            $item.replaceWith($updated);
+            $item = $updated;
+        }
+        if (target !== op.category) {
+            $item.attr('data-category', target);
+            appendNavItem($target, $item);
+        }
+        return true;
+    }
+
+    if (op.op === 'delete') {
+        findNavItems($grid, op.title).remove();
+        return true;
+    }
+
+    if (op.op === 'move') {
+        const $item = findNavItems($grid, op.title).first();
+        if (!$item.length) return false;
+        if (op.direction === 'up') {
+            $item.insertBefore($item.prevAll('.nav-item').first());
+        } else {
+            $item.insertAfter($item.nextAll('.nav-item').not('.add-item').first());
+        }
+        return true;
+    }
+
+    if (op.op === 'reorder') {
+        // 列表中的项目按顺序在前，其余项目保持相对顺序追加到末尾
+        const $items = $grid.children('.nav-item').not('.add-item');
+        const placed = new Set();
+        const ordered = [];
+        op.order.forEach(function(title) {
+            const item = $items.toArray().find(function(el) {
+                return !placed.has(el) && el.getAttribute('data-title') === title;
+            });
+            if (item) {
+                placed.add(item);
+                ordered.push(item);
+            }
+        });
+        $items.each(function() {
+            if (!placed.has(this)) ordered.push(this);
+        });
+        ordered.forEach(function(item) { appendNavItem($grid, $(item)); });
+        return true;
+    }
+
+    return false;
+}
+
 $(document).ready(function() {
     // 初始化访问统计
     initVisitStats();
@@ -122,23 +391,48 @@ $(document).ready(function() {
     // 添加访问跟踪
     attachVisitTracking();
     
+    let searchTimer = null;
+    let searchSeq = 0;
     $('#search-input').on('input', function() {
-        var searchTerm = $(this).val().toLowerCase();
+        var searchTerm = $(this).val().trim();
         
-        if (searchTerm.length > 0) {
-            $.ajax({
-                url: '/search',
-                method: 'GET',
-                data: { term: searchTerm },
-                success: function(response) {
-                    displaySearchResults(response);
-                }
-            });
-        } else {
+        clearTimeout(searchTimer);
+        // 使之前未返回的服务端搜索结果失效
+        searchSeq++;
+        if (searchTerm.length === 0) {
             $('#search-results').hide();
             $('#original-content').show();
+        } else if (searchIndex) {
+            displaySearchResults(searchLocally(searchTerm, SEARCH_LIMIT));
+        } else {
+            const seq = searchSeq;
+            searchTimer = setTimeout(function() {
+                $.ajax({
+                    url: '/search',
+                    method: 'GET',
+                    data: { term: searchTerm.toLowerCase() },
+                    success: function(response) {
+                        if (seq === searchSeq) {
+                            displaySearchResults(response);
+                        }
+                    }
+                });
+            }, SEARCH_DEBOUNCE_MS);
         }
     });
+    
+    // 页面未提供索引地址时使用服务端搜索
+    const searchScript = document.querySelector('script[data-search-index]');
+    if (searchScript) {
+        loadSearchIndex(searchScript.dataset.searchIndex, function() {
+            // 索引加载前已有输入时用本地索引重新搜索
+            if ($('#search-input').val().trim()) {
+                $('#search-input').trigger('input');
+            }
+        });
+    }
+    
+    connectChangeFeed();
 
     // Right-click context menu for nav items
     let $contextMenu = $('#context-menu');
@@ -225,6 +519,22 @@ $(document).ready(function() {
     });
 });
 
+// 创建图标图片，有多分辨率版本时设置 srcset
+function createIconImage(item) {
+    const $img = $('<img>')
+        .attr('src', '/config/' + item.icon)
+        .attr('alt', item.title)
+        .addClass('icon-img');
+    if (item.icon_variants) {
+        const srcset = Object.keys(item.icon_variants)
+            .sort(function(a, b) { return a - b; })
+            .map(function(width) { return '/config/' + item.icon_variants[width] + ' ' + width + 'w'; })
+            .join(', ');
+        $img.attr('srcset', srcset).attr('sizes', '52px');
+    }
+    return $img;
+}
+
 function displaySearchResults(results) {
     var $searchResults = $('#search-results');
     $searchResults.empty();
@@ -241,10 +551,7 @@ function displaySearchResults(results) {
             if (item.icon.startsWith('fas ') || item.icon.startsWith('fab ')) {
                 $item.append($('<i>').addClass(item.icon));
             } else {
-                $item.append($('<img>')
-                    .attr('src', '/config/' + item.icon)
-                    .attr('alt', item.title)
-                    .addClass('icon-img'));
+                $item.append(createIconImage(item));
             }
 
             $item.append($('<span>').text(item.title));
@@ -334,7 +641,8 @@ function openEditModal(initial, $targetItem, $gridForAdd) {
                         .attr('href', newUrl)
                         .addClass('nav-item')
                         .attr('data-category', newCategory)
-                        .attr('data-title', newTitle);
+                        .attr('data-title', newTitle)
+                        .attr('data-pending', '1');
                     $new.append(iconFile ? $('<img>').addClass('icon-img').attr('alt', newTitle).attr('src', URL.createObjectURL(iconFile))
                                           : $('<i>').addClass('fas fa-link'));
                     $new.append($('<span>').text(newTitle));
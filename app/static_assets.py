@@ -0,0 +1,222 @@
+"""
+静态资源模块 - 文件名指纹和预压缩版本
+启动时为 app/static 下的文件计算内容指纹（如 js/script.<hash>.js），url_for 生成带指纹的 URL，
+并在原文件旁生成 .gz / .br 压缩版本；带指纹的 URL 可以永久缓存
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from werkzeug.security import safe_join
+
+from .compression import PREFERRED_ENCODINGS, compress
+from .config import config as app_config
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+
+# 带指纹的文件名：名称.<10 位十六进制>.扩展名
+_FINGERPRINTED = re.compile(r'^(.+)\.([0-9a-f]{10})(\.[^./]+)$')
+# 值得预压缩的文件类型
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.ico', '.json', '.html', '.txt',
+                           '.map', '.ttf', '.otf', '.eot'}
+# 压缩版本扩展名 -> 内容编码
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _fingerprinted_name(filename: str, digest: str) -> str:
+    """在扩展名前插入指纹"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{digest}{ext}"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """原子写入文件"""
+    fd, temp_path = tempfile.mkstemp(prefix='.', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class StaticAssets:
+    """
+    静态资源清单
+
+    清单保存 原文件名 -> (指纹, 可用的压缩编码)。开发环境下每次生成 URL 时
+    按修改时间检查文件是否变化，生产环境只在启动时扫描一次。
+    """
+
+    def __init__(self, static_dir: Path, compression_level: int = 6,
+                 check_mtime: bool = False):
+        """
+        初始化静态资源清单
+
+        Args:
+            static_dir: 静态文件目录
+            compression_level: 压缩级别（1-9，brotli 按比例映射到 1-11）
+            check_mtime: 是否在访问时检查文件修改时间（开发环境使用）
+        """
+        self.static_dir = Path(static_dir)
+        self.compression_level = compression_level
+        self.check_mtime = check_mtime
+        # 文件名 -> (mtime_ns, 指纹, 可用的压缩编码)
+        self._manifest: Dict[str, Tuple[int, str, Tuple[str, ...]]] = {}
+        # 清单摘要（延迟计算，清单变化时清除）
+        self._digest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        """扫描静态目录，计算指纹并生成压缩版本"""
+        manifest = {}
+        for path in sorted(self.static_dir.rglob('*')):
+            if not path.is_file() or path.name.startswith('.') or \
+                    path.suffix in ('.gz', '.br'):
+                continue
+            filename = path.relative_to(self.static_dir).as_posix()
+            manifest[filename] = self._scan(path)
+
+        with self._lock:
+            self._manifest = manifest
+            self._digest = None
+        logger.info(f"静态资源清单已生成: {len(manifest)} 个文件")
+
+    def _scan(self, path: Path) -> Tuple[int, str, Tuple[str, ...]]:
+        """计算单个文件的指纹，必要时生成压缩版本"""
+        st = path.stat()
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()[:10]
+
+        encodings = []
+        if path.suffix.lower() in COMPRESSIBLE_EXTENSIONS:
+            for encoding, suffix in ENCODINGS:
+                if self._ensure_compressed(path, st, data, encoding, suffix):
+                    encodings.append(encoding)
+        return st.st_mtime_ns, digest, tuple(encodings)
+
+    def _ensure_compressed(self, path: Path, st: os.stat_result, data: bytes,
+                           encoding: str, suffix: str) -> bool:
+        """
+        确保压缩版本存在且不旧于原文件
+
+        压缩后不比原文件小时不保留；目录不可写时跳过。
+
+        Returns:
+            bool: 是否有可用的压缩版本
+        """
+        sibling = path.with_name(path.name + suffix)
+        try:
+            if sibling.stat().st_mtime_ns >= st.st_mtime_ns:
+                return True
+        except FileNotFoundError:
+            pass
+
+        if encoding not in PREFERRED_ENCODINGS:
+            return False
+        compressed = compress(data, encoding, self.compression_level)
+
+        try:
+            if len(compressed) >= len(data):
+                if sibling.exists():
+                    sibling.unlink()
+                return False
+            _write_atomic(sibling, compressed)
+        except OSError as e:
+            logger.warning(f"无法写入预压缩文件 {sibling}: {e}")
+            return False
+        return True
+
+    def _entry(self, filename: str) -> Optional[Tuple[int, str, Tuple[str, ...]]]:
+        """获取清单项，开发环境下文件变化时重新扫描"""
+        entry = self._manifest.get(filename)
+        if not self.check_mtime:
+            return entry
+
+        full_path = safe_join(str(self.static_dir), filename)
+        if full_path is None:
+            return None
+        path = Path(full_path)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        if entry is None or entry[0] != mtime:
+            if path.suffix in ('.gz', '.br') or not path.is_file():
+                return None
+            entry = self._scan(path)
+            with self._lock:
+                self._manifest[filename] = entry
+                self._digest = None
+        return entry
+
+    def digest(self) -> str:
+        """
+        清单摘要（全部文件名和指纹），页面 ETag 使用
+
+        只有静态资源变化的部署后，页面中带指纹的 URL 随之变化，页面 ETag 也需要变化。
+        开发环境先检查各文件是否被修改。
+        """
+        if self.check_mtime:
+            for filename in list(self._manifest):
+                self._entry(filename)
+        digest = self._digest
+        if digest is None:
+            with self._lock:
+                items = sorted((name, entry[1]) for name, entry in self._manifest.items())
+            digest = hashlib.sha1(repr(items).encode('utf-8')).hexdigest()[:10]
+            self._digest = digest
+        return digest
+
+    def url_filename(self, filename: str) -> str:
+        """获取带指纹的文件名，不在清单中时原样返回"""
+        entry = self._entry(filename)
+        if entry is None:
+            return filename
+        return _fingerprinted_name(filename, entry[1])
+
+    def resolve(self, requested: str) -> Tuple[str, Optional[str], Tuple[str, ...]]:
+        """
+        解析请求的文件名
+
+        Args:
+            requested: URL 中的文件名（可能带指纹）
+
+        Returns:
+            (原文件名, 当前指纹, 可用的压缩编码)；不在清单中时指纹为 None
+        """
+        entry = self._entry(requested)
+        if entry is not None:
+            return requested, entry[1], entry[2]
+
+        match = _FINGERPRINTED.match(requested)
+        if match:
+            filename = match.group(1) + match.group(3)
+            entry = self._entry(filename)
+            if entry is not None:
+                return filename, entry[1], entry[2]
+        return requested, None, ()
+
+    @staticmethod
+    def fingerprint_of(requested: str) -> Optional[str]:
+        """获取 URL 文件名中的指纹"""
+        match = _FINGERPRINTED.match(requested)
+        return match.group(2) if match else None
+
+
+# 全局静态资源清单
+static_assets = StaticAssets(
+    STATIC_DIR,
+    compression_level=app_config.compression_level,
+    check_mtime=app_config.is_development,
+)
@@ -130,6 +130,23 @@ def validate_icon_path(icon_path: str) -> bool:
     
     return False
 
+def validate_icon_variants(variants: Any) -> bool:
+    """
+    验证图标多分辨率版本格式
+    
+    Args:
+        variants: {宽度: 图片路径}，如 {"32": "img/a-32.webp"}
+        
+    Returns:
+        bool: 格式是否有效
+    """
+    if not isinstance(variants, dict):
+        return False
+    
+    return all(isinstance(width, str) and width.isdigit() and
+               isinstance(path, str) and path.startswith('img/') and validate_icon_path(path)
+               for width, path in variants.items())
+
 def validate_image_filename(filename: str) -> bool:
     """
     验证图片文件名格式
@@ -205,6 +222,58 @@ def validate_form_data(data: Dict[str, Any], required_fields: List[str]) -> Dict
         'errors': errors
     }
 
+def validate_operation(op: Any) -> Dict[str, Any]:
+    """
+    验证批量配置操作的字段格式
+    
+    Args:
+        op: 操作字典，格式见 config_operations 模块
+        
+    Returns:
+        Dict[str, Any]: 验证结果，包含 'valid' 和 'errors' 键
+    """
+    if not isinstance(op, dict):
+        return {'valid': False, 'errors': {'op': "操作格式无效"}}
+    
+    errors = {}
+    if not isinstance(op.get('op'), str) or not op['op']:
+        errors['op'] = "字段 'op' 是必需的"
+    
+    for field in ('category', 'new_category'):
+        if field in op and not validate_category_name(op[field]):
+            errors[field] = "分类名称格式无效"
+    
+    if 'title' in op and not isinstance(op['title'], str):
+        errors['title'] = "标题格式无效"
+    
+    if 'item' in op:
+        item = op['item']
+        if not isinstance(item, dict):
+            errors['item'] = "项目格式无效"
+        else:
+            if not validate_title(item.get('title')):
+                errors['item.title'] = "标题格式无效"
+            if not validate_url(item.get('url') or ''):
+                errors['item.url'] = "URL格式无效"
+            if 'icon' in item and not validate_icon_path(item['icon']):
+                errors['item.icon'] = "图标格式无效"
+            if 'icon_variants' in item and not validate_icon_variants(item['icon_variants']):
+                errors['item.icon_variants'] = "图标版本格式无效"
+            if 'icon_original' in item and not (isinstance(item['icon_original'], str) and
+                                                item['icon_original'].startswith('img/') and
+                                                validate_icon_path(item['icon_original'])):
+                errors['item.icon_original'] = "原图路径格式无效"
+    
+    if 'order' in op:
+        order = op['order']
+        if not isinstance(order, list) or not all(isinstance(t, str) for t in order):
+            errors['order'] = "排序列表格式无效"
+    
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors
+    }
+
 def error_handler(f):
     """
     错误处理装饰器
@@ -0,0 +1,3 @@
+"""
+基准测试 - 合成配置生成和 HTTP / 配置管理器压力测试工具
+"""
@@ -0,0 +1,381 @@
+"""
+配置管理器压力测试 - 多线程 / 多进程并发写入的吞吐量和正确性
+每个工作线程随机调用 add_item_to_category、move_item_in_category、
+reorder_items_in_category 和 move_item_between_categories，并记录操作日志；
+结束后从存储重新加载配置，按日志检查项目是否丢失、重复或位于错误的分类，
+输出 ops/s、写锁等待时间和写放大（进程实际写入字节数 / 操作本身的字节数）
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .http_bench import PROJECT_ROOT, git_revision, percentile
+from .synthetic import write_dataset
+
+OPERATIONS = ('add', 'move', 'reorder', 'move_between')
+DEFAULT_MIX = 'add=4,move=3,reorder=1,move_between=2'
+
+
+def io_written() -> Optional[int]:
+    """进程通过 write 系列系统调用写入的字节数（Linux /proc/self/io），不可用时返回 None"""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """解析操作比例，如 add=4,move=3"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'未知操作: {name}')
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def worker_loop(worker_id: str, categories: List[str], mix: Dict[str, int], deadline: float,
+                max_ops: int, seed: int) -> List[list]:
+    """
+    单个工作线程：随机执行操作直到截止时间或达到操作数
+
+    move / move_between 只操作本线程添加的项目，reorder 使用读取时的（可能已过期的）顺序。
+
+    Returns:
+        操作日志 [[操作, 标题, 分类, 目标分类, 耗时(秒), 错误], ...]；
+        无异常返回即视为调用方认为操作成功
+    """
+    from app.config_manager import config_manager
+
+    rng = random.Random(f'{seed}-{worker_id}')
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    own: Dict[str, str] = {}
+    log = []
+    seq = 0
+    while len(log) < max_ops and time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        if kind in ('move', 'move_between') and not own:
+            kind = 'add'
+        title = category = target = None
+        started = time.perf_counter()
+        try:
+            if kind == 'add':
+                title = f'stress-{worker_id}-{seq}'
+                seq += 1
+                category = rng.choice(categories)
+                config_manager.add_item_to_category(category, {
+                    "title": title, "url": f'https://stress.example.com/{worker_id}/{seq}',
+                    "icon": "fas fa-link",
+                })
+                own[title] = category
+            elif kind == 'move':
+                title = rng.choice(list(own))
+                category = own[title]
+                config_manager.move_item_in_category(category, title, rng.choice(('up', 'down')))
+            elif kind == 'reorder':
+                category = rng.choice(categories)
+                found = config_manager.find_category_by_name(category)
+                order = [item['title'] for item in found['items']] if found else []
+                rng.shuffle(order)
+                if order:
+                    config_manager.reorder_items_in_category(category, order)
+            else:
+                title = rng.choice(list(own))
+                category = own[title]
+                target = rng.choice([name for name in categories if name != category] or [category])
+                config_manager.move_item_between_categories(category, target, title)
+                own[title] = target
+            error = None
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        log.append([kind, title, category, target, time.perf_counter() - started, error])
+    return log
+
+
+def run_threads(worker_prefix: str, threads: int, categories: List[str], mix: Dict[str, int],
+                duration: float, max_ops: int, seed: int) -> Dict[str, Any]:
+    """
+    在当前进程中运行多个工作线程
+
+    Returns:
+        {"logs": 各线程的操作日志, "lock": 写锁统计, "flush": 写入统计, "written": 写入字节数,
+         "elapsed": 实际运行时间}
+    """
+    from app.config_manager import config_manager
+
+    config_manager.get_snapshot()
+    logs: List[List[list]] = [[] for _ in range(threads)]
+    written_before = io_written()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def run(index: int) -> None:
+        logs[index] = worker_loop(f'{worker_prefix}{index}', categories, mix, deadline,
+                                  max_ops, seed)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    config_manager.flush()
+    elapsed = time.perf_counter() - started
+    written_after = io_written()
+
+    return {
+        "logs": logs,
+        "lock": config_manager.lock_stats(),
+        "flush": config_manager.flush_stats(),
+        "written": (written_after - written_before) if written_before is not None else None,
+        "elapsed": elapsed,
+    }
+
+
+def spawn_processes(args: argparse.Namespace, data_dir: Path, env: Dict[str, str],
+                    categories: List[str]) -> List[Dict[str, Any]]:
+    """启动多个工作进程（启用 MULTI_PROCESS），全部就绪后同时开始"""
+    child_env = dict(os.environ, LOG_LEVEL='WARNING', **env, DATA_DIR=str(data_dir),
+                     MULTI_PROCESS='true')
+    children = []
+    for i in range(args.processes):
+        children.append(subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.config_stress', 'worker', '--prefix', f'p{i}t',
+             '--threads', str(args.threads), '--mix', args.mix_text, '--duration', str(args.duration),
+             '--ops', str(args.ops), '--seed', str(args.seed)],
+            cwd=PROJECT_ROOT, env=child_env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True,
+        ))
+    for child in children:
+        line = child.stdout.readline()
+        if line.strip() != 'READY':
+            raise RuntimeError(f'工作进程启动失败: {line!r}')
+    payload = json.dumps(categories, ensure_ascii=False) + '\n'
+    for child in children:
+        child.stdin.write(payload)
+        child.stdin.flush()
+    results = []
+    for child in children:
+        output, _ = child.communicate()
+        if child.returncode != 0:
+            raise RuntimeError(f'工作进程退出码 {child.returncode}')
+        results.append(json.loads(output))
+    return results
+
+
+def worker_main(args: argparse.Namespace) -> None:
+    """工作进程入口：导入配置管理器后等待开始信号，结果以 JSON 输出到标准输出"""
+    from app.config_manager import config_manager
+
+    config_manager.get_snapshot()
+    print('READY', flush=True)
+    categories = json.loads(sys.stdin.readline())
+    result = run_threads(args.prefix, args.threads, categories, parse_mix(args.mix), args.duration,
+                         args.ops, args.seed)
+    config_manager.close()
+    json.dump(result, sys.stdout, ensure_ascii=False)
+
+
+def verify(initial: Dict[str, Any], logs: List[List[list]], final: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按操作日志检查最终配置
+
+    期望：初始项目和每个成功的 add 都恰好出现一次，本线程添加的项目位于最后一次
+    move_between 的目标分类，分类集合不变，没有其他项目。
+    """
+    expected: Dict[str, Optional[str]] = {}
+    for category in initial['categories']:
+        for item in category['items']:
+            # 初始项目只会被 reorder 改变顺序，不会改变分类
+            expected[item['title']] = category['name']
+    for log in logs:
+        for kind, title, category, target, _, error in log:
+            if error is not None:
+                continue
+            if kind == 'add':
+                expected[title] = category
+            elif kind == 'move_between':
+                expected[title] = target
+
+    found: Dict[str, List[str]] = {}
+    for category in final['categories']:
+        for item in category['items']:
+            found.setdefault(item['title'], []).append(category['name'])
+
+    lost = sorted(title for title in expected if title not in found)
+    duplicated = sorted(title for title, places in found.items() if len(places) > 1)
+    unexpected = sorted(title for title in found if title not in expected)
+    misplaced = sorted(title for title, places in found.items()
+                       if title in expected and len(places) == 1 and places[0] != expected[title])
+    categories_changed = [c['name'] for c in initial['categories']] != \
+        [c['name'] for c in final['categories']]
+    return {
+        "ok": not (lost or duplicated or unexpected or misplaced or categories_changed),
+        "expected_items": len(expected),
+        "final_items": sum(len(places) for places in found.values()),
+        "lost": lost[:20], "lost_count": len(lost),
+        "duplicated": duplicated[:20], "duplicated_count": len(duplicated),
+        "unexpected": unexpected[:20], "unexpected_count": len(unexpected),
+        "misplaced": misplaced[:20], "misplaced_count": len(misplaced),
+        "categories_changed": categories_changed,
+    }
+
+
+def summarize(logs: List[List[list]], elapsed: float, locks: List[Dict[str, float]],
+              written: Optional[int]) -> Dict[str, Any]:
+    """汇总吞吐量、各操作延迟、写锁等待和写放大"""
+    entries = [entry for log in logs for entry in log]
+    per_kind = {}
+    for kind in OPERATIONS:
+        latencies = sorted(entry[4] * 1000 for entry in entries if entry[0] == kind)
+        if latencies:
+            per_kind[kind] = {
+                "ops": len(latencies),
+                "errors": sum(1 for entry in entries if entry[0] == kind and entry[5]),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+            }
+
+    acquisitions = sum(lock["acquisitions"] for lock in locks)
+    wait = sum(lock["wait_seconds"] for lock in locks)
+    hold = sum(lock["hold_seconds"] for lock in locks)
+    # 操作本身的字节数：每个操作的 JSON 表示
+    logical = sum(len(json.dumps(entry[:4], ensure_ascii=False).encode('utf-8'))
+                  for entry in entries if entry[5] is None)
+    return {
+        "ops": len(entries),
+        "errors": sum(1 for entry in entries if entry[5]),
+        "ops_per_sec": round(len(entries) / elapsed, 1) if elapsed else 0.0,
+        "operations": per_kind,
+        "lock": {
+            "acquisitions": acquisitions,
+            "wait_ms_total": round(wait * 1000, 1),
+            "wait_ms_mean": round(wait * 1000 / acquisitions, 3) if acquisitions else 0.0,
+            "wait_ms_max": round(max((lock["max_wait_seconds"] for lock in locks), default=0) * 1000, 3),
+            "hold_ms_mean": round(hold * 1000 / acquisitions, 3) if acquisitions else 0.0,
+            "hold_ms_max": round(max((lock["max_hold_seconds"] for lock in locks), default=0) * 1000, 3),
+        },
+        "writes": {
+            "bytes_written": written,
+            "bytes_per_op": round(written / len(entries), 1) if written is not None and entries else None,
+            "amplification": round(written / logical, 1) if written is not None and logical else None,
+        },
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """生成数据集、运行工作线程 / 进程、检查结果"""
+    env = dict(item.split('=', 1) for item in args.env)
+    if args.storage:
+        env['STORAGE_MODE'] = args.storage
+    if args.write_mode:
+        env['WRITE_MODE'] = args.write_mode
+
+    with tempfile.TemporaryDirectory(prefix='homer-stress-') as data_dir:
+        initial = write_dataset(Path(data_dir), args.items, args.seed)
+        categories = [category['name'] for category in initial['categories']][:args.categories]
+        os.environ.update(env, DATA_DIR=data_dir, LOG_LEVEL='WARNING')
+        if args.processes > 1:
+            os.environ['MULTI_PROCESS'] = 'true'
+
+        if args.processes > 1:
+            results = spawn_processes(args, Path(data_dir), env, categories)
+        else:
+            results = [run_threads('t', args.threads, categories, args.mix, args.duration,
+                                   args.ops, args.seed)]
+        # 工作进程同时开始，以最慢的进程为准
+        elapsed = max(result["elapsed"] for result in results)
+
+        # 从存储重新加载（而不是使用内存中的快照），确认修改已持久化
+        from app.config_manager import config_manager
+        config_manager.invalidate_cache()
+        final = config_manager.get_snapshot(use_cache=False).to_dict()
+        logs = [log for result in results for log in result["logs"]]
+        written = [result["written"] for result in results]
+
+        report = summarize(logs, elapsed, [result["lock"] for result in results],
+                           None if None in written else sum(written))
+        report["flush"] = [result["flush"] for result in results]
+        report["storage_bytes"] = sum(path.stat().st_size for path in Path(data_dir).glob('config.*'))
+        report["verification"] = verify(initial, logs, final)
+        config_manager.close()
+
+    report["meta"] = dict(git_revision(), timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                          args={"processes": args.processes, "threads": args.threads,
+                                "items": args.items, "categories": len(categories),
+                                "duration": args.duration, "ops": args.ops, "mix": args.mix,
+                                "seed": args.seed, "env": env})
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='ConfigManager 并发写入压力测试')
+    subparsers = parser.add_subparsers(dest='command')
+
+    stress = subparsers.add_parser('run', help='运行压力测试（默认）')
+    stress.add_argument('--processes', type=int, default=1,
+                        help='工作进程数，大于 1 时启用 MULTI_PROCESS')
+    stress.add_argument('--threads', type=int, default=4, help='每个进程的工作线程数')
+    stress.add_argument('--items', type=int, default=1000, help='初始项目数')
+    stress.add_argument('--categories', type=int, default=8, help='参与操作的分类数')
+    stress.add_argument('--duration', type=float, default=10.0, help='运行时长(秒)')
+    stress.add_argument('--ops', type=int, default=10 ** 9, help='每个线程的最大操作数')
+    stress.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'操作比例（默认 {DEFAULT_MIX}）')
+    stress.add_argument('--storage', choices=('json', 'journal', 'sqlite'), help='STORAGE_MODE')
+    stress.add_argument('--write-mode', choices=('sync', 'coalesced'), help='WRITE_MODE')
+    stress.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='传给配置管理器的环境变量，可重复')
+    stress.add_argument('--seed', type=int, default=0, help='随机种子')
+    stress.add_argument('--output', type=Path, help='结果 JSON 文件（默认输出到标准输出）')
+
+    worker = subparsers.add_parser('worker', help=argparse.SUPPRESS)
+    worker.add_argument('--prefix', required=True)
+    worker.add_argument('--threads', type=int, default=4)
+    worker.add_argument('--mix', default=DEFAULT_MIX)
+    worker.add_argument('--duration', type=float, default=10.0)
+    worker.add_argument('--ops', type=int, default=10 ** 9)
+    worker.add_argument('--seed', type=int, default=0)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ('run', 'worker', '-h', '--help'):
+        argv = ['run'] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        worker_main(args)
+        return
+
+    args.mix_text = ','.join(f'{name}={weight}' for name, weight in args.mix.items())
+    report = run(args)
+    verification = report["verification"]
+    print(f'{report["ops"]} 次操作, {report["ops_per_sec"]} ops/s, '
+          f'写锁平均等待 {report["lock"]["wait_ms_mean"]}ms, '
+          f'写放大 {report["writes"]["amplification"]}, '
+          f'检查{"通过" if verification["ok"] else "失败"}'
+          f'（丢失 {verification["lost_count"]}, 重复 {verification["duplicated_count"]}, '
+          f'分类错误 {verification["misplaced_count"]}, 多余 {verification["unexpected_count"]}）',
+          file=sys.stderr)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+    sys.exit(0 if verification["ok"] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+"""
+HTTP 基准测试 - 在合成的大规模配置上测量各路由的吞吐量和延迟
+每个配置规模启动一个子进程，在进程内用 waitress 运行应用（使用独立的数据目录），
+主进程以指定并发数持续请求 /、/search、/config GET/POST 和 /config/img/*，
+输出吞吐量和 p50/p95/p99 延迟，结果写入 JSON，可用 compare 子命令比较两次结果
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from .synthetic import IMAGE_ICONS, search_terms, write_dataset
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+SCENARIOS = ('index', 'search', 'config_get', 'config_post', 'icons')
+# 模拟浏览器的请求头
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+# (方法, 路径, 请求体, 请求头)
+Request = Tuple[str, str, Optional[bytes], Dict[str, str]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def make_requests(scenario: str, config: Dict[str, Any], seed: int) -> Callable[[random.Random], Request]:
+    """
+    生成场景的请求构造函数
+
+    config_post 修改随机项目的 URL（标题和分类不变），配置规模在测试期间保持不变。
+    """
+    if scenario == 'index':
+        return lambda rng: ('GET', '/', None, BROWSER_HEADERS)
+    if scenario == 'config_get':
+        return lambda rng: ('GET', '/config', None, BROWSER_HEADERS)
+    if scenario == 'search':
+        terms = search_terms(seed)
+        return lambda rng: ('GET', '/search?term=' + quote(rng.choice(terms)), None,
+                            BROWSER_HEADERS)
+    if scenario == 'icons':
+        return lambda rng: ('GET', f'/config/img/icon-{rng.randrange(IMAGE_ICONS)}.png', None,
+                            BROWSER_HEADERS)
+    if scenario == 'config_post':
+        items = [(category['name'], item) for category in config['categories']
+                 for item in category['items']]
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+        def build(rng: random.Random) -> Request:
+            category, item = rng.choice(items)
+            body = urlencode({
+                'action': 'edit', 'old_category': category, 'old_title': item['title'],
+                'new_category': category, 'new_title': item['title'],
+                'new_url': f"{item['url'].split('?')[0]}?v={rng.randrange(1 << 30)}",
+            }).encode('utf-8')
+            return 'POST', '/config', body, headers
+        return build
+    raise ValueError(f'未知场景: {scenario}')
+
+
+def run_load(port: int, build: Callable[[random.Random], Request], concurrency: int,
+             duration: float, warmup: float, seed: int) -> Dict[str, Any]:
+    """
+    以指定并发数持续发送请求
+
+    每个线程使用一个保持连接的 HTTP 连接，预热期间的请求不计入结果。
+
+    Returns:
+        {"requests", "errors", "rps", "bytes", "latency_ms": {"mean", "p50", "p95", "p99", "max"},
+         "status": {状态码: 次数}}
+    """
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    statuses: List[Dict[str, int]] = [{} for _ in range(concurrency)]
+    errors = [0] * concurrency
+    received = [0] * concurrency
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while True:
+            method, path, body, headers = build(rng)
+            t0 = time.perf_counter()
+            if t0 >= deadline:
+                break
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = None
+                data = b''
+            t1 = time.perf_counter()
+            if t0 < measure_from:
+                continue
+            latencies[index].append(t1 - t0)
+            received[index] += len(data)
+            key = str(status) if status is not None else 'error'
+            statuses[index][key] = statuses[index].get(key, 0) + 1
+            if status is None or status >= 400:
+                errors[index] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = sorted(value * 1000 for worker_values in latencies for value in worker_values)
+    status_counts: Dict[str, int] = {}
+    for worker_statuses in statuses:
+        for key, count in worker_statuses.items():
+            status_counts[key] = status_counts.get(key, 0) + count
+    return {
+        "requests": len(values),
+        "errors": sum(errors),
+        "rps": round(len(values) / duration, 1),
+        "bytes": sum(received),
+        "latency_ms": {
+            "mean": round(sum(values) / len(values), 3) if values else 0.0,
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        },
+        "status": status_counts,
+    }
+
+
+class WriterLoop:
+    """
+    后台写入循环：测量期间持续以 config_post 修改项目 URL，用于观察写入对读取延迟的影响
+
+    interval 为两次写入之间的间隔（秒），为 0 时连续写入。
+    """
+
+    def __init__(self, port: int, build: Callable[[random.Random], Request], interval: float,
+                 seed: int):
+        self.port = port
+        self.build = build
+        self.interval = interval
+        self.seed = seed
+        self.writes = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bench-writer', daemon=True)
+
+    def __enter__(self) -> 'WriterLoop':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        rng = random.Random(self.seed - 1)
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        while not self._stop.is_set():
+            method, path, body, headers = self.build(rng)
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                # 表单提交成功时重定向回配置页
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+                ok = False
+            self.latencies.append(time.perf_counter() - t0)
+            self.writes += 1
+            self.errors += not ok
+            if self.interval:
+                self._stop.wait(self.interval)
+        conn.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """写入次数、错误数和延迟"""
+        values = sorted(value * 1000 for value in self.latencies)
+        return {
+            "writes": self.writes,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": round(percentile(values, 50), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(values[-1], 3) if values else 0.0,
+            },
+        }
+
+
+class ServerProcess:
+    """在子进程中以 waitress 运行应用，数据目录为合成配置所在目录"""
+
+    def __init__(self, data_dir: Path, threads: int, env: Dict[str, str]):
+        self.data_dir = data_dir
+        self.threads = threads
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.port = 0
+        self.startup_seconds = 0.0
+
+    def __enter__(self) -> 'ServerProcess':
+        env = dict(os.environ, LOG_LEVEL='WARNING', **self.env, DATA_DIR=str(self.data_dir),
+                   THREADS=str(self.threads))
+        started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.http_bench', 'serve', '--threads', str(self.threads)],
+            cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        line = self.process.stdout.readline()
+        if not line.startswith('READY '):
+            self.process.kill()
+            raise RuntimeError(f'应用启动失败: {line!r}')
+        self.port = int(line.split()[1])
+        self.startup_seconds = round(time.perf_counter() - started, 3)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def serve(threads: int) -> None:
+    """子进程入口：在进程内启动 waitress，输出监听端口后一直运行"""
+    from waitress.server import create_server
+    from main import create_app
+
+    server = create_server(create_app(), host='127.0.0.1', port=0, threads=threads)
+    print(f'READY {server.effective_port}', flush=True)
+    server.run()
+
+
+def git_revision() -> Dict[str, Any]:
+    """当前提交和工作区是否有未提交的修改"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, text=True,
+                                capture_output=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=PROJECT_ROOT, text=True, capture_output=True,
+                                    check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def run_measurement(port: int, build: Callable[[random.Random], Request],
+                    writer_build: Callable[[random.Random], Request], concurrency: int,
+                    writer_interval: Optional[float], args: argparse.Namespace) -> Dict[str, Any]:
+    """运行一项测量，writer_interval 不为 None 时同时运行后台写入循环"""
+    if writer_interval is None:
+        result = run_load(port, build, concurrency, args.duration, args.warmup, args.seed)
+        result.update(writer_interval=None, writer=None)
+        return result
+    with WriterLoop(port, writer_build, writer_interval, args.seed) as writer:
+        result = run_load(port, build, concurrency, args.duration, args.warmup, args.seed)
+    result.update(writer_interval=writer_interval, writer=writer.summary())
+    return result
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """按规模、场景和并发数依次运行，返回完整结果"""
+    env = dict(item.split('=', 1) for item in args.env)
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix=f'homer-bench-{size}-') as data_dir:
+            generated = time.perf_counter()
+            config = write_dataset(Path(data_dir), size, args.seed)
+            generate_seconds = round(time.perf_counter() - generated, 3)
+
+            with ServerProcess(Path(data_dir), args.threads, env) as server:
+                print(f'规模 {size}: 生成 {generate_seconds}s, 启动 {server.startup_seconds}s',
+                      file=sys.stderr)
+                writer_build = make_requests('config_post', config, args.seed)
+                for scenario in args.scenarios:
+                    build = make_requests(scenario, config, args.seed)
+                    for concurrency in args.concurrency:
+                        for interval in args.writer:
+                            result = run_measurement(server.port, build, writer_build, concurrency,
+                                                     interval, args)
+                            result.update(size=size, scenario=scenario, concurrency=concurrency)
+                            results.append(result)
+                            latency = result["latency_ms"]
+                            writer = f'  写入 {result["writer"]["writes"]} 次' if result["writer"] else ''
+                            print(f'  {scenario:<12} c={concurrency:<3} {result["rps"]:>9.1f} req/s  '
+                                  f'p50 {latency["p50"]:.2f}ms  p95 {latency["p95"]:.2f}ms  '
+                                  f'p99 {latency["p99"]:.2f}ms  errors {result["errors"]}{writer}',
+                                  file=sys.stderr)
+
+    return {
+        "meta": dict(git_revision(),
+                     timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                     python=platform.python_version(),
+                     platform=platform.platform(),
+                     cpus=os.cpu_count(),
+                     args={"sizes": args.sizes, "scenarios": args.scenarios,
+                           "concurrency": args.concurrency, "duration": args.duration,
+                           "warmup": args.warmup, "threads": args.threads, "seed": args.seed,
+                           "writer": args.writer, "env": env}),
+        "results": results,
+    }
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    """
+    比较两次结果，打印吞吐量和延迟的变化
+
+    Returns:
+        有指标变差超过 threshold% 时返回 1，否则返回 0
+    """
+    base = json.loads(base_path.read_text(encoding='utf-8'))
+    new = json.loads(new_path.read_text(encoding='utf-8'))
+
+    def key(result):
+        return result['size'], result['scenario'], result['concurrency'], result.get('writer_interval')
+
+    base_results = {key(result): result for result in base['results']}
+    regressed = False
+    print(f"{'规模':>8} {'场景':<12} {'并发':>4} {'写入':>6} {'req/s':>16} {'p50':>16} {'p99':>16}")
+    for result in new['results']:
+        old = base_results.get(key(result))
+        if old is None:
+            continue
+        changes = []
+        for name, old_value, new_value, higher_is_better in (
+                ('rps', old['rps'], result['rps'], True),
+                ('p50', old['latency_ms']['p50'], result['latency_ms']['p50'], False),
+                ('p99', old['latency_ms']['p99'], result['latency_ms']['p99'], False)):
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            worse = -change if higher_is_better else change
+            mark = '!' if worse > threshold else ' '
+            regressed = regressed or worse > threshold
+            changes.append(f'{new_value:>9.2f} {change:+5.0f}%{mark}')
+        writer = result.get('writer_interval')
+        print(f'{result["size"]:>8} {result["scenario"]:<12} {result["concurrency"]:>4} '
+              f'{"-" if writer is None else f"{writer * 1000:g}ms":>6} ' + ' '.join(changes))
+    return 1 if regressed else 0
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def _writer_list(value: str) -> List[Optional[float]]:
+    """解析写入间隔列表（毫秒），off 表示不运行写入循环"""
+    intervals = []
+    for part in value.split(','):
+        part = part.strip().lower()
+        if part:
+            intervals.append(None if part == 'off' else float(part) / 1000)
+    return intervals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Homer HTTP 基准测试')
+    subparsers = parser.add_subparsers(dest='command')
+
+    bench = subparsers.add_parser('run', help='运行基准测试（默认）')
+    bench.add_argument('--sizes', type=_int_list, default=list(DEFAULT_SIZES),
+                       help='配置规模（项目数），逗号分隔')
+    bench.add_argument('--scenarios', type=lambda v: [s for s in v.split(',') if s],
+                       default=list(SCENARIOS), help=f'场景，逗号分隔: {",".join(SCENARIOS)}')
+    bench.add_argument('--concurrency', type=_int_list, default=[1, 8], help='并发数，逗号分隔')
+    bench.add_argument('--duration', type=float, default=5.0, help='每项测量时长(秒)')
+    bench.add_argument('--warmup', type=float, default=1.0, help='每项预热时长(秒)')
+    bench.add_argument('--threads', type=int, default=8, help='waitress 工作线程数')
+    bench.add_argument('--writer', type=_writer_list, default=[None], metavar='MS,...',
+                       help='测量期间后台写入循环的写入间隔(毫秒)，逗号分隔，off 表示不写入；'
+                            '如 off,0 分别测量无写入和连续写入时的延迟')
+    bench.add_argument('--seed', type=int, default=0, help='随机种子')
+    bench.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                       help='传给应用的环境变量（如 STORAGE_MODE=sqlite），可重复')
+    bench.add_argument('--output', type=Path, help='结果 JSON 文件（默认输出到标准输出）')
+
+    diff = subparsers.add_parser('compare', help='比较两次结果')
+    diff.add_argument('base', type=Path)
+    diff.add_argument('new', type=Path)
+    diff.add_argument('--threshold', type=float, default=10.0, help='视为退化的变化百分比')
+
+    server = subparsers.add_parser('serve', help=argparse.SUPPRESS)
+    server.add_argument('--threads', type=int, default=8)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ('run', 'compare', 'serve', '-h', '--help'):
+        argv = ['run'] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.threads)
+    elif args.command == 'compare':
+        sys.exit(compare(args.base, args.new, args.threshold))
+    else:
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f'未知场景: {", ".join(sorted(unknown))}')
+        results = run(args)
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if args.output:
+            args.output.write_text(output + '\n', encoding='utf-8')
+            print(f'结果已写入: {args.output}', file=sys.stderr)
+        else:
+            print(output)
+
+
+if __name__ == '__main__':
+    main()
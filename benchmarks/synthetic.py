@@ -0,0 +1,146 @@
+"""
+合成数据模块 - 生成基准测试使用的大规模配置
+标题混合中文和拉丁字母，图标混合 Font Awesome 类和 img/ 下的小图片，
+相同的 (项目数, 随机种子) 总是生成相同的配置，便于在不同提交之间比较
+"""
+import argparse
+import json
+import random
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 常见中文词和英文词，标题由 1-3 个词组成
+CHINESE_WORDS = (
+    '豆包', '翻译', '银行', '股市', '天气', '地图', '音乐', '视频', '新闻', '邮箱',
+    '网盘', '购物', '外卖', '打车', '论坛', '博客', '文档', '表格', '笔记', '日历',
+    '监控', '路由', '下载', '影视', '阅读', '学习', '词典', '相册', '云盘', '工具',
+)
+LATIN_WORDS = (
+    'GitHub', 'Google', 'Drive', 'Docs', 'Mail', 'Cloud', 'Jellyfin', 'Home', 'Assistant',
+    'Grafana', 'Portainer', 'Router', 'Proxy', 'Notes', 'Photos', 'Music', 'Video', 'Wiki',
+    'Status', 'Admin', 'Panel', 'Files', 'Sync', 'Backup', 'Monitor', 'Chat', 'Search',
+    'Reader', 'Calendar', 'Tasks',
+)
+FA_ICONS = (
+    'fas fa-link', 'fas fa-robot', 'fas fa-server', 'fas fa-music', 'fas fa-video',
+    'fas fa-cloud', 'fas fa-book', 'fab fa-github', 'fab fa-google', 'fab fa-docker',
+)
+# 不同图片图标的数量（多个项目共用）
+IMAGE_ICONS = 64
+
+
+def _png(rgb: tuple, size: int = 16) -> bytes:
+    """生成纯色 PNG 图片"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + \
+            struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    row = b'\x00' + bytes(rgb) * size
+    return b'\x89PNG\r\n\x1a\n' + \
+        chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)) + \
+        chunk(b'IDAT', zlib.compress(row * size)) + \
+        chunk(b'IEND', b'')
+
+
+def _title(rng: random.Random, seq: int) -> str:
+    """生成标题：中文、英文或中英混合，末尾带序号保证唯一"""
+    kind = rng.random()
+    if kind < 0.4:
+        words = rng.sample(CHINESE_WORDS, rng.randint(1, 2))
+        return ''.join(words) + f' {seq}'
+    if kind < 0.8:
+        words = rng.sample(LATIN_WORDS, rng.randint(1, 3))
+        return ' '.join(words) + f' {seq}'
+    return f'{rng.choice(LATIN_WORDS)} {rng.choice(CHINESE_WORDS)} {seq}'
+
+
+def generate_config(items: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成合成配置
+
+    Args:
+        items: 项目总数
+        seed: 随机种子
+
+    Returns:
+        config.json 格式的配置，每个分类约 50 个项目
+    """
+    rng = random.Random(seed)
+    category_count = max(1, min(items // 50, 500))
+    categories: List[Dict[str, Any]] = [
+        {"name": f'{rng.choice(CHINESE_WORDS)}{i}', "items": []} for i in range(category_count)
+    ]
+    for seq in range(items):
+        title = _title(rng, seq)
+        host = f'{rng.choice(LATIN_WORDS).lower()}{seq % 997}.example.com'
+        if rng.random() < 0.5:
+            icon = rng.choice(FA_ICONS)
+        else:
+            icon = f'img/icon-{rng.randrange(IMAGE_ICONS)}.png'
+        categories[seq % category_count]["items"].append(
+            {"title": title, "url": f'https://{host}/{seq}', "icon": icon}
+        )
+    return {"categories": categories}
+
+
+def search_terms(seed: int = 0, count: int = 200) -> List[str]:
+    """生成搜索词：完整词、前缀、拼音、拼音首字母和拼写错误"""
+    from pypinyin import lazy_pinyin
+
+    rng = random.Random(seed + 1)
+    terms = []
+    for _ in range(count):
+        kind = rng.randrange(5)
+        if kind == 0:
+            terms.append(rng.choice(LATIN_WORDS).lower())
+        elif kind == 1:
+            terms.append(rng.choice(LATIN_WORDS).lower()[:rng.randint(1, 3)])
+        elif kind == 2:
+            terms.append(''.join(lazy_pinyin(rng.choice(CHINESE_WORDS))))
+        elif kind == 3:
+            terms.append(''.join(p[0] for p in lazy_pinyin(rng.choice(CHINESE_WORDS))))
+        else:
+            # 交换相邻两个字母
+            word = rng.choice(LATIN_WORDS).lower()
+            i = rng.randrange(len(word) - 1)
+            terms.append(word[:i] + word[i + 1] + word[i] + word[i + 2:])
+    return terms
+
+
+def write_dataset(data_dir: Path, items: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    在数据目录中写入 config.json 和 img/ 下的图标
+
+    Returns:
+        写入的配置
+    """
+    data_dir = Path(data_dir)
+    images_dir = data_dir / 'img'
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    for i in range(IMAGE_ICONS):
+        (images_dir / f'icon-{i}.png').write_bytes(
+            _png((rng.randrange(256), rng.randrange(256), rng.randrange(256))))
+
+    config = generate_config(items, seed)
+    (data_dir / 'config.json').write_text(json.dumps(config, ensure_ascii=False, indent=2),
+                                          encoding='utf-8')
+    return config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='生成基准测试使用的合成配置')
+    parser.add_argument('--items', type=int, default=1000, help='项目总数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--out', type=Path, required=True, help='数据目录（写入 config.json 和 img/）')
+    args = parser.parse_args()
+
+    config = write_dataset(args.out, args.items, args.seed)
+    print(f"已生成 {args.items} 个项目、{len(config['categories'])} 个分类: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
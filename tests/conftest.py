@@ -0,0 +1,73 @@
+"""
+测试公共设置
+应用模块在导入时创建全局实例（配置、ConfigManager、变化推送等），
+因此必须在导入 app 之前指定临时数据目录和相关环境变量
+"""
+import atexit
+import copy
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(tempfile.mkdtemp(prefix='homer-test-'))
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+
+os.environ['DATA_DIR'] = str(DATA_DIR)
+os.environ['EVENTS'] = 'true'
+# 使用默认的存储和缓存模式，不受运行环境影响
+for name in ('STORAGE_MODE', 'WRITE_MODE', 'CACHE_VALIDATION', 'MULTI_PROCESS',
+             'SEARCH_MODE', 'PAGE_CACHE', 'PROFILE', 'FLASK_ENV', 'ENVIRONMENT',
+             'THREADS', 'EVENTS_MAX_SUBSCRIBERS'):
+    os.environ.pop(name, None)
+
+(DATA_DIR / 'config.json').write_text(json.dumps({"categories": []}), encoding='utf-8')
+
+SAMPLE_CONFIG = {
+    "title": "Homer",
+    "categories": [
+        {
+            "name": "开发",
+            "icon": "fa-code",
+            "items": [
+                {"title": "GitHub", "url": "https://github.com", "icon": "github.png"},
+                {"title": "GitLab", "url": "https://gitlab.com", "icon": "gitlab.png"},
+                {"title": "Python 文档", "url": "https://docs.python.org/3/", "icon": "python.png"},
+            ],
+        },
+        {
+            "name": "工具",
+            "items": [
+                {"title": "翻译", "url": "https://translate.google.com", "icon": "translate.png",
+                 "description": "谷歌翻译"},
+                {"title": "Grafana", "url": "https://grafana.example.com/d/holiday-calendar",
+                 "icon": "grafana.png"},
+            ],
+        },
+    ],
+}
+
+
+@pytest.fixture
+def sample_config():
+    """可修改的示例配置"""
+    return copy.deepcopy(SAMPLE_CONFIG)
+
+
+@pytest.fixture
+def manager(sample_config):
+    """写入示例配置后的全局 ConfigManager"""
+    from app.config_manager import config_manager
+    config_manager.save_config(sample_config)
+    return config_manager
+
+
+@pytest.fixture
+def client(manager):
+    """Flask 测试客户端"""
+    from app import app
+    app.config['TESTING'] = True
+    return app.test_client()
@@ -0,0 +1,152 @@
+"""配置变化推送测试"""
+import json
+import re
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from app.change_feed import change_feed
+from app.config import config as app_config
+
+DOCKERFILE = Path(__file__).resolve().parent.parent / 'Dockerfile'
+
+
+def parse_events(chunk: bytes):
+    """解析 SSE 消息，返回 [(事件 ID, 数据), ...]"""
+    events = []
+    for message in chunk.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.splitlines() if ': ' in line)
+        if 'data' in fields:
+            events.append((fields.get('id'), json.loads(fields['data'])))
+    return events
+
+
+def subscribe(last_event_id):
+    """订阅并读取第一条消息（retry），之后连接已注册"""
+    stream = change_feed.subscribe(last_event_id, lambda: False)
+    assert next(stream).startswith(b'retry: ')
+    return closing(stream)
+
+
+def delete(manager, title):
+    manager.apply_operations([{"op": "delete", "category": "开发", "title": title}])
+
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    monkeypatch.setattr('app.change_feed.POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(change_feed, 'max_duration', 0.5)
+    return change_feed
+
+
+def test_index_page_uses_content_digest(client, manager):
+    digest = manager.get_snapshot().digest
+    html = client.get('/').data.decode('utf-8')
+    assert f'last={digest}' in html
+    assert change_feed.instance not in html
+
+
+def test_digest_resyncs_and_streams_operations(manager):
+    snapshot = manager.get_snapshot()
+    with subscribe(snapshot.digest) as stream:
+        delete(manager, "GitHub")
+        [(event_id, data)] = parse_events(next(stream))
+    assert data["base"] == snapshot.version
+    assert data["ops"] == [{"op": "delete", "category": "开发", "title": "GitHub"}]
+    assert event_id == change_feed.event_id(manager.version, manager.get_snapshot().digest)
+
+
+def test_foreign_event_id_with_current_digest_resyncs(manager):
+    digest = manager.get_snapshot().digest
+    with subscribe(f'deadbeef:7:{digest}') as stream:
+        delete(manager, "GitHub")
+        [(_, data)] = parse_events(next(stream))
+    assert "ops" in data
+
+
+def test_unknown_position_reloads(manager):
+    with subscribe('0' * 40) as stream:
+        [(_, data)] = parse_events(next(stream))
+    assert data["reload"] is True
+
+
+def test_reconnect_replays_missed_events(manager):
+    with subscribe(manager.get_snapshot().digest) as stream:
+        delete(manager, "GitHub")
+        [(event_id, _)] = parse_events(next(stream))
+
+    delete(manager, "GitLab")
+    manager.apply_operations([{"op": "move", "category": "工具", "title": "Grafana",
+                               "direction": "up"}])
+    with subscribe(event_id) as stream:
+        events = parse_events(next(stream))
+    assert [data["ops"][0]["op"] for _, data in events] == ["delete", "move"]
+    assert events[0][1]["base"] == int(event_id.split(':')[1])
+
+
+def test_future_version_reloads(manager):
+    digest = manager.get_snapshot().digest
+    with subscribe(change_feed.event_id(manager.version + 100, digest)) as stream:
+        [(_, data)] = parse_events(next(stream))
+    assert data["reload"] is True
+
+
+def test_queue_overflow_reloads(manager, monkeypatch):
+    monkeypatch.setattr(change_feed, 'max_queue', 2)
+    overflows = change_feed.stats()["overflows"]
+    with subscribe(manager.get_snapshot().digest) as stream:
+        for title in ("GitHub", "GitLab", "Python 文档"):
+            delete(manager, title)
+        [(event_id, data)] = parse_events(next(stream))
+        assert data["reload"] is True
+        # 通知重新加载后连接结束
+        assert next(stream, None) is None
+    assert event_id.endswith(manager.get_snapshot().digest)
+    assert change_feed.stats()["overflows"] == overflows + 1
+
+
+def test_full_save_reloads(manager, sample_config):
+    with subscribe(manager.get_snapshot().digest) as stream:
+        manager.save_config(sample_config)
+        [(_, data)] = parse_events(next(stream))
+    assert data["reload"] is True
+
+
+def test_subscriber_limit(manager, monkeypatch):
+    monkeypatch.setattr(change_feed, 'max_subscribers', 1)
+    rejected = change_feed.stats()["rejected"]
+    with subscribe(manager.get_snapshot().digest):
+        assert change_feed.stats()["subscribers"] == 1
+        [chunk] = change_feed.subscribe(None, lambda: False)
+        assert chunk.startswith(b'retry: ')
+    assert change_feed.stats()["rejected"] == rejected + 1
+    assert change_feed.stats()["subscribers"] == 0
+
+
+def test_idle_connection_ends_after_max_duration(manager):
+    with subscribe(manager.get_snapshot().digest) as stream:
+        assert list(stream) == []
+
+
+def test_disabled_feed_returns_204(client, monkeypatch):
+    monkeypatch.setattr(change_feed, 'enabled', False)
+    assert client.get('/events').status_code == 204
+
+
+def test_subscriber_cap_leaves_worker_threads(monkeypatch):
+    # 镜像以 THREADS 启动 waitress，默认值与 AppConfig 一致
+    dockerfile = DOCKERFILE.read_text(encoding='utf-8')
+    threads = int(re.search(r'^ENV THREADS=(\d+)', dockerfile, re.M).group(1))
+    assert '--threads=\\"$THREADS\\"' in dockerfile
+    assert app_config.threads == threads
+
+    # 连接全部占满时仍有大部分工作线程处理普通请求
+    assert change_feed.max_subscribers == app_config.events_max_subscribers
+    assert 1 <= change_feed.max_subscribers <= threads // 4
+
+    monkeypatch.setenv('EVENTS_MAX_SUBSCRIBERS', '100')
+    assert app_config.events_max_subscribers == threads // 2
+    monkeypatch.setenv('THREADS', '32')
+    monkeypatch.delenv('EVENTS_MAX_SUBSCRIBERS')
+    assert app_config.events_max_subscribers == 8
@@ -0,0 +1,163 @@
+"""配置操作日志和日志存储测试"""
+import json
+
+import pytest
+
+from app.config_journal import JournalConflictError, content_digest
+from app.config_operations import apply_operation
+from app.config_storage import JournalStorage, encode_config, write_json_atomic
+
+
+def add_op(title, category="开发"):
+    return {"op": "add", "category": category,
+            "item": {"title": title, "url": f"https://{title.lower()}.example.com"}}
+
+
+def titles(config, category_index=0):
+    return [item["title"] for item in config["categories"][category_index]["items"]]
+
+
+@pytest.fixture
+def storage(tmp_path, sample_config):
+    path = tmp_path / 'config.json'
+    write_json_atomic(path, sample_config)
+    return JournalStorage(path, max_bytes=1024 * 1024, max_records=1000)
+
+
+def reopen(storage):
+    return JournalStorage(storage.path, storage.max_bytes, storage.max_records)
+
+
+def test_replay_applies_records_in_order(storage):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    storage.commit({}, [add_op("Gogs"), {"op": "move", "category": "开发", "title": "Gogs",
+                                         "direction": "up"}])
+
+    reopened = reopen(storage)
+    config = reopened.load()
+    assert titles(config) == ["GitHub", "GitLab", "Python 文档", "Gogs", "Gitea"]
+    assert reopened.journal.records == 2
+    assert reopened.journal.size == storage.journal.size
+
+
+def test_torn_tail_is_ignored_and_truncated_on_next_append(storage):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    good_size = storage.journal.size
+    with open(storage.journal.path, 'ab') as f:
+        f.write(b'{"ops":[{"op":"add","cat')
+
+    reopened = reopen(storage)
+    assert titles(reopened.load())[-1] == "Gitea"
+    assert reopened.journal.size == good_size
+    # 读取时不修改文件
+    assert storage.journal.path.stat().st_size > good_size
+
+    reopened.commit({}, [add_op("Gogs")])
+    lines = storage.journal.path.read_bytes().split(b'\n')
+    assert lines[-1] == b''
+    assert all(json.loads(line) for line in lines[:-1])
+    assert titles(reopen(storage).load())[-2:] == ["Gitea", "Gogs"]
+
+
+def test_corrupt_last_line_is_treated_as_torn(storage):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    good_size = storage.journal.size
+    with open(storage.journal.path, 'ab') as f:
+        f.write(b'{"ops": not json}\n')
+
+    reopened = reopen(storage)
+    reopened.load()
+    assert reopened.journal.records == 1
+    assert reopened.journal.size == good_size
+
+
+def test_only_applied_records_are_counted(storage):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    storage.commit({}, [{"op": "delete", "category": "开发", "title": "不存在"}])
+    with open(storage.journal.path, 'ab') as f:
+        f.write(b'garbage\n')
+    # 让损坏的记录位于日志中间
+    storage.journal.size = storage.journal.path.stat().st_size
+    storage.commit({}, [add_op("Gogs")])
+
+    reopened = reopen(storage)
+    assert titles(reopened.load())[-2:] == ["Gitea", "Gogs"]
+    assert reopened.journal.records == 2
+
+
+def test_base_mismatch_with_records_raises_and_keeps_journal(storage, sample_config):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    journal = storage.journal.path.read_bytes()
+
+    # config.json 在压缩前被外部修改
+    sample_config["title"] = "changed"
+    write_json_atomic(storage.path, sample_config)
+    with pytest.raises(JournalConflictError):
+        reopen(storage).load()
+    assert storage.journal.path.read_bytes() == journal
+
+
+def test_base_mismatch_without_records_is_discarded(storage, sample_config):
+    storage.load()
+    storage.commit({}, [add_op("Gitea")])
+    storage.journal.path.write_text(json.dumps({"base": "0" * 40}) + '\n')
+
+    sample_config["title"] = "changed"
+    write_json_atomic(storage.path, sample_config)
+    reopened = reopen(storage)
+    config = reopened.load()
+    assert config["title"] == "changed"
+    assert reopened.journal.records == 0
+
+    # 下一次追加时清除旧日志并写入新的头记录
+    reopened.commit({}, [add_op("Gogs")])
+    header = json.loads(storage.journal.path.read_bytes().split(b'\n')[0])
+    assert header == {"base": content_digest(encode_config(config))}
+
+
+def test_crash_after_compaction_does_not_reapply(storage):
+    config = storage.load()
+    op = add_op("Gitea")
+    storage.commit(config, [op])
+    apply_operation(config, op)
+
+    # 压缩时在替换 config.json 后、清空日志前崩溃
+    data = encode_config(config)
+    storage.journal.mark_compacted(content_digest(data))
+    write_json_atomic(storage.path, config, data)
+
+    reopened = reopen(storage)
+    assert titles(reopened.load()).count("Gitea") == 1
+    assert reopened.journal.records == 0
+
+
+def test_crash_before_compaction_replace_replays(storage):
+    config = storage.load()
+    storage.commit(config, [add_op("Gitea")])
+    # 标记已写入但 config.json 没有被替换
+    storage.journal.mark_compacted("f" * 40)
+
+    reopened = reopen(storage)
+    assert titles(reopened.load()).count("Gitea") == 1
+
+
+def test_compaction_at_threshold(tmp_path, sample_config):
+    path = tmp_path / 'config.json'
+    write_json_atomic(path, sample_config)
+    storage = JournalStorage(path, max_bytes=1024 * 1024, max_records=3)
+
+    config = storage.load()
+    for title in ("A1", "A2", "A3"):
+        op = add_op(title)
+        apply_operation(config, op)
+        storage.commit(config, [op])
+
+    assert storage.journal.records == 0
+    assert storage.journal.path.stat().st_size == 0
+    assert titles(json.loads(path.read_bytes()))[-3:] == ["A1", "A2", "A3"]
+    assert titles(reopen(storage).load())[-3:] == ["A1", "A2", "A3"]
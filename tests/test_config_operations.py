@@ -0,0 +1,134 @@
+"""配置操作和批量执行测试"""
+import pytest
+
+from app.config_operations import OperationError, apply_operation
+
+
+def titles(config, category_index=0):
+    return [item["title"] for item in config["categories"][category_index]["items"]]
+
+
+def test_add_appends_copy(sample_config):
+    item = {"title": "Gitea", "url": "https://gitea.io", "icon": "gitea.png"}
+    apply_operation(sample_config, {"op": "add", "category": "开发", "item": item})
+    assert titles(sample_config) == ["GitHub", "GitLab", "Python 文档", "Gitea"]
+    item["title"] = "changed"
+    assert titles(sample_config)[-1] == "Gitea"
+
+
+def test_edit_in_place_and_across_categories(sample_config):
+    apply_operation(sample_config, {"op": "edit", "category": "开发", "title": "GitLab",
+                                    "item": {"title": "GitLab CE", "url": "https://gitlab.com"}})
+    assert titles(sample_config) == ["GitHub", "GitLab CE", "Python 文档"]
+
+    apply_operation(sample_config, {"op": "edit", "category": "开发", "title": "GitHub",
+                                    "new_category": "工具",
+                                    "item": {"title": "GitHub", "url": "https://github.com"}})
+    assert titles(sample_config) == ["GitLab CE", "Python 文档"]
+    assert titles(sample_config, 1) == ["翻译", "Grafana", "GitHub"]
+
+
+def test_failed_edit_leaves_config_unchanged(sample_config):
+    before = titles(sample_config)
+    with pytest.raises(OperationError):
+        apply_operation(sample_config, {"op": "edit", "category": "开发", "title": "GitHub",
+                                        "new_category": "不存在", "item": {"title": "GitHub"}})
+    assert titles(sample_config) == before
+
+
+def test_delete_removes_all_items_with_title(sample_config):
+    sample_config["categories"][0]["items"].append({"title": "GitHub", "url": "https://gh.io"})
+    apply_operation(sample_config, {"op": "delete", "category": "开发", "title": "GitHub"})
+    assert titles(sample_config) == ["GitLab", "Python 文档"]
+    with pytest.raises(OperationError):
+        apply_operation(sample_config, {"op": "delete", "category": "开发", "title": "GitHub"})
+
+
+def test_move_stops_at_boundaries(sample_config):
+    apply_operation(sample_config, {"op": "move", "category": "开发", "title": "GitLab",
+                                    "direction": "up"})
+    assert titles(sample_config) == ["GitLab", "GitHub", "Python 文档"]
+    apply_operation(sample_config, {"op": "move", "category": "开发", "title": "GitLab",
+                                    "direction": "up"})
+    assert titles(sample_config) == ["GitLab", "GitHub", "Python 文档"]
+    apply_operation(sample_config, {"op": "move", "category": "开发", "title": "Python 文档",
+                                    "direction": "down"})
+    assert titles(sample_config) == ["GitLab", "GitHub", "Python 文档"]
+
+
+def test_reorder_keeps_unlisted_items(sample_config):
+    apply_operation(sample_config, {"op": "reorder", "category": "开发",
+                                    "order": ["Python 文档", "不存在", "GitHub"]})
+    assert titles(sample_config) == ["Python 文档", "GitHub", "GitLab"]
+
+
+def test_move_between(sample_config):
+    apply_operation(sample_config, {"op": "move_between", "category": "工具",
+                                    "new_category": "开发", "title": "翻译"})
+    assert titles(sample_config) == ["GitHub", "GitLab", "Python 文档", "翻译"]
+    assert sample_config["categories"][0]["items"][-1]["description"] == "谷歌翻译"
+    assert titles(sample_config, 1) == ["Grafana"]
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "rename", "category": "开发"},
+    {"op": "add", "category": "开发"},
+    {"op": "add", "category": "开发", "item": "GitHub"},
+    {"op": "reorder", "category": "开发", "order": "GitHub"},
+    {"op": "move", "category": "开发", "title": "GitHub", "direction": "left"},
+    {"op": "delete", "category": "不存在", "title": "GitHub"},
+])
+def test_invalid_operations_raise(sample_config, op):
+    with pytest.raises(OperationError):
+        apply_operation(sample_config, op)
+
+
+def test_atomic_batch_rolls_back(manager):
+    version = manager.version
+    result = manager.apply_operations([
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+        {"op": "delete", "category": "开发", "title": "不存在"},
+        {"op": "delete", "category": "开发", "title": "GitLab"},
+    ])
+    assert not result["success"]
+    assert result["version"] == version
+    assert [r["success"] for r in result["results"]] == [False, False, False]
+    assert manager.find_item_in_category("开发", "GitHub") is not None
+
+
+def test_non_atomic_batch_skips_failures(manager):
+    result = manager.apply_operations([
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+        {"op": "delete", "category": "开发", "title": "不存在"},
+        {"op": "move", "category": "开发", "title": "Python 文档", "direction": "up"},
+    ], atomic=False)
+    assert not result["success"]
+    assert [r["success"] for r in result["results"]] == [True, False, True]
+    assert result["version"] == manager.version
+    categories = manager.get_categories()
+    assert [item["title"] for item in categories[0]["items"]] == ["Python 文档", "GitLab"]
+
+
+def test_batch_route(client, manager):
+    # 格式错误时不执行任何操作
+    response = client.post('/config/batch', json={"operations": [
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+        {"op": ""},
+    ]})
+    assert response.status_code == 400
+    assert manager.find_item_in_category("开发", "GitHub") is not None
+
+    # 执行失败时回滚
+    response = client.post('/config/batch', json={"operations": [
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+        {"op": "delete", "category": "开发", "title": "不存在"},
+    ]})
+    assert response.status_code == 409
+    assert manager.find_item_in_category("开发", "GitHub") is not None
+
+    response = client.post('/config/batch', json={"operations": [
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()["success"]
+    assert manager.find_item_in_category("开发", "GitHub") is None
@@ -0,0 +1,100 @@
+"""配置存储后端测试"""
+import json
+
+import pytest
+
+from app.config import config as app_config
+from app.config_manager import ConfigManager
+from app.config_operations import apply_operation
+from app.config_storage import SqliteStorage, create_storage, write_json_atomic
+
+
+@pytest.fixture
+def json_path(tmp_path, sample_config):
+    path = tmp_path / 'config.json'
+    write_json_atomic(path, sample_config)
+    return path
+
+
+@pytest.fixture
+def sqlite(json_path):
+    storage = create_storage('sqlite', json_path)
+    yield storage
+    storage.close()
+
+
+def reload(storage):
+    reopened = SqliteStorage(storage.path)
+    try:
+        return reopened.load()
+    finally:
+        reopened.close()
+
+
+def test_migrates_from_json(sqlite, sample_config):
+    assert isinstance(sqlite, SqliteStorage)
+    assert sqlite.load() == sample_config
+    assert reload(sqlite) == sample_config
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "add", "category": "工具",
+      "item": {"title": "Gitea", "url": "https://gitea.io", "icon": "gitea.png", "tags": ["git"]}}],
+    [{"op": "edit", "category": "开发", "title": "GitLab",
+      "item": {"title": "GitLab CE", "url": "https://gitlab.com", "icon": "gitlab.png"}}],
+    [{"op": "edit", "category": "工具", "title": "翻译", "new_category": "开发",
+      "item": {"title": "翻译", "url": "https://fanyi.baidu.com", "icon": "translate.png"}}],
+    [{"op": "delete", "category": "开发", "title": "GitHub"}],
+    [{"op": "move", "category": "开发", "title": "Python 文档", "direction": "up"}],
+    [{"op": "reorder", "category": "开发", "order": ["Python 文档", "GitHub"]}],
+    [{"op": "move_between", "category": "开发", "new_category": "工具", "title": "GitHub"},
+     {"op": "add", "category": "开发",
+      "item": {"title": "GitHub", "url": "https://github.com", "icon": "github.png"}},
+     {"op": "move", "category": "开发", "title": "GitHub", "direction": "up"}],
+])
+def test_commit_round_trip(sqlite, sample_config, operations):
+    for op in operations:
+        apply_operation(sample_config, op)
+    sqlite.commit(sample_config, operations)
+    assert reload(sqlite) == sample_config
+
+
+def test_commits_accumulate(sqlite, sample_config):
+    batches = [
+        [{"op": "delete", "category": "开发", "title": "GitLab"}],
+        [{"op": "add", "category": "开发",
+          "item": {"title": "GitLab", "url": "https://gitlab.com", "icon": "gitlab.png"}}],
+        [{"op": "move", "category": "开发", "title": "GitLab", "direction": "up"},
+         {"op": "move_between", "category": "工具", "new_category": "开发", "title": "Grafana"}],
+    ]
+    for operations in batches:
+        for op in operations:
+            apply_operation(sample_config, op)
+        sqlite.commit(sample_config, operations)
+    assert reload(sqlite) == sample_config
+
+
+def test_save_and_export(sqlite, sample_config, json_path, tmp_path, monkeypatch):
+    sample_config["categories"].reverse()
+    sample_config["categories"][0]["items"].pop()
+    sqlite.save(sample_config)
+    assert reload(sqlite) == sample_config
+
+    # 通过 ConfigManager 从 SQLite 存储导出回 JSON
+    monkeypatch.setattr(app_config, 'config_file', json_path)
+    monkeypatch.setenv('STORAGE_MODE', 'sqlite')
+    manager = ConfigManager()
+    try:
+        export_path = tmp_path / 'export.json'
+        manager.export_config(str(export_path))
+    finally:
+        manager.close()
+    assert json.loads(export_path.read_text(encoding='utf-8')) == sample_config
+
+
+def test_signature_changes_on_commit(sqlite, sample_config):
+    before = sqlite.signature()
+    op = {"op": "delete", "category": "开发", "title": "GitHub"}
+    apply_operation(sample_config, op)
+    sqlite.commit(sample_config, [op])
+    assert sqlite.signature() != before
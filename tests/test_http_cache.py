@@ -0,0 +1,63 @@
+"""条件请求（ETag / Last-Modified / 304）测试"""
+from app.static_assets import static_assets
+
+
+def test_page_etag_and_304(client):
+    response = client.get('/')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+
+    response = client.get('/', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_compressed_variant_etag(client):
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.endswith('-gzip"')
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_page_etag_changes_with_config(client, manager):
+    etag = client.get('/').headers['ETag']
+    manager.apply_operations([{"op": "delete", "category": "开发", "title": "GitHub"}])
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_page_etag_changes_with_static_assets(client, monkeypatch):
+    etag = client.get('/').headers['ETag']
+    monkeypatch.setattr(static_assets, 'digest', lambda: 'changed')
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_search_etag(client, manager):
+    response = client.get('/search?term=git')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert client.get('/search?term=git', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/search?term=hub', headers={'If-None-Match': etag}).status_code == 200
+
+    manager.apply_operations([{"op": "delete", "category": "开发", "title": "GitHub"}])
+    assert client.get('/search?term=git', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_conditional_headers_ignored_for_post(client):
+    etag = client.get('/config').headers['ETag']
+    response = client.post('/config', headers={'If-None-Match': etag}, data={})
+    assert response.status_code != 304
@@ -0,0 +1,64 @@
+"""渲染页面缓存测试"""
+import gzip
+
+from app import app
+from app.page_cache import PageCache, page_cache
+
+
+def test_cached_page_reused_until_config_changes(client, manager):
+    client.get('/')
+    before = page_cache.stats()
+    body = client.get('/').data
+    after = page_cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert b'GitHub' in body
+
+    manager.apply_operations([{"op": "edit", "category": "开发", "title": "GitHub",
+                               "item": {"title": "GitHub Enterprise", "url": "https://github.com",
+                                        "icon": "github.png"}}])
+    body = client.get('/').data
+    assert page_cache.stats()["misses"] == after["misses"] + 1
+    assert b'GitHub Enterprise' in body
+
+
+def test_pages_cached_per_template(client):
+    index = client.get('/').data
+    config = client.get('/config').data
+    assert index != config
+    assert client.get('/').data == index
+
+
+def test_compressed_page_matches_body(client):
+    plain = client.get('/').data
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == plain
+
+
+def test_render_once_per_version():
+    cache = PageCache(gzip_enabled=False)
+    calls = []
+
+    def render():
+        calls.append(1)
+        return f'<p>{len(calls)}</p>'
+
+    with app.test_request_context('/'):
+        first = cache.get('index.html', 1, render, ('etag1', 0.0))
+        assert cache.get('index.html', 1, render, ('etag1', 0.0)) is first
+        second = cache.get('index.html', 2, render, ('etag2', 0.0))
+        assert second.body == b'<p>2</p>'
+        # 旧版本的渲染结果不覆盖新版本
+        cache._render(('index.html', ''), (1, 0, 'etag1'), render, ('etag1', 0.0))
+        assert cache.get('index.html', 2, render, ('etag2', 0.0)) is second
+    assert cache.stats()["pages"] == 1
+
+
+def test_disabled_cache_always_renders():
+    cache = PageCache(enabled=False, gzip_enabled=False)
+    with app.test_request_context('/'):
+        cache.get('index.html', 1, lambda: 'a', ('etag', 0.0))
+        cache.get('index.html', 1, lambda: 'a', ('etag', 0.0))
+    assert cache.stats() == {"hits": 0, "misses": 2, "stale": 0, "pages": 0, "bytes": 0}
@@ -0,0 +1,187 @@
+"""搜索索引排序测试"""
+import json
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app.search_index import SearchIndex
+
+SCRIPT_JS = Path(__file__).resolve().parent.parent / 'app' / 'static' / 'js' / 'script.js'
+# 覆盖单字符、拼音、首字母、多个词、容错匹配和没有字母数字的查询
+TERMS = ("g", "gi", "git", "ub", "hub git", "doc", "wangpan", "wp", "邮", "cloud 1",
+         "gtihub", "exampel", "Git Lab", "notes", "/", ":/", "-", "++")
+
+
+def make_index(items, version=1):
+    index = SearchIndex()
+    index.build([{"name": "默认", "items": items}], version)
+    return index
+
+
+def item(title, url="https://example.com"):
+    return {"title": title, "url": url, "icon": "icon.png"}
+
+
+def synthetic_items(count=400, seed=42):
+    """随机组合中英文词的项目，标题大量重复以产生得分相同的结果"""
+    rng = random.Random(seed)
+    words = ["git", "hub", "lab", "docs", "mail", "cloud", "home", "note", "bit", "gate",
+             "网盘", "邮箱", "文档", "笔记"]
+    items = []
+    for i in range(count):
+        title = ' '.join(rng.sample(words, rng.randint(1, 3)))
+        url = f"https://{rng.choice(words[:10])}{i}.example.com/{rng.choice(words[:10])}"
+        items.append(item(f"{title} {i}" if i % 3 else title, url))
+    return items
+
+
+BASIC_ITEMS = [
+    item("Legit", "https://legit.example.org"),
+    item("My Git", "https://mygit.example.org"),
+    item("GitHub", "https://github.com"),
+    item("Git", "https://git-scm.com"),
+    item("Other", "https://git.example.com"),
+    item("Docs", "https://docs.example.com/git/holiday"),
+    item("谷歌翻译", "https://translate.google.com"),
+    item("翻译", "https://fanyi.baidu.com"),
+]
+
+
+@pytest.fixture
+def index():
+    return make_index(BASIC_ITEMS)
+
+
+def titles(results):
+    return [result["title"] for result in results]
+
+
+def test_match_types_rank_in_order(index):
+    results = index.search("git")
+    # 完全匹配 > 前缀 > 词首 > 主机名前缀 > 子串 > 完整 URL 中的子串
+    assert titles(results) == ["Git", "GitHub", "My Git", "Other", "Legit", "Docs"]
+    assert [result["score"] for result in results] == sorted(
+        (result["score"] for result in results), reverse=True)
+    assert results[2]["highlight"] == {"field": "title", "spans": [[3, 6]]}
+    assert results[3]["highlight"] == {"field": "url", "spans": [[8, 11]]}
+
+
+def test_pinyin_and_initials(index):
+    assert titles(index.search("fanyi")) == ["翻译", "谷歌翻译"]
+    results = index.search("fy")
+    assert titles(results) == ["翻译", "谷歌翻译"]
+    assert results[1]["highlight"] == {"field": "title", "spans": [[2, 4]]}
+
+
+def test_url_path_and_short_terms(index):
+    results = index.search("holiday")
+    assert titles(results) == ["Docs"]
+    assert results[0]["highlight"]["field"] == "url"
+    # 单个字符也能匹配
+    assert "Docs" in titles(index.search("d"))
+    assert index.search("   ") == []
+    assert index.search("git", limit=0) == []
+
+
+def test_terms_without_letters_or_digits():
+    index = make_index([item("C++", "https://isocpp.org"), item("Git", "https://git-scm.com"),
+                        item("/", "https://slash.example.com")])
+    assert titles(index.search("++")) == ["C++"]
+    assert titles(index.search("-")) == ["Git"]
+    results = index.search("/")
+    assert titles(results) == ["/", "C++", "Git"]
+    assert results[1]["highlight"] == {"field": "url", "spans": [[6, 7]]}
+    assert titles(index.search(":/", limit=1)) == ["/"]
+
+
+def test_fuzzy_match_tolerates_typos(index):
+    assert titles(index.search("githbu"))[0] == "GitHub"
+
+
+def test_ties_ordered_by_title_length_then_config_order():
+    index = make_index([item("Alpha Notes"), item("Alpha"), item("Alpha Blog"), item("Alpha")])
+    results = index.search("alpha")
+    assert titles(results) == ["Alpha", "Alpha", "Alpha Blog", "Alpha Notes"]
+
+
+def test_limit_returns_prefix_of_full_ranking():
+    items = synthetic_items()
+    index = make_index(items)
+
+    for term in TERMS:
+        full = index.search(term, limit=len(items))
+        for limit in (1, 5, 17, 50):
+            assert index.search(term, limit=limit) == full[:limit], (term, limit)
+
+
+def test_incremental_update_matches_rebuild(manager):
+    index = manager.get_search_index()
+    manager.apply_operations([
+        {"op": "add", "category": "工具", "item": item("Alpha", "https://alpha.example.com")},
+        {"op": "add", "category": "工具", "item": item("Alphb", "https://alphb.example.com")},
+        {"op": "add", "category": "工具", "item": item("Alphc", "https://alphc.example.com")},
+        {"op": "add", "category": "开发", "item": item("Gitea", "https://gitea.io")},
+    ])
+    manager.apply_operations([
+        # 只修改 URL，得分相同的结果仍按配置顺序排列
+        {"op": "edit", "category": "工具", "title": "Alpha",
+         "item": item("Alpha", "https://alpha.example.org")},
+        {"op": "edit", "category": "开发", "title": "GitLab",
+         "item": item("GitLab CE", "https://gitlab.com")},
+        {"op": "delete", "category": "开发", "title": "GitHub"},
+        {"op": "add", "category": "开发", "item": item("Gitee", "https://gitee.com")},
+    ])
+    snapshot = manager.get_snapshot()
+    # 索引是增量更新的，没有重建
+    assert manager.get_search_index() is index and index.version == snapshot.version
+    rebuilt = SearchIndex()
+    rebuilt.build(snapshot.categories, snapshot.version)
+    for term in ("alph", "git", "gite", "lab", "example", "fanyi", "fy"):
+        assert index.search(term) == rebuilt.search(term), term
+    assert titles(index.search("alph")) == ["Alpha", "Alphb", "Alphc"]
+    assert titles(index.search("gite"))[:2] == ["Gitea", "Gitee"]
+    assert "GitHub" not in titles(index.search("github"))
+    assert index.compact().data == rebuilt.compact().data
+
+
+def client_search(compact: bytes, terms, limit):
+    """用 Node.js 执行 script.js 中的浏览器端搜索，返回每个查询的结果标题"""
+    source = SCRIPT_JS.read_text(encoding='utf-8')
+    start = source.index('const SEARCH_LIMIT')
+    end = source.index('// 配置变化推送')
+    program = '\n'.join([
+        "const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));",
+        "const $ = { ajax: function(options) { options.success(input.index); } };",
+        source[start:end],
+        "loadSearchIndex('', function() {",
+        "    process.stdout.write(JSON.stringify(input.terms.map(function(term) {",
+        "        return searchLocally(term, input.limit).map(function(item) { return item.title; });",
+        "    })));",
+        "});",
+    ])
+    payload = json.dumps({"index": json.loads(compact), "terms": list(terms), "limit": limit})
+    output = subprocess.run(['node', '-e', program], input=payload, capture_output=True,
+                            text=True, check=True, timeout=60).stdout
+    return json.loads(output)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="需要 Node.js")
+@pytest.mark.parametrize("limit", [5, 50])
+def test_client_search_matches_server(limit):
+    server = make_index(BASIC_ITEMS + synthetic_items())
+    expected = [titles(server.search(term, limit)) for term in TERMS]
+    assert client_search(server.compact().data, TERMS, limit) == expected
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="需要 Node.js")
+def test_client_fuzzy_matches_only_fill_remaining_slots():
+    # 容错匹配得分（最高 40）高于完整 URL 中的子串匹配（30），但不能替换子串匹配的结果
+    server = make_index([item("Alpha", "https://h.com/xabcdefx"), item("abcde def"),
+                         item("abcde defz")])
+    for limit in (1, 2, 3):
+        expected = titles(server.search("abcdef", limit))
+        assert client_search(server.compact().data, ["abcdef"], limit) == [expected]
+    assert titles(server.search("abcdef", 2)) == ["abcde def", "Alpha"]